@@ -2,7 +2,7 @@
 Configuration settings for the AI service
 """
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Dict
 from functools import lru_cache
 
 
@@ -24,15 +24,124 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_PASSWORD: Optional[str] = None
+    REDIS_MODE: str = "standalone"          # standalone, sentinel, cluster
+    REDIS_MAX_CONNECTIONS: int = 50         # per client, per worker
+    REDIS_SOCKET_TIMEOUT: float = 2.0       # seconds; fail fast instead of hanging requests
+    REDIS_CONNECT_TIMEOUT: float = 2.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30   # seconds idle before a connection is PINGed
+    REDIS_RETRY_ON_TIMEOUT: bool = True
+    REDIS_RETRY_ATTEMPTS: int = 2
+    # Sentinel mode: comma-separated host:port list and the monitored master
+    REDIS_SENTINELS: Optional[str] = None
+    REDIS_SENTINEL_MASTER: str = "mymaster"
     
     # Cache TTL (in seconds)
     SESSION_CONTEXT_TTL: int = 3600  # 1 hour
     USER_SESSION_TTL: int = 86400    # 24 hours
     RATE_LIMIT_TTL: int = 60         # 1 minute
+    REALTIME_SESSION_TTL: int = 7200  # 2 hours idle; shared realtime session registry
+    
+    # Session context
+    SESSION_MAX_MESSAGES: int = 200  # messages kept per session list
+    USER_COACH_CONTEXT_MESSAGES: int = 20  # messages kept per user-coach context list
+    
+    # Realtime session expiry (background reaper, per worker)
+    SESSION_IDLE_TIMEOUT: int = 3600       # seconds idle before a session is ended
+    SESSION_REAPER_INTERVAL: float = 30.0  # seconds between reaper runs
+    HTTP_PENDING_RESPONSE_TTL: int = 300   # seconds an uncollected HTTP response is kept
+    
+    # WebSocket transport
+    WS_SEND_QUEUE_SIZE: int = 256      # frames buffered per connection
+    WS_SEND_TIMEOUT: float = 5.0       # seconds a full queue may block before disconnecting
+    WS_HEARTBEAT_INTERVAL: int = 15    # seconds between server pings
+    WS_HEARTBEAT_TIMEOUT: int = 45     # close connections silent this long
+    AUDIO_BUFFER_BYTES: int = 960000   # pending audio per session (30 s of 16 kHz 16-bit PCM)
+    
+    # Server-side VAD / endpointing of streamed PCM audio
+    VAD_ENABLED: bool = True
+    VAD_FRAME_MS: int = 20
+    VAD_MIN_DBFS: float = -50.0            # quieter frames are never speech
+    VAD_MAX_THRESHOLD_DBFS: float = -35.0  # normal speech always passes, however noisy the room
+    VAD_NOISE_MARGIN_DB: float = 12.0      # speech must be this far above the noise floor
+    VAD_ZCR_MAX: float = 0.35              # higher zero-crossing rates are hiss, not voice
+    VAD_START_MS: int = 60                 # voiced audio needed to start an utterance
+    VAD_HANGOVER_MS: int = 500             # silence that ends an utterance (endpoint)
+    VAD_MIN_UTTERANCE_MS: int = 250        # shorter utterances are discarded as noise
+    VAD_PREROLL_MS: int = 200              # audio kept before the detected onset
+    
+    # Streaming STT of realtime voice (partial transcripts while the user speaks)
+    STT_PROVIDER: str = "openai"           # openai, stub (local, for tests)
+    STT_MODEL: str = "whisper-1"
+    STT_LANGUAGE: Optional[str] = "en"
+    STT_PARTIAL_INTERVAL_MS: int = 700     # new audio between partial transcripts
+    STT_WINDOW_MS: int = 6000              # audio per request; longer speech is committed window by window
+    STT_WINDOW_OVERLAP_MS: int = 1000      # overlap between consecutive windows
+    STT_STUB_WORD_MS: int = 250            # stub provider: one word per this much audio
+    
+    # Speculative prompt assembly and memory retrieval from partial transcripts
+    SPECULATIVE_RETRIEVAL_ENABLED: bool = True
+    SPECULATIVE_MIN_WORDS: int = 3         # partial transcript length that starts retrieval
+    SPECULATIVE_REUSE_SIMILARITY: float = 0.6  # word overlap with the final transcript to reuse results
+    
+    # Context prefetch when a realtime session is created
+    SESSION_PREFETCH_ENABLED: bool = True
+    SESSION_PREFETCH_MEMORIES: int = 5     # recent memories added to the session's prompt
+    SESSION_PREFETCH_WAIT_MS: int = 300    # how long the first turn waits for a prefetch in flight
+    PROFILE_SUMMARY_TTL: int = 21600       # 6 hours; user profile summaries built from memories
+    PROVIDER_WARMUP_INTERVAL: float = 4.0  # seconds between connection warm-ups per provider
+    
+    # Realtime transcript tiering: hot messages in Redis, older ones rolled
+    # into zstd segments and a rolling LLM summary, flushed to Postgres on end
+    TRANSCRIPT_HOT_MESSAGES: int = 40
+    TRANSCRIPT_SEGMENT_MESSAGES: int = 20  # messages per compressed segment
+    TRANSCRIPT_SUMMARY_ENABLED: bool = True
+    TRANSCRIPT_SUMMARY_MAX_TOKENS: int = 400
+    
+    # Write-behind persistence of turns to conversation_history (Redis stream)
+    HISTORY_PERSIST_ENABLED: bool = True
+    HISTORY_FLUSH_INTERVAL_MS: int = 500   # flush at least this often...
+    HISTORY_FLUSH_BATCH_ROWS: int = 200    # ...or once this many rows are buffered
+    HISTORY_STREAM_MAXLEN: int = 100000    # approximate cap on queued entries
+    HISTORY_CLAIM_IDLE_MS: int = 60000     # reclaim entries a dead worker left unacked
+    
+    # Cache value serialization (json, orjson, msgpack)
+    CACHE_CODEC: str = "orjson"
+    CACHE_COMPRESSION_THRESHOLD: int = 2048  # zstd-compress payloads at least this big (0 = off)
+    CACHE_COMPRESSION_LEVEL: int = 3
+    
+    # In-process L1 cache (invalidated through Redis keyspace notifications)
+    L1_CACHE_ENABLED: bool = True
+    L1_CACHE_MAX_ENTRIES: int = 10000
+    L1_CACHE_TTLS: Dict[str, float] = {  # key prefix -> seconds
+        "user:": 5.0,
+        "session:": 2.0
+    }
+    
+    # Stampede protection for CacheService.get_or_compute
+    CACHE_STALE_TTL: int = 300            # seconds a stale value is served while refreshing
+    CACHE_EARLY_EXPIRY_BETA: float = 1.0  # probabilistic early refresh (0 = only on expiry)
+    CACHE_LOCK_TIMEOUT: int = 30          # seconds; cross-worker recompute lock
     
     # Rate Limiting
     RATE_LIMIT_REQUESTS: int = 60    # requests per minute
     RATE_LIMIT_ENABLED: bool = True
+    # Request weight per endpoint prefix (longest prefix wins, default 1)
+    RATE_LIMIT_ENDPOINT_COSTS: Dict[str, int] = {
+        "/ai/coach/respond": 2,
+        "/ai/coach/notes": 5,
+    }
+    # Local token leasing: each worker leases this fraction of the limit
+    # from Redis and spends it in memory. Tokens are debited globally when
+    # leased, so the limit is never exceeded; at most (workers x tolerance
+    # x limit) tokens can sit unspent in worker memory at any time
+    RATE_LIMIT_LEASE_TOLERANCE: float = 0.1
+    RATE_LIMIT_LEASE_TTL: int = 5       # seconds leased tokens stay valid
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = 10000
+    RATE_LIMIT_REDIS_RETRY: int = 5     # seconds to stay local-only after a Redis failure
+    
+    # LLM token quotas (upstream tokens per minute, per user)
+    TOKEN_BUDGET_ENABLED: bool = True
+    TOKEN_BUDGET_PER_MINUTE: int = 40000
     
     # LLM Provider (openai, groq, anthropic)
     LLM_PROVIDER: str = "openai"
@@ -56,6 +165,7 @@ class Settings(BaseSettings):
     
     # Vector DB
     EMBEDDING_DIMENSION: int = 1536
+    EMBEDDING_CACHE_TTL: int = 86400  # 24 hours
     SIMILARITY_THRESHOLD: float = 0.7
     MAX_CONTEXT_RESULTS: int = 5
     
@@ -10,7 +10,12 @@ from contextlib import asynccontextmanager
 from app.config import get_settings
 from app.database import init_db, close_db
 from app.services.cache_service import get_cache_service, close_cache_service
-from app.routers import coach_router, health_router, realtime_router
+from app.services.cache_service import CacheService
+from app.services.rate_limiter import get_rate_limiter
+from app.services.quota_service import set_quota_user
+from app.services.history_service import get_history_persister
+from app.services.realtime import get_connection_manager
+from app.routers import coach_router, health_router, realtime_router, ratelimit_router
 
 settings = get_settings()
 
@@ -35,11 +40,20 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️ Redis unavailable: {e} - caching disabled")
     
+    # Write-behind persistence of turns to Postgres
+    if settings.HISTORY_PERSIST_ENABLED:
+        get_history_persister().start()
+    
+    # Idle realtime session expiry
+    get_connection_manager().start_reaper()
+    
     print(f"🤖 LLM Provider: {settings.LLM_PROVIDER}")
     
     yield
     
     # Shutdown
+    await get_connection_manager().stop_reaper()
+    await get_history_persister().stop()
     await close_cache_service()
     await close_db()
     print("👋 AI Service shutdown complete")
@@ -71,35 +85,35 @@ async def rate_limit_middleware(request: Request, call_next):
         return await call_next(request)
     
     # Try to get user_id from request (simplified - would use auth in production)
-    user_id = request.headers.get("X-User-ID", "anonymous")
+    user_id = request.headers.get("X-User-ID")
+    if user_id:
+        # LLM calls made by this request are charged to the user's token budget
+        set_quota_user(user_id)
     
-    try:
-        cache = await get_cache_service()
-        is_allowed, remaining = await cache.check_rate_limit(
-            user_id=hash(user_id) % 1000000,  # Simple hash for demo
-            endpoint=request.url.path
+    # Spends locally leased tokens; falls back to per-worker limits
+    # when Redis is unavailable
+    result = await get_rate_limiter().acquire(
+        identity=CacheService.rate_limit_identity(user_id or "anonymous"),
+        endpoint=request.url.path
+    )
+    
+    if not result.allowed:
+        return JSONResponse(
+            status_code=429,
+            content={"error": "Rate limit exceeded. Please try again later."},
+            headers=result.headers()
         )
-        
-        if not is_allowed:
-            return JSONResponse(
-                status_code=429,
-                content={"error": "Rate limit exceeded. Please try again later."},
-                headers={"X-RateLimit-Remaining": "0"}
-            )
-        
-        response = await call_next(request)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        return response
-        
-    except Exception:
-        # If Redis is unavailable, allow the request
-        return await call_next(request)
+    
+    response = await call_next(request)
+    response.headers.update(result.headers())
+    return response
 
 
 # Include routers
 app.include_router(health_router, tags=["Health"])
 app.include_router(coach_router, prefix="/ai/coach", tags=["AI Coach"])
 app.include_router(realtime_router, prefix="/realtime", tags=["Real-time"])
+app.include_router(ratelimit_router, prefix="/ratelimit", tags=["Rate Limiting"])
 
 
 @app.get("/")
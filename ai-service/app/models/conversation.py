@@ -1,7 +1,7 @@
 """
 ConversationHistory model for storing chat history
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
 from sqlalchemy.sql import func
 
 from app.database import Base
@@ -10,6 +10,9 @@ from app.database import Base
 class ConversationHistory(Base):
     """
     Stores conversation history for context
+    
+    Rows are written behind the request path by the history persister;
+    idempotency_key makes redelivered turns insert only once.
     """
     __tablename__ = "conversation_history"
     
@@ -22,12 +25,24 @@ class ConversationHistory(Base):
     role = Column(String(20), nullable=False)  # user, assistant, system
     content = Column(Text, nullable=False)
     
-    # Optional metadata
-    metadata = Column(JSON, nullable=True)
+    # Optional metadata ("metadata" is reserved on declarative models)
+    message_metadata = Column("metadata", JSON, nullable=True)
+    
+    # Deduplicates at-least-once writes
+    idempotency_key = Column(String(64), nullable=True, unique=True)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    # Recent history of a user-coach pair
+    __table_args__ = (
+        Index(
+            'ix_conversation_history_user_coach_created',
+            'user_id',
+            'coach_id',
+            'created_at'
+        ),
+    )
+    
     def __repr__(self):
         return f"<ConversationHistory(id={self.id}, role={self.role})>"
-
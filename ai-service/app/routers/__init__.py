@@ -1,6 +1,7 @@
 from app.routers.coach import router as coach_router
 from app.routers.health import router as health_router
 from app.routers.realtime import router as realtime_router
+from app.routers.ratelimit import router as ratelimit_router
 
-__all__ = ["coach_router", "health_router", "realtime_router"]
+__all__ = ["coach_router", "health_router", "realtime_router", "ratelimit_router"]
 
@@ -6,10 +6,13 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 import json
 
+from app.config import get_settings
 from app.database import get_db
 from app.services.llm_client import get_llm_client, LLMClient
 from app.services.memory_service import MemoryService
 from app.services.cache_service import get_cache_service, CacheService
+from app.services.quota_service import ensure_token_budget
+from app.services.history_service import get_recent_history
 from app.schemas.coach import (
     CoachRespondRequest,
     CoachRespondResponse,
@@ -21,6 +24,7 @@ from app.schemas.coach import (
 )
 
 router = APIRouter()
+settings = get_settings()
 
 # Coach personas for different specialties
 COACH_PERSONAS = {
@@ -230,6 +234,8 @@ async def coach_respond(
     5. Extracts action items and metadata
     6. Stores the interaction in cache and memory
     """
+    await ensure_token_budget(request.user_id)
+    
     llm_client = get_llm_client()
     memory_service = MemoryService(db)
     
@@ -242,25 +248,20 @@ async def coach_respond(
     # Get coach persona
     persona = get_coach_persona(request.coach_id)
     
-    # Build context from Redis cache (recent conversation)
+    # Build context from Redis cache (session transcript, or the
+    # user-coach context when there is no session) in one round trip
     cached_context = []
-    if cache and request.session_id:
+    if cache:
         try:
-            cached_context = await cache.get_recent_messages(
+            turn_context = await cache.get_turn_context(
+                user_id=request.user_id,
+                coach_id=request.coach_id,
                 session_id=request.session_id,
                 limit=10
             )
+            cached_context = turn_context.history
         except Exception as e:
             print(f"Warning: Could not retrieve cached context: {e}")
-    elif cache:
-        # No session_id, try user-coach context
-        try:
-            cached_context = await cache.get_user_coach_context(
-                user_id=request.user_id,
-                coach_id=request.coach_id
-            ) or []
-        except Exception as e:
-            print(f"Warning: Could not retrieve user-coach context: {e}")
     
     # Build context from vector memories if enabled
     memory_context = ""
@@ -310,39 +311,16 @@ When responding:
     # Extract metadata using a separate call
     meta = await extract_response_metadata(llm_client, request.text, response.content)
     
-    # Store in Redis cache
+    # Store in Redis cache (session or user-coach context, one pipeline)
     if cache:
         try:
-            if request.session_id:
-                # Store in session context
-                await cache.append_message(
-                    session_id=request.session_id,
-                    user_id=request.user_id,
-                    coach_id=request.coach_id,
-                    role="user",
-                    content=request.text
-                )
-                await cache.append_message(
-                    session_id=request.session_id,
-                    user_id=request.user_id,
-                    coach_id=request.coach_id,
-                    role="assistant",
-                    content=response.content
-                )
-            else:
-                # Store in user-coach context
-                await cache.append_to_user_coach_context(
-                    user_id=request.user_id,
-                    coach_id=request.coach_id,
-                    role="user",
-                    content=request.text
-                )
-                await cache.append_to_user_coach_context(
-                    user_id=request.user_id,
-                    coach_id=request.coach_id,
-                    role="assistant",
-                    content=response.content
-                )
+            await cache.record_turn(
+                user_id=request.user_id,
+                coach_id=request.coach_id,
+                user_content=request.text,
+                assistant_content=response.content,
+                session_id=request.session_id
+            )
         except Exception as e:
             print(f"Warning: Could not cache conversation: {e}")
     
@@ -440,6 +418,8 @@ async def generate_coach_notes(
     - Topics covered
     - Follow-up questions
     """
+    await ensure_token_budget(request.user_id)
+    
     llm_client = get_llm_client()
     memory_service = MemoryService(db)
     
@@ -534,6 +514,42 @@ Be thorough but concise. Focus on actionable insights."""
     )
 
 
+@router.get("/history/{user_id}/{coach_id}")
+async def get_conversation_history(
+    user_id: int,
+    coach_id: int,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get recent conversation history for a user-coach pair
+    
+    The Redis user-coach context receives every recorded turn, so it is
+    the tail of what Postgres holds: it is served when it has at least
+    `limit` messages. Otherwise history is read from Postgres and the
+    full context window written back to the cache.
+    """
+    cache = None
+    try:
+        cache = await get_cache_service()
+        messages = await cache.get_user_coach_context(user_id, coach_id, limit=limit)
+        if messages and len(messages) >= limit:
+            return {"messages": messages, "source": "cache"}
+    except Exception as e:
+        print(f"Warning: Could not read history from cache: {e}")
+    
+    window = settings.USER_COACH_CONTEXT_MESSAGES
+    messages = await get_recent_history(db, user_id, coach_id, limit=max(limit, window))
+    
+    if messages and cache:
+        try:
+            await cache.set_user_coach_context(user_id, coach_id, messages[-window:])
+        except Exception as e:
+            print(f"Warning: Could not cache history: {e}")
+    
+    return {"messages": messages[-limit:], "source": "database"}
+
+
 @router.get("/memory/{user_id}/{coach_id}")
 async def get_user_memories(
     user_id: int,
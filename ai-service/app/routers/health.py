@@ -51,7 +51,8 @@ async def redis_health():
         if is_connected:
             return {
                 "status": "healthy",
-                "redis": "connected"
+                "redis": "connected",
+                "l1_cache": cache.get_l1_stats()
             }
         else:
             return {
@@ -0,0 +1,28 @@
+"""
+Rate Limit Router
+Lets clients inspect their request and LLM token quotas
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+
+from app.services.quota_service import get_quota_status
+
+router = APIRouter()
+
+
+@router.get("/status")
+async def rate_limit_status(
+    endpoint: str = "default",
+    x_user_id: Optional[str] = Header(default=None)
+):
+    """
+    Get quota status for the calling user
+    
+    Reports the request limit for `endpoint` and the per-minute
+    LLM token budget. Does not consume any quota.
+    """
+    try:
+        return await get_quota_status(x_user_id or "anonymous", endpoint)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Rate limit store unavailable: {str(e)}")
@@ -1,25 +1,44 @@
 """
 Real-time Communication Router
 
-HTTP endpoints for turn-based conversation (Week 1)
-Structure ready for WebSocket/WebRTC upgrade later.
+HTTP endpoints for turn-based conversation, and a WebSocket endpoint
+that streams AI responses as they are generated.
+Structure ready for WebRTC upgrade later.
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, WebSocket
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
+from dataclasses import dataclass
+import asyncio
 import time
 import uuid
 
-from app.database import get_db
-from app.services.llm_client import get_llm_client
-from app.services.cache_service import get_cache_service
+from app.config import get_settings
+from app.database import get_db, async_session_maker
+from app.services.llm_client import get_llm_client, LLMClient, LLMStream
+from app.services.cache_service import get_cache_service, CacheKeys, CacheService
+from app.services.history_service import get_recent_history
+from app.services.quota_service import ensure_token_budget
+from app.services.transcript_service import get_transcript_service
+from app.services.memory_service import MemoryService
 from app.services.realtime import (
     get_connection_manager,
+    AudioCodec,
     get_transport,
     TransportType,
     TransportMessage,
-    MessageType
+    TransportSession,
+    MessageType,
+    CancelToken,
+    IncrementalTranscriber,
+    get_stt_provider,
+    warm_up_stt,
+    StreamingVAD,
+    VADEvent,
+    VADEventType,
+    WebSocketTransport
 )
 from app.schemas.realtime import (
     CreateSessionRequest,
@@ -34,6 +53,7 @@ from app.schemas.realtime import (
 from app.routers.coach import get_coach_persona, extract_response_metadata
 
 router = APIRouter()
+settings = get_settings()
 
 
 # ============================================================
@@ -63,6 +83,12 @@ async def create_session(request: CreateSessionRequest):
     except Exception:
         pass  # Continue without caching
     
+    # Warm caches and connections for the first turn
+    if settings.SESSION_PREFETCH_ENABLED:
+        session.prefetch = asyncio.create_task(
+            prefetch_session_context(session, TransportType(request.transport.value))
+        )
+    
     return CreateSessionResponse(
         session_id=session.id,
         user_id=session.user_id,
@@ -73,8 +99,7 @@ async def create_session(request: CreateSessionRequest):
             "turn": f"/realtime/sessions/{session.id}/turn",
             "status": f"/realtime/sessions/{session.id}",
             "end": f"/realtime/sessions/{session.id}/end",
-            # Future endpoints
-            "websocket": f"/ws/sessions/{session.id}",  # Not implemented yet
+            "websocket": f"/realtime/ws/sessions/{session.id}",
         }
     )
 
@@ -98,7 +123,9 @@ async def get_session_status(session_id: str):
         turn_count=session.turn_count,
         created_at=session.created_at,
         last_activity=session.last_activity,
-        total_audio_seconds=session.total_audio_seconds
+        total_audio_seconds=session.total_audio_seconds,
+        interrupted_turns=session.interrupted_turns,
+        tokens_saved=session.tokens_saved
     )
 
 
@@ -132,7 +159,15 @@ async def end_session(
         # For now, just mark that we would generate notes
         notes_id = str(uuid.uuid4())
     
+    # Move the full transcript to Postgres
+    try:
+        await get_transcript_service().flush(session_id, session.user_id, session.coach_id)
+    except Exception as e:
+        print(f"Warning: Could not flush transcript for session {session_id}: {e}")
+    
     # End the session
+    if session.prefetch is not None:
+        session.prefetch.cancel()
     await manager.end_session(session_id)
     
     return EndSessionResponse(
@@ -144,6 +179,268 @@ async def end_session(
     )
 
 
+@router.post("/sessions/{session_id}/interrupt")
+async def interrupt_session(session_id: str):
+    """
+    Interrupt the coach (barge-in)
+    
+    Cancels the response being generated for the session, if any, on
+    this worker. WebSocket clients can send {"type": "interrupt"} instead.
+    """
+    manager = get_connection_manager()
+    session = await manager.get_session(session_id)
+    
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return {
+        "session_id": session_id,
+        "interrupted": session.interrupt("user_interrupt")
+    }
+
+
+# ============================================================
+# Session Prefetch
+# ============================================================
+
+@dataclass
+class PrefetchedContext:
+    """Turn context loaded when a session is created"""
+    system_prompt: str                   # Persona prompt with profile and memories
+    history: List[Dict[str, str]]        # User-coach history at creation
+
+
+async def load_history(cache: Optional[CacheService], user_id: int, coach_id: int) -> List[Dict[str, str]]:
+    """
+    The user-coach history, read into Redis and the L1 if it is not there
+    """
+    if cache is not None:
+        try:
+            # Also fills the L1 for the turn context
+            turn_context = await cache.get_turn_context(user_id=user_id, coach_id=coach_id, limit=10)
+            if turn_context.history:
+                return turn_context.history
+        except Exception as e:
+            print(f"Warning: Could not read cached context: {e}")
+    
+    # Expired from Redis: read it back from Postgres
+    try:
+        async with async_session_maker() as db:
+            history = await get_recent_history(db, user_id, coach_id, limit=10)
+    except Exception as e:
+        print(f"Warning: Could not load history: {e}")
+        return []
+    
+    if history and cache is not None:
+        try:
+            await cache.set_user_coach_context(user_id, coach_id, history)
+        except Exception as e:
+            print(f"Warning: Could not cache history: {e}")
+    return history
+
+
+async def load_recent_memories(user_id: int, coach_id: int) -> List[str]:
+    """The user's most recent memories with the coach"""
+    try:
+        async with async_session_maker() as db:
+            memories = await MemoryService(db).get_recent_context(
+                user_id, coach_id, limit=settings.SESSION_PREFETCH_MEMORIES
+            )
+        return [mem["text"] for mem in memories]
+    except Exception as e:
+        print(f"Warning: Could not load memories: {e}")
+        return []
+
+
+async def load_profile_summary(cache: Optional[CacheService], user_id: int, coach_id: int) -> Optional[str]:
+    """The user's profile summary, computed at most once per PROFILE_SUMMARY_TTL"""
+    async def summarize() -> Optional[str]:
+        async with async_session_maker() as db:
+            return await MemoryService(db).summarize_profile(user_id, coach_id)
+    
+    try:
+        if cache is None:
+            return await summarize()
+        return await cache.get_or_compute(
+            CacheKeys.user_profile(user_id, coach_id),
+            summarize,
+            ttl=settings.PROFILE_SUMMARY_TTL
+        )
+    except Exception as e:
+        print(f"Warning: Could not load profile summary: {e}")
+        return None
+
+
+async def prefetch_session_context(
+    session: TransportSession,
+    transport_type: TransportType
+) -> PrefetchedContext:
+    """
+    Load everything the first turn of a session needs
+    
+    Runs in the background after the session is created: warms the
+    user-coach context in Redis and the L1, loads recent memories and the
+    profile summary, renders the persona prompt once and opens the
+    provider connections the first turn will use.
+    """
+    try:
+        cache = await get_cache_service()
+    except Exception:
+        cache = None
+    
+    warm_ups = [get_llm_client().warm_up()]
+    if transport_type == TransportType.WEBSOCKET:
+        warm_ups.append(warm_up_stt())
+    
+    history, memories, profile, *_ = await asyncio.gather(
+        load_history(cache, session.user_id, session.coach_id),
+        load_recent_memories(session.user_id, session.coach_id),
+        load_profile_summary(cache, session.user_id, session.coach_id),
+        *warm_ups
+    )
+    return PrefetchedContext(
+        system_prompt=render_system_prompt(session.coach_id, profile, memories),
+        history=history
+    )
+
+
+async def get_prefetched_context(session: TransportSession) -> Optional[PrefetchedContext]:
+    """
+    The session's prefetched context, waiting up to SESSION_PREFETCH_WAIT_MS
+    
+    Returns:
+        The context, or None if there is none on this worker, it failed or
+        it is not ready in time
+    """
+    task = session.prefetch
+    if task is None:
+        return None
+    if not task.done():
+        await asyncio.wait([task], timeout=settings.SESSION_PREFETCH_WAIT_MS / 1000)
+        if not task.done():
+            return None
+    if task.cancelled() or task.exception() is not None:
+        return None
+    return task.result()
+
+
+# ============================================================
+# Turn Processing (shared by HTTP and WebSocket)
+# ============================================================
+
+def render_system_prompt(
+    coach_id: int,
+    profile_summary: Optional[str] = None,
+    memories: Optional[List[str]] = None
+) -> str:
+    """
+    Render the session-level system prompt for a coach
+    
+    Args:
+        coach_id: Coach ID
+        profile_summary: Summary of what the coach knows about the user
+        memories: Recent memories of the user
+    
+    Returns:
+        The system prompt
+    """
+    persona = get_coach_persona(coach_id)
+    system_prompt = f"""{persona['system_prompt']}
+
+You are having a live coaching conversation. Keep responses conversational but insightful.
+If you identify action items, mention them naturally in your response.
+"""
+    if profile_summary:
+        system_prompt += f"""
+About this client:
+{profile_summary}
+"""
+    if memories:
+        system_prompt += "\nRecent notes about this client:\n"
+        for memory in memories:
+            system_prompt += f"- {memory}\n"
+    return system_prompt
+
+
+async def build_turn_prompt(session: TransportSession) -> Tuple[str, List[Dict[str, str]]]:
+    """
+    Build the system prompt and history for a session's next turn
+    
+    The history is the session's hot transcript tier; everything rolled
+    out of it is covered by the rolling summary, so no part of the session
+    is lost. Before the first turn, the user-coach history of previous
+    conversations is used instead (prefetched at session creation when
+    available, along with the rendered prompt).
+    
+    Returns:
+        Tuple of (system_prompt, history)
+    """
+    prefetched = await get_prefetched_context(session)
+    
+    # This session so far: recent messages plus a summary of older ones
+    try:
+        session_summary, history = await get_transcript_service().get_context(session.id)
+    except Exception:
+        session_summary = None
+        history = [{"role": t["role"], "content": t["content"]} for t in session.transcript]
+    
+    # No turns yet: continue from previous conversations
+    if not history:
+        if prefetched is not None:
+            history = prefetched.history
+        else:
+            try:
+                cache = await get_cache_service()
+                turn_context = await cache.get_turn_context(
+                    user_id=session.user_id,
+                    coach_id=session.coach_id,
+                    limit=10
+                )
+                history = turn_context.history
+            except Exception:
+                history = []
+    
+    # Build system prompt
+    if prefetched is not None:
+        system_prompt = prefetched.system_prompt
+    else:
+        system_prompt = render_system_prompt(session.coach_id)
+    if session_summary:
+        system_prompt += f"""
+Summary of earlier in this session:
+{session_summary}
+"""
+    
+    return system_prompt, history
+
+
+async def complete_turn(session: TransportSession, user_text: str, reply: str):
+    """Record a finished turn in the session, registry, cache and transcript"""
+    # Add turns to session transcript
+    session.add_turn("user", user_text)
+    session.add_turn("assistant", reply)
+    manager = get_connection_manager()
+    await manager.record_activity(session, turns=2)
+    
+    # Update cache
+    try:
+        cache = await get_cache_service()
+        await cache.record_turn(
+            user_id=session.user_id,
+            coach_id=session.coach_id,
+            user_content=user_text,
+            assistant_content=reply,
+            metadata={"realtime_session_id": session.id}
+        )
+    except Exception:
+        pass  # Continue without caching
+    
+    try:
+        await get_transcript_service().append_turn(session.id, user_text, reply)
+    except Exception as e:
+        print(f"Warning: Could not store transcript for session {session.id}: {e}")
+
+
 # ============================================================
 # Turn-Based Communication (HTTP)
 # ============================================================
@@ -162,7 +459,7 @@ async def send_turn(
     2. AI processes and responds
     3. Response returned immediately
     
-    Future: Will support audio input/output and streaming.
+    For streamed responses, use the WebSocket endpoint.
     """
     start_time = time.time()
     
@@ -175,65 +472,38 @@ async def send_turn(
     if not session.is_active:
         raise HTTPException(status_code=400, detail="Session has ended")
     
+    await ensure_token_budget(session.user_id)
+    
+    # A new turn supersedes one still in flight on this worker
+    token = session.begin_turn()
+    
     # Mark session as processing
     session.is_processing = True
     session.update_activity()
     
-    # Get coach persona
-    persona = get_coach_persona(session.coach_id)
+    system_prompt, history = await build_turn_prompt(session)
     
-    # Get conversation history from cache
-    try:
-        cache = await get_cache_service()
-        history = await cache.get_user_coach_context(
-            user_id=session.user_id,
-            coach_id=session.coach_id
-        ) or []
-    except Exception:
-        history = [{"role": t["role"], "content": t["content"]} for t in session.transcript]
-    
-    # Build system prompt
-    system_prompt = f"""{persona['system_prompt']}
-
-You are having a live coaching conversation. Keep responses conversational but insightful.
-If you identify action items, mention them naturally in your response.
-"""
-    
-    # Generate AI response
+    # Generate AI response (as a task, so an interrupt can abort it)
     llm_client = get_llm_client()
     
+    generation = token.attach(asyncio.create_task(llm_client.generate(
+        prompt=request.text,
+        system_prompt=system_prompt,
+        history=history
+    )))
     try:
-        response = await llm_client.generate(
-            prompt=request.text,
-            system_prompt=system_prompt,
-            history=history[-10:]  # Last 10 turns for context
-        )
+        response = await generation
+    except asyncio.CancelledError:
+        if not token.cancelled:
+            raise
+        raise HTTPException(status_code=409, detail=f"Turn interrupted ({token.reason})")
     except Exception as e:
-        session.is_processing = False
         raise HTTPException(status_code=500, detail=f"AI processing failed: {str(e)}")
+    finally:
+        session.is_processing = False
+        session.end_turn(token)
     
-    # Add turns to session transcript
-    session.add_turn("user", request.text)
-    session.add_turn("assistant", response.content)
-    session.is_processing = False
-    
-    # Update cache
-    try:
-        cache = await get_cache_service()
-        await cache.append_to_user_coach_context(
-            user_id=session.user_id,
-            coach_id=session.coach_id,
-            role="user",
-            content=request.text
-        )
-        await cache.append_to_user_coach_context(
-            user_id=session.user_id,
-            coach_id=session.coach_id,
-            role="assistant",
-            content=response.content
-        )
-    except Exception:
-        pass  # Continue without caching
+    await complete_turn(session, request.text, response.content)
     
     # Extract metadata
     meta = await extract_response_metadata(llm_client, request.text, response.content)
@@ -282,21 +552,543 @@ async def cleanup_stale_sessions(max_idle_minutes: int = 60):
 
 
 # ============================================================
-# Future: WebSocket Endpoint (Placeholder)
+# Streaming Communication (WebSocket)
 # ============================================================
 
-# @router.websocket("/ws/sessions/{session_id}")
-# async def websocket_session(websocket: WebSocket, session_id: str):
-#     """
-#     WebSocket endpoint for streaming conversation
-#     
-#     NOT IMPLEMENTED YET - Placeholder for future sprint
-#     
-#     Flow:
-#     1. Client connects via WebSocket
-#     2. Client sends audio chunks or text
-#     3. Server streams transcription + AI response
-#     4. Bidirectional real-time communication
-#     """
-#     await websocket.close(code=4001, reason="WebSocket not implemented yet. Use HTTP /turn endpoint.")
+@router.websocket("/ws/sessions/{session_id}")
+async def websocket_session(websocket: WebSocket, session_id: str):
+    """
+    WebSocket endpoint for streaming conversation
+    
+    Flow:
+    1. Client creates a session, then connects here
+    2. Client sends {"type": "text", "content": "..."} messages
+    3. Server streams ai_response_start, ai_response_chunk..., ai_response_end
+       as tokens arrive, then turn_metadata (actions, summary)
+    4. Either side may send {"type": "ping"}; the other answers "pong"
+    
+    Audio is sent as binary frames (28-byte header + raw payload, see
+    app/services/realtime/audio.py) between audio_start and audio_end, and
+    buffered in the session's pending audio ring buffer. For raw PCM the
+    server runs its own VAD (app/services/realtime/vad.py): it sends
+    speech_start when the user starts talking (a barge-in) and speech_end
+    as soon as they stop, without waiting for audio_end. With VAD disabled,
+    PCM utterances end at audio_end; compressed audio can't be transcribed
+    and is rejected with an UNSUPPORTED_AUDIO_FORMAT error at audio_end.
+    
+    While the user speaks, the utterance is transcribed incrementally
+    (app/services/realtime/stt.py) and sent as transcript_partial messages;
+    the prompt and memories for the turn are prepared from the partial
+    text. At the endpoint only the tail is left to transcribe: the server
+    sends transcript_final and streams the response as for a text message.
+    
+    Barge-in: a new text message, {"type": "interrupt"} or
+    {"type": "audio_start"} (user started speaking) while a response is in
+    flight cancels it. The client gets ai_response_cancelled with the
+    tokens saved, and queued response frames are discarded.
+    """
+    manager = get_connection_manager()
+    session = await manager.get_session(session_id)
+    
+    if not session or not session.is_active:
+        await websocket.close(code=4404, reason="Session not found")
+        return
+    
+    transport = manager.get_transport(TransportType.WEBSOCKET)
+    await manager.connect_websocket(session, websocket)
+    # This handler's own connection: a reconnect replaces it with a new one
+    connection = transport.get_connection(session_id)
+    
+    await transport.send(session_id, TransportMessage(
+        type=MessageType.SESSION_START,
+        session_id=session_id,
+        user_id=session.user_id,
+        coach_id=session.coach_id
+    ))
+    
+    turn: Optional[asyncio.Task] = None
+    transcriber: Optional[IncrementalTranscriber] = None
+    speculation: Optional[SpeculativeContext] = None
+    # Of the last audio chunk
+    audio_format: Optional[str] = None
+    pcm_audio = False
+    
+    async def interrupt(reason: str):
+        """Cancel the in-flight turn and wait for it to wind down"""
+        if turn is None or turn.done():
+            return
+        if session.cancel_token is None:
+            # Still transcribing the previous utterance: no response to report
+            turn.cancel()
+        elif not session.interrupt(reason):
+            return
+        await asyncio.wait([turn])
+    
+    async def on_partial(text: str):
+        """Forward a partial transcript and prepare the turn from it"""
+        nonlocal speculation
+        await transport.send(session_id, TransportMessage(
+            type=MessageType.TRANSCRIPT_PARTIAL,
+            content=text,
+            is_final=False,
+            session_id=session_id
+        ))
+        if settings.SPECULATIVE_RETRIEVAL_ENABLED and len(text.split()) >= settings.SPECULATIVE_MIN_WORDS:
+            if speculation is None:
+                speculation = SpeculativeContext(session, text)
+            else:
+                speculation.update(text)
+    
+    def drop_utterance():
+        """Abandon the utterance being transcribed"""
+        nonlocal transcriber, speculation
+        if transcriber is not None:
+            transcriber.cancel()
+        if speculation is not None:
+            speculation.cancel()
+        transcriber = speculation = None
+    
+    def finish_utterance() -> asyncio.Task:
+        """Hand the utterance over to a voice turn"""
+        nonlocal transcriber, speculation
+        transcriber.cancel()
+        # Taken now: chunks of the next utterance are buffered while the turn runs
+        audio = session.pending_audio.read()
+        task = asyncio.create_task(voice_turn(session, transcriber, audio, transport, speculation))
+        transcriber = speculation = None
+        return task
+    
+    try:
+        while True:
+            message = await transport.receive(session_id, connection)
+            if message is None:
+                break
+            
+            if message.type == MessageType.SESSION_END:
+                break
+            
+            if message.type == MessageType.INTERRUPT:
+                await interrupt("user_interrupt")
+                continue
+            
+            if message.type == MessageType.AUDIO_START:
+                session.is_speaking = True
+                await interrupt("barge_in")
+                continue
+            
+            if message.type == MessageType.AUDIO_CHUNK:
+                buffer_audio(session, message)
+                audio_format, pcm_audio = message.audio_format, is_pcm(message)
+                for event in detect_speech(session, message):
+                    if event.type == VADEventType.SPEECH_START:
+                        await interrupt("barge_in")
+                        drop_utterance()
+                        transcriber = IncrementalTranscriber(
+                            get_stt_provider(),
+                            message.sample_rate,
+                            on_partial
+                        )
+                    elif event.type == VADEventType.ENDPOINT:
+                        await report_audio(session)
+                        if transcriber is not None:
+                            turn = finish_utterance()
+                    else:
+                        drop_utterance()
+                    await transport.send(session_id, speech_message(session, event))
+                if transcriber is None and is_pcm(message) and not uses_server_vad(message):
+                    # Client-side endpointing: the utterance runs until audio_end
+                    await interrupt("barge_in")
+                    transcriber = IncrementalTranscriber(
+                        get_stt_provider(),
+                        message.sample_rate,
+                        on_partial
+                    )
+                if transcriber is not None:
+                    transcriber.feed(session.pending_audio)
+                continue
+            
+            if message.type == MessageType.AUDIO_END:
+                session.is_speaking = False
+                if session.vad is not None:
+                    session.vad.reset()
+                await report_audio(session)
+                if transcriber is not None:
+                    # End of a client-endpointed utterance, or the client
+                    # stopped streaming mid-utterance
+                    turn = finish_utterance()
+                elif session.pending_audio and not pcm_audio:
+                    # Compressed audio (or PCM without a sample rate): the
+                    # STT providers only take raw PCM
+                    session.pending_audio.clear()
+                    await transport.send(session_id, TransportMessage.error(
+                        code="UNSUPPORTED_AUDIO_FORMAT",
+                        message=f"Cannot transcribe {audio_format} audio; send 16-bit mono PCM with a sample rate",
+                        session_id=session_id
+                    ))
+                continue
+            
+            if message.type != MessageType.TEXT or not message.content:
+                await transport.send(session_id, TransportMessage.error(
+                    code="INVALID_MESSAGE_TYPE",
+                    message=f"Unsupported message type: {message.type.value}",
+                    session_id=session_id
+                ))
+                continue
+            
+            # A new user turn supersedes the response in flight
+            await interrupt("new_turn")
+            turn = asyncio.create_task(
+                stream_turn(session, str(message.content), transport)
+            )
+    finally:
+        # Nobody is listening: stop transcribing and generating
+        drop_utterance()
+        if turn is not None and session.cancel_token is None:
+            turn.cancel()
+        if not transport.is_replaced(session_id, connection):
+            # Otherwise the session's turn and audio belong to the new connection
+            session.interrupt("disconnect")
+            await report_audio(session)
+        await transport.disconnect(session_id, connection)
+
+
+def is_pcm(message: TransportMessage) -> bool:
+    """Whether an audio chunk is raw PCM with a known sample rate (analysable and transcribable as is)"""
+    return message.audio_format == AudioCodec.PCM.format and bool(message.sample_rate)
+
+
+def uses_server_vad(message: TransportMessage) -> bool:
+    """Whether server-side VAD applies (raw PCM with a known sample rate)"""
+    return settings.VAD_ENABLED and is_pcm(message)
+
+
+def buffer_audio(session: TransportSession, message: TransportMessage):
+    """Append an audio chunk to the session's pending audio"""
+    if not uses_server_vad(message):
+        # Client-side endpointing: speaking until audio_end
+        session.is_speaking = True
+    overwritten = session.pending_audio.write(message.content)
+    if overwritten:
+        print(f"Warning: Audio buffer full for session {session.id}, dropped {overwritten} bytes")
+    
+    # Duration is known without decoding only for raw PCM (16-bit mono)
+    if is_pcm(message):
+        seconds = len(message.content) / (message.sample_rate * 2)
+        session.total_audio_seconds += seconds
+        session.unreported_audio_seconds += seconds
+
+
+def detect_speech(session: TransportSession, message: TransportMessage) -> List[VADEvent]:
+    """
+    Run server-side VAD over a buffered PCM chunk
+    
+    On speech start, pending audio older than the onset (minus
+    VAD_PREROLL_MS) is released, so the buffer holds just the utterance;
+    audio of discarded (too short) utterances is dropped.
+    
+    Returns:
+        VAD events for the chunk (none for compressed audio)
+    """
+    if not uses_server_vad(message):
+        return []
+    
+    vad = session.vad
+    if vad is None or vad.sample_rate != message.sample_rate:
+        vad = session.vad = StreamingVAD(message.sample_rate)
+    
+    events = vad.process(message.content)
+    for event in events:
+        if event.type == VADEventType.SPEECH_START:
+            session.is_speaking = True
+            preroll = message.sample_rate * 2 * settings.VAD_PREROLL_MS // 1000
+            excess = len(session.pending_audio) - (event.offset_bytes + preroll)
+            if excess > 0:
+                session.pending_audio.consume(excess)
+        else:
+            session.is_speaking = False
+            if event.type == VADEventType.DISCARDED:
+                session.pending_audio.clear()
+    return events
+
+
+def speech_message(session: TransportSession, event: VADEvent) -> TransportMessage:
+    """Client notification of a VAD event"""
+    if event.type == VADEventType.SPEECH_START:
+        return TransportMessage(type=MessageType.SPEECH_START, session_id=session.id)
+    return TransportMessage(
+        type=MessageType.SPEECH_END,
+        content={
+            "speech_ms": event.speech_ms,
+            "discarded": event.type == VADEventType.DISCARDED
+        },
+        session_id=session.id
+    )
+
+
+async def report_audio(session: TransportSession):
+    """Publish audio seconds received since the last report to the registry"""
+    seconds = session.unreported_audio_seconds
+    if seconds:
+        session.unreported_audio_seconds = 0.0
+        await get_connection_manager().record_activity(session, audio_seconds=seconds)
+
+
+def word_similarity(a: str, b: str) -> float:
+    """Jaccard similarity of the word sets of two texts"""
+    words_a = set(a.lower().split())
+    words_b = set(b.lower().split())
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+async def retrieve_memories(session: TransportSession, query: str) -> List[str]:
+    """Memories from previous conversations relevant to a query"""
+    try:
+        async with async_session_maker() as db:
+            memories = await MemoryService(db).search_similar(
+                user_id=session.user_id,
+                coach_id=session.coach_id,
+                query=query,
+                limit=5
+            )
+        return [mem.text for mem in memories]
+    except Exception as e:
+        print(f"Warning: Could not retrieve memories: {e}")
+        return []
+
+
+class SpeculativeContext:
+    """
+    Turn context prepared from a partial transcript
+    
+    The prompt (persona, history, session summary) and the memory search
+    run while the user is still speaking. The memories are kept if the
+    final transcript is close enough to the text they were searched for
+    (SPECULATIVE_REUSE_SIMILARITY), otherwise they are searched again.
+    """
+    
+    def __init__(self, session: TransportSession, query: str):
+        self.session = session
+        self.query = query
+        self.turn_count = session.turn_count
+        self.prompt = asyncio.create_task(build_turn_prompt(session))
+        self.memories = asyncio.create_task(retrieve_memories(session, query))
+    
+    def update(self, query: str):
+        """Search again if the partial transcript has moved on"""
+        if word_similarity(query, self.query) >= settings.SPECULATIVE_REUSE_SIMILARITY:
+            return
+        self.memories.cancel()
+        self.query = query
+        self.memories = asyncio.create_task(retrieve_memories(self.session, query))
+    
+    async def resolve(self, text: str) -> Tuple[str, List[Dict[str, str]]]:
+        """
+        The system prompt (with memories) and history for the final transcript
+        
+        Returns:
+            Tuple of (system_prompt, history)
+        """
+        if self.session.turn_count != self.turn_count:
+            # A turn was recorded since: the history is out of date
+            self.prompt.cancel()
+            self.prompt = asyncio.create_task(build_turn_prompt(self.session))
+        if word_similarity(text, self.query) < settings.SPECULATIVE_REUSE_SIMILARITY:
+            self.memories.cancel()
+            self.query = text
+            self.memories = asyncio.create_task(retrieve_memories(self.session, text))
+        
+        system_prompt, history = await self.prompt
+        memories = await self.memories
+        if memories:
+            system_prompt += "\nRelevant context from previous conversations:\n"
+            for memory in memories:
+                system_prompt += f"- {memory}\n"
+        return system_prompt, history
+    
+    def cancel(self):
+        """Stop work that is no longer needed"""
+        self.prompt.cancel()
+        self.memories.cancel()
+
+
+async def voice_turn(
+    session: TransportSession,
+    transcriber: IncrementalTranscriber,
+    audio: bytes,
+    transport: WebSocketTransport,
+    context: Optional[SpeculativeContext] = None
+) -> Optional[str]:
+    """
+    Finish transcribing an utterance, then run its turn
+    
+    Args:
+        session: The session
+        transcriber: The utterance's transcriber (already cancelled)
+        audio: The utterance's audio not yet committed by the transcriber
+        transport: WebSocket transport to stream over
+        context: Prompt and memories prepared while the user was speaking
+    
+    Returns:
+        The reply, or None if nothing was said or the turn did not complete
+    """
+    try:
+        try:
+            text = await transcriber.finalize(audio)
+        except Exception as e:
+            await transport.send(session.id, TransportMessage.error(
+                code="STT_ERROR",
+                message=f"Transcription failed: {str(e)}",
+                session_id=session.id
+            ))
+            return None
+        if not text:
+            return None
+        
+        await transport.send(session.id, TransportMessage(
+            type=MessageType.TRANSCRIPT_FINAL,
+            content=text,
+            session_id=session.id
+        ))
+        
+        if context is None and settings.SPECULATIVE_RETRIEVAL_ENABLED:
+            # Too short to have started early
+            context = SpeculativeContext(session, text)
+        return await stream_turn(session, text, transport, context=context)
+    finally:
+        if context is not None:
+            context.cancel()
+
+
+async def stream_turn(
+    session: TransportSession,
+    text: str,
+    transport: WebSocketTransport,
+    context: Optional["SpeculativeContext"] = None
+) -> Optional[str]:
+    """
+    Run one turn over a WebSocket, streaming the response as it is generated
+    
+    The turn's task is attached to the session's cancel token, so an
+    interrupt aborts the provider stream or the metadata extraction,
+    whichever is running. Recording a delivered reply is not interrupted.
+    
+    Args:
+        session: The session
+        text: The user's message
+        transport: WebSocket transport to stream over
+        context: Prompt and memories prepared while the user was speaking
+    
+    Returns:
+        The reply, or None if the turn failed or the client went away
+    
+    Raises:
+        asyncio.CancelledError: When interrupted (after the client was told)
+    """
+    start_time = time.time()
+    
+    try:
+        await ensure_token_budget(session.user_id)
+    except HTTPException as e:
+        await transport.send(session.id, TransportMessage.error(
+            code="RATE_LIMITED",
+            message=str(e.detail),
+            session_id=session.id
+        ))
+        return None
+    
+    token = session.begin_turn()
+    token.attach(asyncio.current_task())
+    
+    session.is_processing = True
+    session.update_activity()
+    
+    llm_client = get_llm_client()
+    stream = None
+    stage = "response"
+    try:
+        if context is not None:
+            system_prompt, history = await context.resolve(text)
+        else:
+            system_prompt, history = await build_turn_prompt(session)
+        stream = llm_client.stream(
+            prompt=text,
+            system_prompt=system_prompt,
+            history=history
+        )
+        reply = await transport.stream_response(session.id, token.guard(stream))
+        if reply is None:
+            return None
+        
+        # Delivered: record it even if the user interrupts from here on
+        stage = "post_processing"
+        session.is_processing = False
+        await asyncio.shield(complete_turn(session, text, reply))
+        
+        # Extract metadata once the reply has been delivered
+        meta = await extract_response_metadata(llm_client, text, reply)
+        metadata: Dict[str, Any] = {
+            "turn_number": session.turn_count,
+            "actions": [a.dict() for a in meta.actions] if meta.actions else [],
+            "summary": meta.summary,
+            "processing_time_ms": int((time.time() - start_time) * 1000),
+            "tokens_used": stream.usage.get("total_tokens")
+        }
+        await transport.send(session.id, TransportMessage(
+            type=MessageType.TURN_METADATA,
+            content=metadata,
+            session_id=session.id
+        ))
+        return reply
+    except asyncio.CancelledError:
+        if not token.cancelled:
+            raise
+        if stream is not None:
+            # Stops the provider request and charges what was generated
+            await stream.aclose()
+        await report_cancelled(session, transport, token, stage, stream, llm_client)
+        raise
+    except Exception as e:
+        await transport.send(session.id, TransportMessage.error(
+            code="AI_ERROR",
+            message=f"AI processing failed: {str(e)}",
+            session_id=session.id
+        ))
+        return None
+    finally:
+        if stream is not None:
+            await stream.aclose()
+        session.is_processing = False
+        session.end_turn(token)
+
 
+async def report_cancelled(
+    session: TransportSession,
+    transport: WebSocketTransport,
+    token: CancelToken,
+    stage: str,
+    stream: Optional[LLMStream],
+    llm_client: LLMClient
+):
+    """Tell the client an interrupted response was aborted, and what it saved"""
+    tokens_generated = 0
+    tokens_saved = 0
+    if stage == "response":
+        # Whatever of the reply is still queued will not be heard
+        transport.discard_pending(session.id)
+        if stream is not None:
+            tokens_generated = stream.usage.get("completion_tokens", 0)
+            tokens_saved = llm_client.estimate_tokens_saved(stream)
+    session.tokens_saved += tokens_saved
+    
+    await transport.send(session.id, TransportMessage(
+        type=MessageType.AI_RESPONSE_CANCELLED,
+        content={
+            "reason": token.reason,
+            "stage": stage,
+            "tokens_generated": tokens_generated,
+            "tokens_saved": tokens_saved
+        },
+        session_id=session.id
+    ))
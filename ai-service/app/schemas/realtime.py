@@ -61,6 +61,8 @@ class SessionStatusResponse(BaseModel):
     created_at: str
     last_activity: str
     total_audio_seconds: float = 0.0
+    interrupted_turns: int = Field(default=0, description="Responses cut off by the user (this worker)")
+    tokens_saved: int = Field(default=0, description="Estimated LLM tokens not generated due to interrupts")
 
 
 class EndSessionRequest(BaseModel):
@@ -141,7 +143,10 @@ class StreamingChunk(BaseModel):
 
 class AudioChunk(BaseModel):
     """
-    Audio data chunk (for future streaming)
+    Audio data chunk for JSON-only clients
+    
+    WebSocket clients should send binary audio frames instead (no base64
+    overhead); see app/services/realtime/audio.py.
     """
     session_id: str
     sequence: int
@@ -170,6 +175,13 @@ class ConnectionStats(BaseModel):
     total_sessions: int
     active_sessions: int
     by_transport: Dict[str, int]
+    scheduled_expiries: int = Field(default=0, description="Entries in the idle expiry heap")
+    reaped_sessions: int = Field(default=0, description="Idle sessions ended by the reaper")
+    swept_entries: int = Field(default=0, description="Orphaned session state entries dropped")
+    websocket: Optional[Dict[str, int]] = Field(
+        default=None,
+        description="Open WebSocket connections and send queue counters (this worker)"
+    )
 
 
 # ============================================================
@@ -2,6 +2,7 @@ from app.services.llm_client import LLMClient, get_llm_client
 from app.services.embedding_service import EmbeddingService, get_embedding_service
 from app.services.memory_service import MemoryService
 from app.services.cache_service import CacheService, get_cache_service, CacheKeys
+from app.services.rate_limiter import HierarchicalRateLimiter, get_rate_limiter
 from app.services.realtime import (
     TransportType,
     TransportMessage,
@@ -20,6 +21,8 @@ __all__ = [
     "CacheService",
     "get_cache_service",
     "CacheKeys",
+    "HierarchicalRateLimiter",
+    "get_rate_limiter",
     "TransportType",
     "TransportMessage",
     "TransportSession",
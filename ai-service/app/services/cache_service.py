@@ -3,43 +3,214 @@ Redis Cache Service
 Handles conversation state, session context, and rate limiting
 """
 import json
-from typing import Optional, List, Dict, Any
+import math
+import time
+import uuid
+import random
+import asyncio
+import hashlib
+from typing import Optional, List, Dict, Any, Callable, Awaitable, Tuple
 from datetime import datetime
 from dataclasses import dataclass, asdict
+from urllib.parse import urlparse
 import redis.asyncio as redis
+from redis.asyncio.cluster import RedisCluster
+from redis.asyncio.sentinel import Sentinel
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
 
 from app.config import get_settings
+from app.services.local_cache import LocalCache, MISSING
+
+# Optional fast serializers / compression (fall back to stdlib json)
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
 
 settings = get_settings()
 
 
+class CacheCodec:
+    """
+    Serializer for binary cache values
+    
+    Encoded values carry a 3-byte header so formats can change without
+    invalidating the cache:
+    
+        byte 0: magic (0xCA)
+        byte 1: header version
+        byte 2: flags - low nibble is the payload format,
+                0x10 marks a zstd-compressed payload
+    
+    Values without the magic byte are legacy JSON and decoded as such.
+    """
+    
+    MAGIC = 0xCA
+    VERSION = 1
+    
+    FORMAT_JSON = 0x01
+    FORMAT_MSGPACK = 0x02
+    FLAG_ZSTD = 0x10
+    
+    def __init__(
+        self,
+        format: str = "orjson",
+        compression_threshold: int = 0,
+        compression_level: int = 3
+    ):
+        if format == "msgpack" and msgpack is None:
+            format = "orjson"
+        if format == "orjson" and orjson is None:
+            format = "json"
+        self.format = format
+        
+        self.compression_threshold = compression_threshold if zstandard else 0
+        self._compressor = (
+            zstandard.ZstdCompressor(level=compression_level)
+            if self.compression_threshold else None
+        )
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+    
+    def encode(self, value: Any) -> bytes:
+        """Serialize a value with a versioned header"""
+        if self.format == "msgpack":
+            payload = msgpack.packb(value, use_bin_type=True)
+            flags = self.FORMAT_MSGPACK
+        elif self.format == "orjson":
+            payload = orjson.dumps(value)
+            flags = self.FORMAT_JSON
+        else:
+            payload = json.dumps(value, separators=(",", ":")).encode("utf-8")
+            flags = self.FORMAT_JSON
+        
+        if self._compressor and len(payload) >= self.compression_threshold:
+            payload = self._compressor.compress(payload)
+            flags |= self.FLAG_ZSTD
+        
+        return bytes((self.MAGIC, self.VERSION, flags)) + payload
+    
+    def decode(self, data: Any) -> Any:
+        """Deserialize a value written by encode() or a legacy JSON string"""
+        if isinstance(data, str):
+            return json.loads(data)
+        if not data or data[0] != self.MAGIC:
+            return orjson.loads(data) if orjson else json.loads(data)
+        
+        flags = data[2]
+        payload = memoryview(data)[3:]
+        
+        if flags & self.FLAG_ZSTD:
+            if self._decompressor is None:
+                raise ValueError("zstandard is required to read compressed cache values")
+            payload = self._decompressor.decompress(payload)
+        
+        if flags & 0x0F == self.FORMAT_MSGPACK:
+            if msgpack is None:
+                raise ValueError("msgpack is required to read msgpack cache values")
+            return msgpack.unpackb(payload, raw=False)
+        if orjson:
+            return orjson.loads(payload)
+        return json.loads(bytes(payload))
+
+
+_codec: Optional[CacheCodec] = None
+
+
+def get_codec() -> CacheCodec:
+    """Get the configured cache codec"""
+    global _codec
+    if _codec is None:
+        _codec = CacheCodec(
+            format=settings.CACHE_CODEC,
+            compression_threshold=settings.CACHE_COMPRESSION_THRESHOLD,
+            compression_level=settings.CACHE_COMPRESSION_LEVEL
+        )
+    return _codec
+
+
 # Redis key patterns
 class CacheKeys:
-    """Redis key patterns for different data types"""
+    """
+    Redis key patterns for different data types
+    
+    The owning id is wrapped in a hash tag ({...}) so that in cluster mode
+    all keys of one session, user or coach hash to the same slot.
+    """
     
-    # Session context: stores conversation history for active sessions
-    # Format: session:{session_id}:context
-    SESSION_CONTEXT = "session:{session_id}:context"
+    # Session messages: append-only list of codec-encoded messages
+    # Format: session:{session_id}:messages
+    SESSION_MESSAGES = "session:{{{session_id}}}:messages"
+    
+    # Session metadata: hash with user/coach ids and timestamps
+    # Format: session:{session_id}:meta
+    SESSION_META = "session:{{{session_id}}}:meta"
     
     # User's last session reference
     # Format: user:{user_id}:last_session
-    USER_LAST_SESSION = "user:{user_id}:last_session"
+    USER_LAST_SESSION = "user:{{{user_id}}}:last_session"
+    
+    # User's active coach conversation: capped list of codec-encoded messages
+    # Format: user:{user_id}:coach:{coach_id}:messages
+    USER_COACH_CONTEXT = "user:{{{user_id}}}:coach:{coach_id}:messages"
+    
+    # Profile summary of a user, built from their memories with a coach
+    # Format: user:{user_id}:coach:{coach_id}:profile
+    USER_PROFILE = "user:{{{user_id}}}:coach:{coach_id}:profile"
+    
+    # Rate limiting state (GCRA arrival time), keyed by stable identity digest
+    # Format: ratelimit:{identity}:{endpoint}
+    RATE_LIMIT = "ratelimit:{{{identity}}}:{endpoint}"
+    
+    # Per-user LLM token budget (GCRA arrival time)
+    # Format: tokens:{identity}
+    TOKEN_BUDGET = "tokens:{{{identity}}}"
+    
+    # Realtime session registry: hash of shared session state
+    # Format: realtime:session:{session_id}
+    REALTIME_SESSION = "realtime:session:{{{session_id}}}"
+    
+    # Realtime sessions of a user: set of session ids
+    # Format: realtime:user:{user_id}:sessions
+    REALTIME_USER_SESSIONS = "realtime:user:{{{user_id}}}:sessions"
     
-    # User's active coach session
-    # Format: user:{user_id}:coach:{coach_id}:context
-    USER_COACH_CONTEXT = "user:{user_id}:coach:{coach_id}:context"
+    # Realtime transcript tiers: hot message list, compressed segments
+    # of older messages, and a meta hash with the rolling summary
+    # Format: transcript:{session_id}:hot | :segments | :meta
+    TRANSCRIPT_HOT = "transcript:{{{session_id}}}:hot"
+    TRANSCRIPT_SEGMENTS = "transcript:{{{session_id}}}:segments"
+    TRANSCRIPT_META = "transcript:{{{session_id}}}:meta"
     
-    # Rate limiting counter
-    # Format: ratelimit:{user_id}:{endpoint}
-    RATE_LIMIT = "ratelimit:{user_id}:{endpoint}"
+    # Write-behind queue of turns for conversation_history
+    # Format: stream:conversation_history
+    HISTORY_STREAM = "stream:conversation_history"
     
-    # Coach persona cache (rarely changes)
-    # Format: coach:{coach_id}:persona
-    COACH_PERSONA = "coach:{coach_id}:persona"
+    # Text embedding cache, keyed by model and text digest
+    # Format: embedding:{model}:{digest}
+    EMBEDDING = "embedding:{model}:{{{digest}}}"
+    
+    # Recompute lock for get_or_compute (cross-worker single-flight);
+    # shares the hash tag of the locked key
+    # Format: lock:{key}
+    LOCK = "lock:{key}"
+    
+    @staticmethod
+    def session_messages(session_id: int) -> str:
+        return CacheKeys.SESSION_MESSAGES.format(session_id=session_id)
     
     @staticmethod
-    def session_context(session_id: int) -> str:
-        return CacheKeys.SESSION_CONTEXT.format(session_id=session_id)
+    def session_meta(session_id: int) -> str:
+        return CacheKeys.SESSION_META.format(session_id=session_id)
     
     @staticmethod
     def user_last_session(user_id: int) -> str:
@@ -50,12 +221,147 @@ class CacheKeys:
         return CacheKeys.USER_COACH_CONTEXT.format(user_id=user_id, coach_id=coach_id)
     
     @staticmethod
-    def rate_limit(user_id: int, endpoint: str) -> str:
-        return CacheKeys.RATE_LIMIT.format(user_id=user_id, endpoint=endpoint)
+    def user_profile(user_id: int, coach_id: int) -> str:
+        return CacheKeys.USER_PROFILE.format(user_id=user_id, coach_id=coach_id)
+    
+    @staticmethod
+    def rate_limit(identity: str, endpoint: str) -> str:
+        return CacheKeys.RATE_LIMIT.format(identity=identity, endpoint=endpoint)
+    
+    @staticmethod
+    def token_budget(identity: str) -> str:
+        return CacheKeys.TOKEN_BUDGET.format(identity=identity)
+    
+    @staticmethod
+    def realtime_session(session_id: str) -> str:
+        return CacheKeys.REALTIME_SESSION.format(session_id=session_id)
+    
+    @staticmethod
+    def realtime_user_sessions(user_id: int) -> str:
+        return CacheKeys.REALTIME_USER_SESSIONS.format(user_id=user_id)
+    
+    @staticmethod
+    def transcript_hot(session_id: str) -> str:
+        return CacheKeys.TRANSCRIPT_HOT.format(session_id=session_id)
     
     @staticmethod
-    def coach_persona(coach_id: int) -> str:
-        return CacheKeys.COACH_PERSONA.format(coach_id=coach_id)
+    def transcript_segments(session_id: str) -> str:
+        return CacheKeys.TRANSCRIPT_SEGMENTS.format(session_id=session_id)
+    
+    @staticmethod
+    def transcript_meta(session_id: str) -> str:
+        return CacheKeys.TRANSCRIPT_META.format(session_id=session_id)
+    
+    @staticmethod
+    def embedding(model: str, text: str) -> str:
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+        return CacheKeys.EMBEDDING.format(model=model, digest=digest)
+    
+    @staticmethod
+    def lock(key: str) -> str:
+        return CacheKeys.LOCK.format(key=key)
+
+
+# GCRA (generic cell rate algorithm) rate limiter, evaluated atomically in Redis.
+# The key stores the "theoretical arrival time" (TAT) in milliseconds; a request
+# of weight `cost` is allowed if pushing the TAT forward by cost * interval stays
+# within one window of burst tolerance. Server time is used so workers with
+# skewed clocks agree.
+#
+# KEYS[1] = rate limit key
+# ARGV[1] = limit (requests per window)
+# ARGV[2] = window in milliseconds
+# ARGV[3] = cost of this request (0 = peek without consuming)
+# ARGV[4] = mode: "strict" (all or nothing), "partial" (grant as much of the
+#           cost as is available, for token leasing) or "force" (always
+#           charge, for usage that has already happened)
+#
+# Returns {allowed, remaining, retry_after_ms, reset_after_ms, granted}
+RATE_LIMIT_SCRIPT = """
+if redis.replicate_commands then
+    redis.replicate_commands()
+end
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local mode = ARGV[4]
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local interval = window / limit
+
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if not tat or tat < now then
+    tat = now
+end
+
+local available = math.max(math.floor((now - (tat - window)) / interval), 0)
+if mode == 'partial' and cost > available then
+    if available == 0 then
+        return {0, 0, math.ceil(tat + interval - window - now), math.ceil(tat - now), 0}
+    end
+    cost = available
+end
+
+local new_tat = tat + cost * interval
+local diff = now - (new_tat - window)
+
+if diff < 0 and mode ~= 'force' then
+    return {0, available, math.ceil(-diff), math.ceil(tat - now), 0}
+end
+
+if cost > 0 then
+    redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(new_tat - now))
+end
+if diff < 0 then
+    return {0, 0, math.ceil(-diff), math.ceil(new_tat - now), cost}
+end
+return {1, math.floor(diff / interval), 0, math.ceil(new_tat - now), cost}
+"""
+
+# Record realtime session activity, only if the session is still registered
+# (a session ended by another worker must not be resurrected as a partial hash)
+SESSION_ACTIVITY_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+local turns = redis.call('HINCRBY', KEYS[1], 'turn_count', ARGV[1])
+if tonumber(ARGV[4]) > 0 then
+    redis.call('HINCRBYFLOAT', KEYS[1], 'total_audio_seconds', ARGV[4])
+end
+redis.call('HSET', KEYS[1], 'last_activity', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return turns
+"""
+
+# Release a lock only if we still own it (it may have expired and been re-taken)
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of a rate limit check"""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # seconds until a request of the same cost can pass
+    reset_after: float  # seconds until the full limit is available again
+    granted: int = 0    # tokens consumed (may be less than the cost in partial mode)
+    
+    def headers(self) -> Dict[str, str]:
+        """Standard rate limit response headers"""
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after))
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(math.ceil(self.retry_after))
+        return headers
 
 
 @dataclass
@@ -72,6 +378,20 @@ class ConversationMessage:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "ConversationMessage":
         return cls(**data)
+    
+    def encode(self) -> bytes:
+        return get_codec().encode(self.to_dict())
+    
+    @classmethod
+    def decode(cls, data: bytes) -> "ConversationMessage":
+        return cls.from_dict(get_codec().decode(data))
+
+
+@dataclass
+class TurnContext:
+    """Everything a coach turn reads from the cache, fetched in one round trip"""
+    history: List[Dict[str, str]]
+    last_session_id: Optional[int] = None
 
 
 @dataclass
@@ -108,6 +428,24 @@ class SessionContext:
             updated_at=data["updated_at"],
             metadata=data.get("metadata")
         )
+    
+    @classmethod
+    def from_redis(
+        cls,
+        meta: Dict[str, str],
+        messages: List[ConversationMessage]
+    ) -> "SessionContext":
+        """Build from the session meta hash and message list"""
+        metadata = meta.get("metadata")
+        return cls(
+            session_id=int(meta["session_id"]),
+            user_id=int(meta["user_id"]),
+            coach_id=int(meta["coach_id"]),
+            messages=messages,
+            created_at=meta["created_at"],
+            updated_at=meta["updated_at"],
+            metadata=json.loads(metadata) if metadata else None
+        )
 
 
 class CacheService:
@@ -115,10 +453,15 @@ class CacheService:
     Redis cache service for managing conversation state and rate limiting
     
     Key patterns:
-    - session:{session_id}:context - Full conversation context for a session
+    - session:{session_id}:messages - Append-only message list for a session
+    - session:{session_id}:meta - Session metadata hash
     - user:{user_id}:last_session - Reference to user's most recent session
-    - user:{user_id}:coach:{coach_id}:context - Quick access to user-coach conversation
-    - ratelimit:{user_id}:{endpoint} - Rate limiting counters
+    - user:{user_id}:coach:{coach_id}:messages - Quick access to user-coach conversation
+    - ratelimit:{identity}:{endpoint} - Rate limiting state
+    - tokens:{identity} - LLM token budget state
+    
+    Connects to a single Redis, a Sentinel-managed master or a Redis
+    Cluster depending on REDIS_MODE.
     """
     
     _instance: Optional["CacheService"] = None
@@ -126,6 +469,28 @@ class CacheService:
     
     def __init__(self):
         self._redis = None
+        # Same server, no response decoding: used to read codec-encoded values
+        self._redis_bytes = None
+        self._rate_limit_script = None
+        self._release_lock_script = None
+        self._session_activity_script = None
+        self._cluster = settings.REDIS_MODE == "cluster"
+        # get_or_compute loads in flight in this worker, by key
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Transcript segments are always compressed
+        self._segment_codec = CacheCodec(
+            format=settings.CACHE_CODEC,
+            compression_threshold=1,
+            compression_level=settings.CACHE_COMPRESSION_LEVEL
+        )
+        # In-process L1 in front of hot keys, kept coherent via keyspace events
+        # (not available in cluster mode: notifications are per node and the
+        # async cluster client has no pub/sub)
+        self._l1 = (
+            LocalCache(settings.L1_CACHE_TTLS, settings.L1_CACHE_MAX_ENTRIES)
+            if settings.L1_CACHE_ENABLED and not self._cluster else None
+        )
+        self._invalidation_task: Optional[asyncio.Task] = None
     
     @classmethod
     async def get_instance(cls) -> "CacheService":
@@ -135,25 +500,106 @@ class CacheService:
             await cls._instance.connect()
         return cls._instance
     
+    @staticmethod
+    def _connection_options() -> Dict[str, Any]:
+        """Pool size, timeouts and retry policy shared by every Redis client"""
+        options = {
+            "password": settings.REDIS_PASSWORD,
+            "max_connections": settings.REDIS_MAX_CONNECTIONS,
+            "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+            "socket_connect_timeout": settings.REDIS_CONNECT_TIMEOUT,
+            "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL,
+        }
+        if settings.REDIS_RETRY_ATTEMPTS > 0:
+            # Retry dropped connections; retry timeouts only when enabled
+            options["retry"] = Retry(
+                ExponentialBackoff(cap=1.0, base=0.05),
+                settings.REDIS_RETRY_ATTEMPTS,
+                supported_errors=(redis.ConnectionError,)
+            )
+            options["retry_on_error"] = (
+                [redis.TimeoutError] if settings.REDIS_RETRY_ON_TIMEOUT else []
+            )
+        return options
+    
+    def _create_client(self, decode_responses: bool):
+        """Create a Redis client for the configured REDIS_MODE"""
+        options = self._connection_options()
+        options["decode_responses"] = decode_responses
+        
+        if settings.REDIS_MODE == "cluster":
+            return RedisCluster.from_url(settings.REDIS_URL, **options)
+        
+        if settings.REDIS_MODE == "sentinel":
+            if not settings.REDIS_SENTINELS:
+                raise ValueError("REDIS_SENTINELS is required when REDIS_MODE=sentinel")
+            sentinels = []
+            for address in settings.REDIS_SENTINELS.split(","):
+                host, _, port = address.strip().rpartition(":")
+                sentinels.append((host, int(port)))
+            db = urlparse(settings.REDIS_URL).path.lstrip("/") or 0
+            sentinel = Sentinel(
+                sentinels,
+                sentinel_kwargs={
+                    "password": settings.REDIS_PASSWORD,
+                    "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+                    "socket_connect_timeout": settings.REDIS_CONNECT_TIMEOUT,
+                },
+                db=int(db),
+                **options
+            )
+            return sentinel.master_for(settings.REDIS_SENTINEL_MASTER)
+        
+        return redis.from_url(settings.REDIS_URL, **options)
+    
+    def _pipeline(self, client=None, transaction: bool = True):
+        """
+        Open a pipeline on a client (default: the text client)
+        
+        Cluster mode cannot run MULTI across slots, so pipelines there are
+        always non-transactional: commands are grouped per node instead.
+        """
+        client = client or self._redis
+        if self._cluster:
+            return client.pipeline()
+        return client.pipeline(transaction=transaction)
+    
     async def connect(self):
         """Connect to Redis"""
         if self._redis is None:
-            self._redis = redis.from_url(
-                settings.REDIS_URL,
-                password=settings.REDIS_PASSWORD,
-                encoding="utf-8",
-                decode_responses=True
-            )
+            self._redis = self._create_client(decode_responses=True)
+            self._redis_bytes = self._create_client(decode_responses=False)
             # Test connection
             await self._redis.ping()
             print("✅ Redis connected")
+            
+            # Load Lua scripts once; later calls go through EVALSHA
+            self._rate_limit_script = self._redis.register_script(RATE_LIMIT_SCRIPT)
+            await self._redis.script_load(RATE_LIMIT_SCRIPT)
+            self._release_lock_script = self._redis.register_script(RELEASE_LOCK_SCRIPT)
+            await self._redis.script_load(RELEASE_LOCK_SCRIPT)
+            self._session_activity_script = self._redis.register_script(SESSION_ACTIVITY_SCRIPT)
+            await self._redis.script_load(SESSION_ACTIVITY_SCRIPT)
+            
+            if self._l1 is not None:
+                self._invalidation_task = asyncio.create_task(self._listen_for_invalidations())
     
     async def disconnect(self):
         """Disconnect from Redis"""
+        if self._invalidation_task:
+            self._invalidation_task.cancel()
+            try:
+                await self._invalidation_task
+            except asyncio.CancelledError:
+                pass
+            self._invalidation_task = None
         if self._redis:
             await self._redis.close()
             self._redis = None
             print("👋 Redis disconnected")
+        if self._redis_bytes:
+            await self._redis_bytes.close()
+            self._redis_bytes = None
     
     async def ping(self) -> bool:
         """Check Redis connection"""
@@ -165,10 +611,113 @@ class CacheService:
         except Exception:
             return False
     
+    # =============================================
+    # L1 CACHE METHODS
+    # =============================================
+    
+    def _l1_get(self, key: str, variant: Any = None) -> Any:
+        """Read from the in-process cache (MISSING when disabled or absent)"""
+        if self._l1 is None:
+            return MISSING
+        return self._l1.get(key, variant)
+    
+    def _l1_set(self, key: str, value: Any, variant: Any = None):
+        """Populate the in-process cache after a Redis read"""
+        if self._l1 is not None:
+            self._l1.set(key, value, variant)
+    
+    def _l1_invalidate(self, *keys: str):
+        """
+        Drop keys this worker just wrote
+        
+        Other workers are invalidated by the keyspace listener; this makes
+        our own reads consistent without waiting for the event round trip.
+        """
+        if self._l1 is not None:
+            for key in keys:
+                self._l1.invalidate(key)
+    
+    async def _enable_keyspace_events(self):
+        """Make sure Redis publishes the keyspace events the L1 listens to"""
+        try:
+            config = await self._redis.config_get("notify-keyspace-events")
+            current = config.get("notify-keyspace-events", "")
+            # K: keyspace channel; generic, string, list, hash, expired events
+            wanted = set(current) | set("Kg$lhx")
+            if wanted != set(current):
+                await self._redis.config_set("notify-keyspace-events", "".join(sorted(wanted)))
+        except Exception as e:
+            print(f"Warning: Could not enable keyspace notifications, L1 relies on TTLs: {e}")
+    
+    async def _listen_for_invalidations(self):
+        """
+        Evict L1 entries when their keys change in Redis
+        
+        Subscribes to keyspace notifications for the L1 prefixes, so a write
+        from any worker invalidates every worker's copy. If the subscription
+        drops, the whole L1 is cleared since events may have been missed.
+        """
+        db = self._redis.connection_pool.connection_kwargs.get("db", 0)
+        channel_prefix = f"__keyspace@{db}__:"
+        patterns = [f"{channel_prefix}{prefix}*" for prefix in self._l1.prefixes]
+        
+        await self._enable_keyspace_events()
+        
+        backoff = 1
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.psubscribe(*patterns)
+                self._l1.clear()
+                backoff = 1
+                while True:
+                    # Short read timeout: an idle subscription must not trip
+                    # REDIS_SOCKET_TIMEOUT
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message and message["type"] == "pmessage":
+                        self._l1.invalidate(message["channel"][len(channel_prefix):])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Warning: L1 invalidation listener disconnected: {e}")
+            finally:
+                self._l1.clear()
+                await pubsub.reset()
+            
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+    
+    def get_l1_stats(self) -> Optional[Dict[str, Any]]:
+        """Get in-process cache statistics (None when disabled)"""
+        if self._l1 is None:
+            return None
+        return {
+            **self._l1.get_stats(),
+            "listening": bool(self._invalidation_task and not self._invalidation_task.done())
+        }
+    
     # =============================================
     # SESSION CONTEXT METHODS
     # =============================================
     
+    @staticmethod
+    def _to_history(raw_messages: List[bytes]) -> List[Dict[str, str]]:
+        """Convert stored messages to LLM history format"""
+        messages = [ConversationMessage.decode(m) for m in raw_messages]
+        return [{"role": m.role, "content": m.content} for m in messages]
+    
+    @staticmethod
+    def _queue_append(
+        pipe,
+        key: str,
+        messages: List[ConversationMessage],
+        max_messages: int
+    ):
+        """Queue RPUSH + LTRIM + EXPIRE for a capped message list"""
+        pipe.rpush(key, *[m.encode() for m in messages])
+        pipe.ltrim(key, -max_messages, -1)
+        pipe.expire(key, settings.SESSION_CONTEXT_TTL)
+    
     async def get_session_context(self, session_id: int) -> Optional[SessionContext]:
         """
         Get conversation context for a session
@@ -179,12 +728,47 @@ class CacheService:
         Returns:
             SessionContext or None if not found
         """
-        key = CacheKeys.session_context(session_id)
-        data = await self._redis.get(key)
+        async with self._pipeline(self._redis_bytes, transaction=False) as pipe:
+            pipe.hgetall(CacheKeys.session_meta(session_id))
+            pipe.lrange(CacheKeys.session_messages(session_id), 0, -1)
+            raw_meta, raw_messages = await pipe.execute()
         
-        if data:
-            return SessionContext.from_dict(json.loads(data))
-        return None
+        if not raw_meta:
+            return None
+        
+        meta = {k.decode("utf-8"): v.decode("utf-8") for k, v in raw_meta.items()}
+        
+        messages = [ConversationMessage.decode(m) for m in raw_messages]
+        return SessionContext.from_redis(meta, messages)
+    
+    def _queue_session_meta(
+        self,
+        pipe,
+        session_id: int,
+        user_id: int,
+        coach_id: int,
+        now: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """Queue session meta hash and last-session updates on a pipeline"""
+        meta_key = CacheKeys.session_meta(session_id)
+        fields = {
+            "session_id": session_id,
+            "user_id": user_id,
+            "coach_id": coach_id,
+            "updated_at": now
+        }
+        if metadata is not None:
+            fields["metadata"] = json.dumps(metadata)
+        
+        pipe.hsetnx(meta_key, "created_at", now)
+        pipe.hset(meta_key, mapping=fields)
+        pipe.expire(meta_key, settings.SESSION_CONTEXT_TTL)
+        pipe.set(
+            CacheKeys.user_last_session(user_id),
+            str(session_id),
+            ex=settings.USER_SESSION_TTL
+        )
     
     async def set_session_context(
         self,
@@ -195,7 +779,10 @@ class CacheService:
         metadata: Optional[Dict[str, Any]] = None
     ) -> SessionContext:
         """
-        Store or update session context
+        Store or replace session context
+        
+        Replaces the whole message list; use append_message for
+        adding single messages.
         
         Args:
             session_id: The session ID
@@ -208,31 +795,33 @@ class CacheService:
             The stored SessionContext
         """
         now = datetime.utcnow().isoformat()
+        messages_key = CacheKeys.session_messages(session_id)
+        meta_key = CacheKeys.session_meta(session_id)
+        messages = messages[-settings.SESSION_MAX_MESSAGES:]
         
-        # Check if context exists
-        existing = await self.get_session_context(session_id)
+        async with self._pipeline() as pipe:
+            pipe.delete(messages_key)
+            if messages:
+                pipe.rpush(messages_key, *[m.encode() for m in messages])
+                pipe.expire(messages_key, settings.SESSION_CONTEXT_TTL)
+            self._queue_session_meta(pipe, session_id, user_id, coach_id, now, metadata)
+            pipe.hget(meta_key, "created_at")
+            pipe.hget(meta_key, "metadata")
+            results = await pipe.execute()
         
-        context = SessionContext(
+        self._l1_invalidate(messages_key, meta_key, CacheKeys.user_last_session(user_id))
+        
+        created_at, stored_metadata = results[-2], results[-1]
+        
+        return SessionContext(
             session_id=session_id,
             user_id=user_id,
             coach_id=coach_id,
             messages=messages,
-            created_at=existing.created_at if existing else now,
+            created_at=created_at or now,
             updated_at=now,
-            metadata=metadata or (existing.metadata if existing else None)
+            metadata=json.loads(stored_metadata) if stored_metadata else None
         )
-        
-        key = CacheKeys.session_context(session_id)
-        await self._redis.set(
-            key,
-            json.dumps(context.to_dict()),
-            ex=settings.SESSION_CONTEXT_TTL
-        )
-        
-        # Also update user's last session reference
-        await self.set_user_last_session(user_id, session_id)
-        
-        return context
     
     async def append_message(
         self,
@@ -242,10 +831,13 @@ class CacheService:
         role: str,
         content: str,
         metadata: Optional[Dict[str, Any]] = None
-    ) -> SessionContext:
+    ) -> ConversationMessage:
         """
         Append a message to session context
         
+        Runs RPUSH + LTRIM + EXPIRE and the meta updates in a single
+        MULTI pipeline, so appends are O(1) and never lose concurrent writes.
+        
         Args:
             session_id: The session ID
             user_id: User ID
@@ -255,29 +847,29 @@ class CacheService:
             metadata: Optional message metadata
             
         Returns:
-            Updated SessionContext
+            The appended ConversationMessage
         """
-        context = await self.get_session_context(session_id)
-        
+        now = datetime.utcnow().isoformat()
         message = ConversationMessage(
             role=role,
             content=content,
-            timestamp=datetime.utcnow().isoformat(),
+            timestamp=now,
             metadata=metadata
         )
+        messages_key = CacheKeys.session_messages(session_id)
         
-        if context:
-            context.messages.append(message)
-            messages = context.messages
-        else:
-            messages = [message]
+        async with self._pipeline() as pipe:
+            self._queue_append(pipe, messages_key, [message], settings.SESSION_MAX_MESSAGES)
+            self._queue_session_meta(pipe, session_id, user_id, coach_id, now)
+            await pipe.execute()
         
-        return await self.set_session_context(
-            session_id=session_id,
-            user_id=user_id,
-            coach_id=coach_id,
-            messages=messages
+        self._l1_invalidate(
+            messages_key,
+            CacheKeys.session_meta(session_id),
+            CacheKeys.user_last_session(user_id)
         )
+        
+        return message
     
     async def get_recent_messages(
         self,
@@ -295,18 +887,24 @@ class CacheService:
         Returns:
             List of {"role": ..., "content": ...} dicts
         """
-        context = await self.get_session_context(session_id)
-        
-        if not context:
+        if limit <= 0:
             return []
         
-        messages = context.messages[-limit:]
-        return [{"role": m.role, "content": m.content} for m in messages]
+        key = CacheKeys.session_messages(session_id)
+        cached = self._l1_get(key, ("recent", limit))
+        if cached is not MISSING:
+            return list(cached)
+        
+        raw_messages = await self._redis_bytes.lrange(key, -limit, -1)
+        history = self._to_history(raw_messages)
+        self._l1_set(key, history, ("recent", limit))
+        return list(history)
     
     async def clear_session_context(self, session_id: int):
         """Clear session context from cache"""
-        key = CacheKeys.session_context(session_id)
-        await self._redis.delete(key)
+        keys = (CacheKeys.session_messages(session_id), CacheKeys.session_meta(session_id))
+        await self._redis.delete(*keys)
+        self._l1_invalidate(*keys)
     
     # =============================================
     # USER SESSION METHODS
@@ -323,11 +921,14 @@ class CacheService:
             Session ID or None
         """
         key = CacheKeys.user_last_session(user_id)
-        data = await self._redis.get(key)
+        cached = self._l1_get(key)
+        if cached is not MISSING:
+            return cached
         
-        if data:
-            return int(data)
-        return None
+        data = await self._redis.get(key)
+        session_id = int(data) if data else None
+        self._l1_set(key, session_id)
+        return session_id
     
     async def set_user_last_session(self, user_id: int, session_id: int):
         """
@@ -343,11 +944,13 @@ class CacheService:
             str(session_id),
             ex=settings.USER_SESSION_TTL
         )
+        self._l1_invalidate(key)
     
     async def get_user_coach_context(
         self,
         user_id: int,
-        coach_id: int
+        coach_id: int,
+        limit: Optional[int] = None
     ) -> Optional[List[Dict[str, str]]]:
         """
         Get quick context for user-coach pair
@@ -356,23 +959,26 @@ class CacheService:
         Args:
             user_id: User ID
             coach_id: Coach ID
+            limit: Optional max number of most recent messages
             
         Returns:
             List of recent messages or None
         """
         key = CacheKeys.user_coach_context(user_id, coach_id)
-        data = await self._redis.get(key)
+        cached = self._l1_get(key, ("recent", limit))
+        if cached is MISSING:
+            raw_messages = await self._redis_bytes.lrange(key, -limit if limit else 0, -1)
+            cached = self._to_history(raw_messages)
+            self._l1_set(key, cached, ("recent", limit))
         
-        if data:
-            return json.loads(data)
-        return None
+        return list(cached) if cached else None
     
     async def set_user_coach_context(
         self,
         user_id: int,
         coach_id: int,
         messages: List[Dict[str, str]],
-        max_messages: int = 20
+        max_messages: int = settings.USER_COACH_CONTEXT_MESSAGES
     ):
         """
         Store quick context for user-coach pair
@@ -384,15 +990,22 @@ class CacheService:
             max_messages: Max messages to keep
         """
         key = CacheKeys.user_coach_context(user_id, coach_id)
+        now = datetime.utcnow().isoformat()
         
         # Keep only recent messages
         messages = messages[-max_messages:]
         
-        await self._redis.set(
-            key,
-            json.dumps(messages),
-            ex=settings.SESSION_CONTEXT_TTL
-        )
+        async with self._pipeline() as pipe:
+            pipe.delete(key)
+            if messages:
+                pipe.rpush(key, *[
+                    ConversationMessage(m["role"], m["content"], now).encode()
+                    for m in messages
+                ])
+                pipe.expire(key, settings.SESSION_CONTEXT_TTL)
+            await pipe.execute()
+        
+        self._l1_invalidate(key)
     
     async def append_to_user_coach_context(
         self,
@@ -400,7 +1013,7 @@ class CacheService:
         coach_id: int,
         role: str,
         content: str,
-        max_messages: int = 20
+        max_messages: int = settings.USER_COACH_CONTEXT_MESSAGES
     ):
         """
         Append message to user-coach context
@@ -412,100 +1025,810 @@ class CacheService:
             content: Message content
             max_messages: Max messages to keep
         """
-        existing = await self.get_user_coach_context(user_id, coach_id) or []
-        existing.append({"role": role, "content": content})
-        await self.set_user_coach_context(user_id, coach_id, existing, max_messages)
+        message = ConversationMessage(role, content, datetime.utcnow().isoformat())
+        key = CacheKeys.user_coach_context(user_id, coach_id)
+        
+        async with self._pipeline() as pipe:
+            self._queue_append(pipe, key, [message], max_messages)
+            await pipe.execute()
+        
+        self._l1_invalidate(key)
+    
+    # =============================================
+    # BATCHED TURN METHODS
+    # =============================================
+    
+    async def get_turn_context(
+        self,
+        user_id: int,
+        coach_id: int,
+        session_id: Optional[int] = None,
+        limit: int = 10
+    ) -> TurnContext:
+        """
+        Read everything a coach turn needs in a single pipeline
+        
+        Uses the session transcript when a session is given, otherwise
+        the user-coach context.
+        
+        Args:
+            user_id: User ID
+            coach_id: Coach ID
+            session_id: Optional session ID
+            limit: Max history messages
+            
+        Returns:
+            TurnContext with recent history and the user's last session
+        """
+        if session_id:
+            history_key = CacheKeys.session_messages(session_id)
+        else:
+            history_key = CacheKeys.user_coach_context(user_id, coach_id)
+        last_session_key = CacheKeys.user_last_session(user_id)
+        
+        # Both parts hot in L1: no Redis round trip at all
+        history = self._l1_get(history_key, ("recent", limit))
+        last_session_id = self._l1_get(last_session_key)
+        if history is MISSING or last_session_id is MISSING:
+            async with self._pipeline(self._redis_bytes, transaction=False) as pipe:
+                pipe.lrange(history_key, -limit, -1)
+                pipe.get(last_session_key)
+                raw_messages, last_session = await pipe.execute()
+            
+            history = self._to_history(raw_messages)
+            last_session_id = int(last_session) if last_session else None
+            self._l1_set(history_key, history, ("recent", limit))
+            self._l1_set(last_session_key, last_session_id)
+        
+        return TurnContext(history=list(history), last_session_id=last_session_id)
+    
+    async def record_turn(
+        self,
+        user_id: int,
+        coach_id: int,
+        user_content: str,
+        assistant_content: str,
+        session_id: Optional[int] = None,
+        max_messages: int = settings.USER_COACH_CONTEXT_MESSAGES,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> List[ConversationMessage]:
+        """
+        Store a user message and the coach's reply as one MULTI pipeline
+        
+        Always appends to the user-coach context, so it holds the tail of
+        every turn persisted for the pair. With a session, also appends to the
+        session transcript and updates the session meta and the user's last
+        session. The turn is also queued for write-behind persistence to
+        conversation_history in the same pipeline.
+        
+        Args:
+            user_id: User ID
+            coach_id: Coach ID
+            user_content: The user's message
+            assistant_content: The coach's reply
+            session_id: Optional session ID
+            max_messages: Max messages kept in the user-coach context
+            metadata: Optional metadata stored with both messages
+            
+        Returns:
+            The two stored messages
+        """
+        now = datetime.utcnow().isoformat()
+        messages = [
+            ConversationMessage(role="user", content=user_content, timestamp=now, metadata=metadata),
+            ConversationMessage(role="assistant", content=assistant_content, timestamp=now, metadata=metadata)
+        ]
+        
+        async with self._pipeline() as pipe:
+            if session_id:
+                self._queue_append(
+                    pipe, CacheKeys.session_messages(session_id), messages,
+                    settings.SESSION_MAX_MESSAGES
+                )
+                self._queue_session_meta(pipe, session_id, user_id, coach_id, now)
+            self._queue_append(
+                pipe, CacheKeys.user_coach_context(user_id, coach_id), messages,
+                max_messages
+            )
+            if settings.HISTORY_PERSIST_ENABLED:
+                self._queue_history(pipe, user_id, coach_id, session_id, messages)
+            await pipe.execute()
+        
+        self._l1_invalidate(CacheKeys.user_coach_context(user_id, coach_id))
+        if session_id:
+            self._l1_invalidate(
+                CacheKeys.session_messages(session_id),
+                CacheKeys.session_meta(session_id),
+                CacheKeys.user_last_session(user_id)
+            )
+        
+        return messages
+    
+    # =============================================
+    # WRITE-BEHIND HISTORY METHODS
+    # =============================================
+    
+    @staticmethod
+    def _queue_history(
+        pipe,
+        user_id: int,
+        coach_id: int,
+        session_id: Optional[int],
+        messages: List[ConversationMessage]
+    ):
+        """
+        Queue XADD of messages to the history stream
+        
+        Each message gets an idempotency key here, so redelivered stream
+        entries are inserted only once.
+        """
+        payload = {
+            "user_id": user_id,
+            "coach_id": coach_id,
+            "session_id": session_id,
+            "messages": [
+                {**m.to_dict(), "idempotency_key": uuid.uuid4().hex}
+                for m in messages
+            ]
+        }
+        pipe.xadd(
+            CacheKeys.HISTORY_STREAM,
+            {"data": get_codec().encode(payload)},
+            maxlen=settings.HISTORY_STREAM_MAXLEN,
+            approximate=True
+        )
+    
+    async def ensure_history_group(self, group: str):
+        """Create the history stream consumer group if missing"""
+        try:
+            await self._redis.xgroup_create(CacheKeys.HISTORY_STREAM, group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+    
+    @staticmethod
+    def _decode_history_entries(entries) -> List[tuple]:
+        """Decode stream entries to (entry_id, payload) pairs (payload None if corrupt)"""
+        decoded = []
+        for entry_id, fields in entries:
+            if isinstance(entry_id, bytes):
+                entry_id = entry_id.decode("utf-8")
+            try:
+                payload = get_codec().decode(fields[b"data"])
+            except Exception as e:
+                print(f"Warning: Dropping corrupt history entry {entry_id}: {e}")
+                payload = None
+            decoded.append((entry_id, payload))
+        return decoded
+    
+    async def read_history(
+        self,
+        group: str,
+        consumer: str,
+        count: int,
+        block_ms: int
+    ) -> List[tuple]:
+        """
+        Read new history entries for a consumer
+        
+        Returns:
+            List of (entry_id, payload) pairs
+        """
+        response = await self._redis_bytes.xreadgroup(
+            group, consumer, {CacheKeys.HISTORY_STREAM: ">"}, count=count, block=block_ms
+        )
+        if not response:
+            return []
+        _, entries = response[0]
+        return self._decode_history_entries(entries)
+    
+    async def claim_history(
+        self,
+        group: str,
+        consumer: str,
+        min_idle_ms: int,
+        count: int
+    ) -> List[tuple]:
+        """
+        Take over entries another consumer read but never acknowledged
+        
+        Returns:
+            List of (entry_id, payload) pairs
+        """
+        response = await self._redis_bytes.xautoclaim(
+            CacheKeys.HISTORY_STREAM, group, consumer, min_idle_ms, start_id="0-0", count=count
+        )
+        return self._decode_history_entries(response[1])
+    
+    async def ack_history(self, group: str, entry_ids: List[str]):
+        """Acknowledge persisted entries and drop them from the stream"""
+        if not entry_ids:
+            return
+        async with self._pipeline(transaction=False) as pipe:
+            pipe.xack(CacheKeys.HISTORY_STREAM, group, *entry_ids)
+            pipe.xdel(CacheKeys.HISTORY_STREAM, *entry_ids)
+            await pipe.execute()
+    
+    # =============================================
+    # REALTIME SESSION REGISTRY METHODS
+    # =============================================
+    
+    async def register_realtime_session(
+        self,
+        session_id: str,
+        user_id: int,
+        fields: Dict[str, Any]
+    ):
+        """
+        Register a realtime session so any worker can serve it
+        
+        Args:
+            session_id: Realtime session ID
+            user_id: Owning user ID
+            fields: Shared session state (see TransportSession.to_registry)
+        """
+        session_key = CacheKeys.realtime_session(session_id)
+        user_key = CacheKeys.realtime_user_sessions(user_id)
+        
+        async with self._pipeline(transaction=False) as pipe:
+            pipe.hset(session_key, mapping=fields)
+            pipe.expire(session_key, settings.REALTIME_SESSION_TTL)
+            pipe.sadd(user_key, session_id)
+            pipe.expire(user_key, settings.USER_SESSION_TTL)
+            await pipe.execute()
+    
+    async def get_realtime_session(self, session_id: str) -> Optional[Dict[str, str]]:
+        """
+        Get the shared state of a realtime session
+        
+        Returns:
+            Registry fields or None if the session ended or expired
+        """
+        fields = await self._redis.hgetall(CacheKeys.realtime_session(session_id))
+        return fields if fields.get("user_id") else None
+    
+    async def record_realtime_activity(
+        self,
+        session_id: str,
+        last_activity: float,
+        turns: int = 0,
+        audio_seconds: float = 0.0
+    ) -> Optional[int]:
+        """
+        Atomically add turns and refresh activity of a realtime session
+        
+        Args:
+            session_id: Realtime session ID
+            last_activity: Activity time (Unix timestamp)
+            turns: Turns to add to the shared count
+            audio_seconds: Audio seconds to add
+            
+        Returns:
+            The new shared turn count, or None if the session is not registered
+        """
+        count = await self._session_activity_script(
+            keys=[CacheKeys.realtime_session(session_id)],
+            args=[turns, last_activity, settings.REALTIME_SESSION_TTL, audio_seconds]
+        )
+        return int(count) if count is not None else None
+    
+    async def remove_realtime_session(self, session_id: str, user_id: int):
+        """Remove a realtime session from the registry"""
+        async with self._pipeline(transaction=False) as pipe:
+            pipe.delete(CacheKeys.realtime_session(session_id))
+            pipe.srem(CacheKeys.realtime_user_sessions(user_id), session_id)
+            await pipe.execute()
+    
+    async def get_user_realtime_sessions(self, user_id: int) -> List[str]:
+        """
+        Get the registered realtime session IDs of a user
+        
+        Sessions that expired without being ended are pruned from the index.
+        """
+        user_key = CacheKeys.realtime_user_sessions(user_id)
+        session_ids = sorted(await self._redis.smembers(user_key))
+        if not session_ids:
+            return []
+        
+        async with self._pipeline(transaction=False) as pipe:
+            for session_id in session_ids:
+                pipe.exists(CacheKeys.realtime_session(session_id))
+            alive = await pipe.execute()
+        
+        expired = [sid for sid, exists in zip(session_ids, alive) if not exists]
+        if expired:
+            await self._redis.srem(user_key, *expired)
+        return [sid for sid, exists in zip(session_ids, alive) if exists]
+    
+    # =============================================
+    # TRANSCRIPT TIERING METHODS
+    # =============================================
+    
+    async def acquire_lock(self, name: str, ttl_ms: int) -> Optional[str]:
+        """
+        Take a short-lived lock (SET NX PX)
+        
+        Returns:
+            Token to release the lock with, or None if it is held
+        """
+        token = uuid.uuid4().hex
+        if await self._redis.set(CacheKeys.lock(name), token, nx=True, px=ttl_ms):
+            return token
+        return None
+    
+    async def release_lock(self, name: str, token: str):
+        """Release a lock taken with acquire_lock, if still owned"""
+        await self._release_lock_script(keys=[CacheKeys.lock(name)], args=[token])
+    
+    def _queue_transcript_expiry(self, pipe, session_id: str):
+        """Queue EXPIRE for all transcript tiers of a session"""
+        for key in (
+            CacheKeys.transcript_hot(session_id),
+            CacheKeys.transcript_segments(session_id),
+            CacheKeys.transcript_meta(session_id)
+        ):
+            pipe.expire(key, settings.REALTIME_SESSION_TTL)
+    
+    async def append_transcript(
+        self,
+        session_id: str,
+        messages: List[ConversationMessage]
+    ) -> int:
+        """
+        Append messages to a transcript's hot tier
+        
+        Returns:
+            Number of messages now in the hot tier
+        """
+        async with self._pipeline() as pipe:
+            pipe.rpush(CacheKeys.transcript_hot(session_id), *[m.encode() for m in messages])
+            self._queue_transcript_expiry(pipe, session_id)
+            results = await pipe.execute()
+        return results[0]
+    
+    async def roll_transcript(
+        self,
+        session_id: str,
+        segment_size: int
+    ) -> Optional[List[ConversationMessage]]:
+        """
+        Move the oldest segment_size hot messages into a compressed segment
+        
+        Runs under a per-transcript lock so concurrent workers never roll
+        the same messages twice.
+        
+        Returns:
+            The rolled messages, or None if another worker is rolling or
+            there are not enough hot messages
+        """
+        lock_name = CacheKeys.transcript_hot(session_id)
+        token = await self.acquire_lock(lock_name, settings.CACHE_LOCK_TIMEOUT * 1000)
+        if token is None:
+            return None
+        
+        try:
+            hot_key = CacheKeys.transcript_hot(session_id)
+            raw_messages = await self._redis_bytes.lrange(hot_key, 0, segment_size - 1)
+            if len(raw_messages) < segment_size:
+                return None
+            
+            messages = [ConversationMessage.decode(m) for m in raw_messages]
+            segment = self._segment_codec.encode([m.to_dict() for m in messages])
+            
+            async with self._pipeline() as pipe:
+                pipe.rpush(CacheKeys.transcript_segments(session_id), segment)
+                pipe.ltrim(hot_key, segment_size, -1)
+                pipe.hincrby(CacheKeys.transcript_meta(session_id), "rolled_messages", segment_size)
+                self._queue_transcript_expiry(pipe, session_id)
+                await pipe.execute()
+            return messages
+        finally:
+            await self.release_lock(lock_name, token)
+    
+    async def get_transcript_summary(self, session_id: str) -> Dict[str, Any]:
+        """
+        Get the rolling summary of a transcript
+        
+        Returns:
+            Dict with summary (or None), summarized_segments and rolled_messages
+        """
+        meta = await self._redis.hgetall(CacheKeys.transcript_meta(session_id))
+        return {
+            "summary": meta.get("summary"),
+            "summarized_segments": int(meta.get("summarized_segments", 0)),
+            "rolled_messages": int(meta.get("rolled_messages", 0))
+        }
+    
+    async def get_transcript_context(
+        self,
+        session_id: str
+    ) -> Tuple[Optional[str], List[ConversationMessage]]:
+        """
+        Get the rolling summary and the hot tier in one round trip
+        
+        Returns:
+            Tuple of (summary or None, hot messages oldest first)
+        """
+        async with self._pipeline(self._redis_bytes, transaction=False) as pipe:
+            pipe.hget(CacheKeys.transcript_meta(session_id), "summary")
+            pipe.lrange(CacheKeys.transcript_hot(session_id), 0, -1)
+            summary, raw_hot = await pipe.execute()
+        
+        summary = summary.decode("utf-8") if summary else None
+        return summary, [ConversationMessage.decode(m) for m in raw_hot]
+    
+    async def set_transcript_summary(
+        self,
+        session_id: str,
+        summary: str,
+        summarized_segments: int
+    ):
+        """Store the rolling summary and how many segments it covers"""
+        meta_key = CacheKeys.transcript_meta(session_id)
+        await self._redis.hset(meta_key, mapping={
+            "summary": summary,
+            "summarized_segments": summarized_segments
+        })
+    
+    async def get_transcript_segments(
+        self,
+        session_id: str,
+        start: int = 0
+    ) -> List[List[ConversationMessage]]:
+        """Get compressed segments from index start on, decoded"""
+        raw_segments = await self._redis_bytes.lrange(
+            CacheKeys.transcript_segments(session_id), start, -1
+        )
+        return [
+            [ConversationMessage.from_dict(m) for m in self._segment_codec.decode(raw)]
+            for raw in raw_segments
+        ]
+    
+    async def get_transcript(self, session_id: str) -> List[ConversationMessage]:
+        """Get a full transcript: all segments followed by the hot tier"""
+        async with self._pipeline(self._redis_bytes, transaction=False) as pipe:
+            pipe.lrange(CacheKeys.transcript_segments(session_id), 0, -1)
+            pipe.lrange(CacheKeys.transcript_hot(session_id), 0, -1)
+            raw_segments, raw_hot = await pipe.execute()
+        
+        messages = []
+        for raw in raw_segments:
+            messages.extend(ConversationMessage.from_dict(m) for m in self._segment_codec.decode(raw))
+        messages.extend(ConversationMessage.decode(m) for m in raw_hot)
+        return messages
+    
+    async def delete_transcript(self, session_id: str):
+        """Delete all transcript tiers of a session"""
+        await self._redis.delete(
+            CacheKeys.transcript_hot(session_id),
+            CacheKeys.transcript_segments(session_id),
+            CacheKeys.transcript_meta(session_id)
+        )
     
     # =============================================
     # RATE LIMITING METHODS
     # =============================================
     
+    @staticmethod
+    def get_endpoint_cost(endpoint: str) -> int:
+        """
+        Get the rate limit weight of an endpoint
+        
+        Uses the longest matching prefix in RATE_LIMIT_ENDPOINT_COSTS,
+        defaulting to 1.
+        """
+        best_prefix = ""
+        cost = 1
+        for prefix, weight in settings.RATE_LIMIT_ENDPOINT_COSTS.items():
+            if endpoint.startswith(prefix) and len(prefix) > len(best_prefix):
+                best_prefix, cost = prefix, weight
+        return cost
+    
+    async def _run_rate_limit_script(
+        self,
+        key: str,
+        max_requests: int,
+        window_seconds: int,
+        cost: int,
+        mode: str = "strict"
+    ) -> RateLimitResult:
+        """Evaluate the GCRA script in a single round trip"""
+        allowed, remaining, retry_after_ms, reset_after_ms, granted = await self._rate_limit_script(
+            keys=[key],
+            args=[max_requests, window_seconds * 1000, cost, mode]
+        )
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=max_requests,
+            remaining=int(remaining),
+            retry_after=int(retry_after_ms) / 1000,
+            reset_after=int(reset_after_ms) / 1000,
+            granted=int(granted)
+        )
+    
+    @staticmethod
+    def rate_limit_identity(user_id: Any) -> str:
+        """
+        Stable rate limit identity for a user
+        
+        A short BLAKE2 digest, identical across processes and restarts
+        (unlike the builtin hash(), which is salted per process).
+        """
+        return hashlib.blake2b(str(user_id).encode("utf-8"), digest_size=8).hexdigest()
+    
     async def check_rate_limit(
         self,
-        user_id: int,
+        identity: str,
         endpoint: str = "default",
         max_requests: int = None,
-        window_seconds: int = None
-    ) -> tuple[bool, int]:
+        window_seconds: int = None,
+        cost: int = None,
+        partial: bool = False
+    ) -> RateLimitResult:
         """
-        Check if user is within rate limit
+        Check and consume rate limit for user
+        
+        Runs an atomic GCRA check in Redis (one EVALSHA round trip), so
+        concurrent requests can never exceed the limit.
         
         Args:
-            user_id: User ID
+            identity: Rate limit identity (see rate_limit_identity)
             endpoint: Endpoint identifier
             max_requests: Max requests allowed (default from settings)
             window_seconds: Time window in seconds (default from settings)
+            cost: Weight of this request (default from RATE_LIMIT_ENDPOINT_COSTS)
+            partial: Grant as much of the cost as is available (used for leasing)
             
         Returns:
-            Tuple of (is_allowed, remaining_requests)
+            RateLimitResult with allowed, remaining, retry/reset times
         """
-        if not settings.RATE_LIMIT_ENABLED:
-            return True, -1
-        
         max_requests = max_requests or settings.RATE_LIMIT_REQUESTS
         window_seconds = window_seconds or settings.RATE_LIMIT_TTL
         
-        key = CacheKeys.rate_limit(user_id, endpoint)
-        
-        # Get current count
-        current = await self._redis.get(key)
-        
-        if current is None:
-            # First request in window
-            await self._redis.set(key, "1", ex=window_seconds)
-            return True, max_requests - 1
-        
-        current = int(current)
+        if not settings.RATE_LIMIT_ENABLED:
+            return RateLimitResult(True, max_requests, max_requests, 0, 0)
         
-        if current >= max_requests:
-            # Rate limit exceeded
-            return False, 0
+        if cost is None:
+            cost = self.get_endpoint_cost(endpoint)
         
-        # Increment counter
-        await self._redis.incr(key)
-        return True, max_requests - current - 1
+        key = CacheKeys.rate_limit(identity, endpoint)
+        return await self._run_rate_limit_script(
+            key, max_requests, window_seconds, cost, "partial" if partial else "strict"
+        )
     
     async def get_rate_limit_status(
         self,
-        user_id: int,
+        identity: str,
         endpoint: str = "default"
     ) -> Dict[str, Any]:
         """
-        Get rate limit status for user
+        Get rate limit status for user without consuming any requests
         
         Args:
-            user_id: User ID
+            identity: Rate limit identity
             endpoint: Endpoint identifier
             
         Returns:
             Dict with limit, remaining, reset_in
         """
-        key = CacheKeys.rate_limit(user_id, endpoint)
-        
-        current = await self._redis.get(key)
-        ttl = await self._redis.ttl(key)
+        key = CacheKeys.rate_limit(identity, endpoint)
+        result = await self._run_rate_limit_script(
+            key, settings.RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_TTL, 0
+        )
         
         return {
-            "limit": settings.RATE_LIMIT_REQUESTS,
-            "remaining": settings.RATE_LIMIT_REQUESTS - int(current or 0),
-            "reset_in": max(0, ttl)
+            "limit": result.limit,
+            "remaining": result.remaining,
+            "reset_in": math.ceil(result.reset_after)
         }
     
+    async def check_token_budget(self, identity: str) -> RateLimitResult:
+        """
+        Check a user's LLM token budget without consuming it
+        
+        Args:
+            identity: Rate limit identity
+            
+        Returns:
+            RateLimitResult; allowed while at least one token is left
+        """
+        key = CacheKeys.token_budget(identity)
+        result = await self._run_rate_limit_script(
+            key, settings.TOKEN_BUDGET_PER_MINUTE, 60, 0
+        )
+        result.allowed = result.remaining > 0
+        return result
+    
+    async def charge_token_budget(self, identity: str, tokens: int) -> RateLimitResult:
+        """
+        Charge LLM tokens that were already spent against a user's budget
+        
+        Always applies the charge, so a large response can push the
+        budget into debt and block the user until it refills.
+        
+        Args:
+            identity: Rate limit identity
+            tokens: Tokens used by the call
+            
+        Returns:
+            RateLimitResult after the charge
+        """
+        key = CacheKeys.token_budget(identity)
+        return await self._run_rate_limit_script(
+            key, settings.TOKEN_BUDGET_PER_MINUTE, 60, tokens, "force"
+        )
+    
+    # =============================================
+    # COMPUTED VALUE METHODS
+    # =============================================
+    
+    async def get_or_compute(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: Optional[int] = None
+    ) -> Any:
+        """
+        Get a cached value, computing it at most once across workers
+        
+        - Single-flight: concurrent misses in this worker share one loader
+          call, and a Redis lock makes other workers wait for its result
+        - Probabilistic early expiration (XFetch): as expiry approaches,
+          reads trigger a refresh with rising probability, weighted by how
+          long the loader took, so hot keys are refreshed before they expire
+        - Stale-while-revalidate: past expiry, the old value is still served
+          for up to stale_ttl seconds while one background refresh runs
+        
+        Args:
+            key: Cache key
+            loader: Async callable producing the value (must be serializable)
+            ttl: Seconds the value stays fresh
+            stale_ttl: Seconds a stale value may be served (default CACHE_STALE_TTL)
+            
+        Returns:
+            The cached or freshly computed value
+        """
+        stale_ttl = settings.CACHE_STALE_TTL if stale_ttl is None else stale_ttl
+        
+        entry = self._l1_get(key)
+        if entry is MISSING:
+            try:
+                data = await self._redis_bytes.get(key)
+            except Exception as e:
+                print(f"Warning: Cache read failed for {key}, computing directly: {e}")
+                return await loader()
+            entry = get_codec().decode(data) if data else None
+            if entry is not None:
+                self._l1_set(key, entry)
+        
+        if entry is None:
+            return await asyncio.shield(self._start_compute(key, loader, ttl, stale_ttl))
+        
+        if self._should_refresh(entry):
+            self._start_compute(key, loader, ttl, stale_ttl)
+        return entry["value"]
+    
+    @staticmethod
+    def _should_refresh(entry: Dict[str, Any]) -> bool:
+        """XFetch: refresh once now - delta * beta * ln(rand) passes the expiry"""
+        early = -entry["delta"] * settings.CACHE_EARLY_EXPIRY_BETA * math.log(1.0 - random.random())
+        return time.time() + early >= entry["expires_at"]
+    
+    def _start_compute(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: int
+    ) -> asyncio.Task:
+        """Start a load for a key, or join the one already in flight"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._compute_and_store(key, loader, ttl, stale_ttl))
+            self._inflight[key] = task
+            
+            def _done(t: asyncio.Task):
+                self._inflight.pop(key, None)
+                if not t.cancelled() and t.exception() is not None:
+                    print(f"Warning: Could not compute {key}: {t.exception()}")
+            
+            task.add_done_callback(_done)
+        return task
+    
+    async def _compute_and_store(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: int
+    ) -> Any:
+        """Run the loader under the cross-worker lock and store the result"""
+        lock_key = CacheKeys.lock(key)
+        token = uuid.uuid4().hex
+        try:
+            locked = await self._redis.set(
+                lock_key, token, nx=True, px=settings.CACHE_LOCK_TIMEOUT * 1000
+            )
+        except Exception as e:
+            print(f"Warning: Could not lock {key}, computing without cache: {e}")
+            return await loader()
+        
+        if not locked:
+            entry = await self._wait_for_peer(key, lock_key)
+            if entry is not None:
+                return entry["value"]
+            # The other worker failed or timed out: compute it ourselves
+        
+        try:
+            started = time.monotonic()
+            value = await loader()
+            entry = {
+                "value": value,
+                "delta": time.monotonic() - started,
+                "expires_at": time.time() + ttl
+            }
+            try:
+                await self._redis.set(key, get_codec().encode(entry), ex=ttl + stale_ttl)
+                self._l1_invalidate(key)
+                self._l1_set(key, entry)
+            except Exception as e:
+                print(f"Warning: Could not store {key}: {e}")
+            return value
+        finally:
+            if locked:
+                try:
+                    await self._release_lock_script(keys=[lock_key], args=[token])
+                except Exception:
+                    pass  # Expires on its own
+    
+    async def _wait_for_peer(self, key: str, lock_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Wait for another worker holding the lock to store a fresh value
+        
+        Returns None if the lock is released without one, or on timeout.
+        """
+        deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+        delay = 0.05
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            async with self._pipeline(self._redis_bytes, transaction=False) as pipe:
+                pipe.get(key)
+                pipe.exists(lock_key)
+                data, locked = await pipe.execute()
+            
+            if data:
+                entry = get_codec().decode(data)
+                if entry["expires_at"] > time.time():
+                    return entry
+            if not locked:
+                return None
+            delay = min(delay * 2, 1.0)
+        return None
+    
     # =============================================
     # GENERIC CACHE METHODS
     # =============================================
     
     async def get(self, key: str) -> Optional[str]:
         """Get a value from cache"""
-        return await self._redis.get(key)
+        cached = self._l1_get(key)
+        if cached is not MISSING:
+            return cached
+        
+        value = await self._redis.get(key)
+        self._l1_set(key, value)
+        return value
     
     async def set(self, key: str, value: str, ttl: int = 3600):
         """Set a value in cache"""
         await self._redis.set(key, value, ex=ttl)
+        self._l1_invalidate(key)
     
     async def delete(self, key: str):
         """Delete a key from cache"""
         await self._redis.delete(key)
+        self._l1_invalidate(key)
     
     async def exists(self, key: str) -> bool:
         """Check if key exists"""
@@ -9,6 +9,7 @@ import numpy as np
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from app.config import get_settings
+from app.services.cache_service import get_cache_service, CacheKeys
 
 settings = get_settings()
 
@@ -25,11 +26,13 @@ class EmbeddingService:
         self.model = settings.OPENAI_EMBEDDING_MODEL
         self.dimension = settings.EMBEDDING_DIMENSION
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     async def embed(self, text: str) -> List[float]:
         """
         Generate embedding for a single text
         
+        Embeddings are cached in Redis per model and text, and concurrent
+        requests for the same text share a single API call.
+        
         Args:
             text: Text to embed
             
@@ -41,6 +44,21 @@ class EmbeddingService:
         if len(text) > 8000:  # Rough token limit
             text = text[:8000]
         
+        try:
+            cache = await get_cache_service()
+        except Exception as e:
+            print(f"Warning: Embedding cache unavailable: {e}")
+            return await self._create_embedding(text)
+        
+        return await cache.get_or_compute(
+            CacheKeys.embedding(self.model, text),
+            lambda: self._create_embedding(text),
+            ttl=settings.EMBEDDING_CACHE_TTL
+        )
+    
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    async def _create_embedding(self, text: str) -> List[float]:
+        """Call the embeddings API for one cleaned text"""
         response = await self.client.embeddings.create(
             model=self.model,
             input=text,
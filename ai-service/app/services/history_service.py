@@ -0,0 +1,220 @@
+"""
+History Service
+Write-behind persistence of conversation turns into conversation_history,
+and reads of recent history from Postgres
+"""
+import os
+import time
+import socket
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import async_session_maker
+from app.models.conversation import ConversationHistory
+from app.services.cache_service import get_cache_service
+
+settings = get_settings()
+
+
+def _to_rows(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Convert a history stream payload to conversation_history rows"""
+    return [
+        {
+            "session_id": payload.get("session_id"),
+            "user_id": payload["user_id"],
+            "coach_id": payload["coach_id"],
+            "role": m["role"],
+            "content": m["content"],
+            "message_metadata": m.get("metadata"),
+            "idempotency_key": m["idempotency_key"],
+            "created_at": datetime.fromisoformat(m["timestamp"]).replace(tzinfo=timezone.utc)
+        }
+        for m in payload["messages"]
+    ]
+
+
+class HistoryPersister:
+    """
+    Flushes queued turns from the Redis history stream to Postgres
+
+    - CacheService.record_turn XADDs each turn in the same pipeline as the
+      cache write, so persisting adds no DB latency to the turn
+    - Rows are buffered and written in one multi-row INSERT every
+      HISTORY_FLUSH_INTERVAL_MS or HISTORY_FLUSH_BATCH_ROWS rows
+    - Entries are acknowledged only after the INSERT commits (at-least-once);
+      ON CONFLICT (idempotency_key) DO NOTHING drops redeliveries
+    - Entries left unacknowledged by a dead worker are reclaimed with
+      XAUTOCLAIM after HISTORY_CLAIM_IDLE_MS
+
+    Usage:
+        persister = get_history_persister()
+        persister.start()
+        ...
+        await persister.stop()
+    """
+
+    GROUP = "history-persister"
+
+    def __init__(self):
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+        # Read but not yet persisted, by stream entry id
+        self._buffer: Dict[str, List[Dict[str, Any]]] = {}
+
+        self.rows_written = 0
+        self.batches_written = 0
+
+    def start(self):
+        """Start the background flush loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop, persisting whatever is buffered"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        if self._buffer:
+            try:
+                await self._flush()
+            except Exception as e:
+                # Still pending in the stream; another worker will reclaim it
+                print(f"Warning: Could not persist history on shutdown: {e}")
+
+    @property
+    def _buffered_rows(self) -> int:
+        return sum(len(rows) for rows in self._buffer.values())
+
+    def _add(self, entries: List[tuple]):
+        """Buffer decoded stream entries (corrupt ones are acked as empty)"""
+        for entry_id, payload in entries:
+            self._buffer[entry_id] = _to_rows(payload) if payload else []
+
+    async def _run(self):
+        backoff = 1
+        while True:
+            try:
+                cache = await get_cache_service()
+                await cache.ensure_history_group(self.GROUP)
+                last_claim = 0.0
+
+                while True:
+                    now = time.monotonic()
+                    if now - last_claim >= settings.HISTORY_CLAIM_IDLE_MS / 2000:
+                        self._add(await cache.claim_history(
+                            self.GROUP, self.consumer,
+                            settings.HISTORY_CLAIM_IDLE_MS, settings.HISTORY_FLUSH_BATCH_ROWS
+                        ))
+                        last_claim = now
+
+                    # Wait for the first entry, then fill the batch until
+                    # it is full or the flush interval has passed
+                    deadline = None
+                    while self._buffered_rows < settings.HISTORY_FLUSH_BATCH_ROWS:
+                        now = time.monotonic()
+                        if deadline is None and self._buffer:
+                            deadline = now + settings.HISTORY_FLUSH_INTERVAL_MS / 1000
+                        if deadline is not None and now >= deadline:
+                            break
+                        # Stay under the socket timeout
+                        block_ms = 1000 if deadline is None else max(1, int((deadline - now) * 1000))
+                        entries = await cache.read_history(
+                            self.GROUP, self.consumer,
+                            count=settings.HISTORY_FLUSH_BATCH_ROWS,
+                            block_ms=min(block_ms, 1000)
+                        )
+                        self._add(entries)
+                        if not entries and deadline is None:
+                            break  # idle: go back and check for reclaimable entries
+
+                    if self._buffer:
+                        await self._flush()
+                    backoff = 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Warning: History persister error, retrying in {backoff}s: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    async def _flush(self):
+        """Insert buffered rows in one statement, then acknowledge them"""
+        entry_ids = list(self._buffer)
+        rows = [row for entry_rows in self._buffer.values() for row in entry_rows]
+
+        if rows:
+            statement = insert(ConversationHistory).values(rows).on_conflict_do_nothing(
+                index_elements=["idempotency_key"]
+            )
+            async with async_session_maker() as db:
+                await db.execute(statement)
+                await db.commit()
+
+        cache = await get_cache_service()
+        await cache.ack_history(self.GROUP, entry_ids)
+
+        for entry_id in entry_ids:
+            self._buffer.pop(entry_id, None)
+        self.rows_written += len(rows)
+        self.batches_written += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get persister statistics"""
+        return {
+            "running": bool(self._task and not self._task.done()),
+            "buffered_rows": self._buffered_rows,
+            "rows_written": self.rows_written,
+            "batches_written": self.batches_written
+        }
+
+
+async def get_recent_history(
+    db: AsyncSession,
+    user_id: int,
+    coach_id: int,
+    limit: int = 20
+) -> List[Dict[str, str]]:
+    """
+    Get the most recent persisted messages of a user-coach pair
+
+    Uses the (user_id, coach_id, created_at) index.
+
+    Returns:
+        Messages oldest first, as {"role": ..., "content": ...} dicts
+    """
+    result = await db.execute(
+        select(ConversationHistory)
+        .where(
+            ConversationHistory.user_id == user_id,
+            ConversationHistory.coach_id == coach_id
+        )
+        .order_by(ConversationHistory.created_at.desc(), ConversationHistory.id.desc())
+        .limit(limit)
+    )
+    rows = list(result.scalars().all())
+    rows.reverse()
+    return [{"role": row.role, "content": row.content} for row in rows]
+
+
+# Global persister instance
+_history_persister: Optional[HistoryPersister] = None
+
+
+def get_history_persister() -> HistoryPersister:
+    """Get the history persister instance"""
+    global _history_persister
+    if _history_persister is None:
+        _history_persister = HistoryPersister()
+    return _history_persister
@@ -4,14 +4,16 @@ Supports multiple providers: OpenAI, Groq, Anthropic
 Easily swappable backend
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable
 from dataclasses import dataclass
 from functools import lru_cache
 import json
+import time
 
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from app.config import get_settings
+from app.services.quota_service import charge_llm_usage
 
 settings = get_settings()
 
@@ -32,9 +34,120 @@ class Message:
     content: str
 
 
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) when a provider reports none"""
+    return max(1, len(text) // 4) if text else 0
+
+
+def _usage_dict(usage: Any, prompt_key: str = "prompt_tokens", completion_key: str = "completion_tokens") -> Dict[str, int]:
+    """Normalize a provider usage object or dict"""
+    if isinstance(usage, dict):
+        prompt, completion = usage.get(prompt_key, 0), usage.get(completion_key, 0)
+    else:
+        prompt, completion = getattr(usage, prompt_key, 0), getattr(usage, completion_key, 0)
+    return {
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "total_tokens": prompt + completion
+    }
+
+
+class LLMStream:
+    """
+    Streaming response from LLM
+    
+    Async-iterate to receive text chunks as they arrive; content, model,
+    usage and finish_reason are filled in as the stream progresses. When
+    the stream ends (or is closed early with aclose(), which stops the
+    upstream generation) its usage is charged to the request's user. If
+    the provider reported no usage, it is estimated from the text.
+    
+    A stream closed before the provider finished is marked cancelled.
+    
+    Usage:
+        stream = client.stream(prompt, system_prompt, history)
+        async for chunk in stream:
+            ...
+        print(stream.content, stream.usage)
+    """
+    
+    def __init__(
+        self,
+        prompt_text: str,
+        on_complete: Optional[Callable[[Dict[str, int]], None]] = None
+    ):
+        self.content = ""
+        self.model = ""
+        self.usage: Dict[str, int] = {}
+        self.finish_reason: Optional[str] = None
+        self.closed = False
+        self.cancelled = False
+        self._prompt_text = prompt_text
+        self._chunks: Optional[AsyncIterator[str]] = None
+        self._on_complete = on_complete
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self) -> str:
+        if self.closed:
+            raise StopAsyncIteration
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            await self._finish()
+            raise
+        except BaseException:
+            await self.aclose()
+            raise
+        self.content += chunk
+        return chunk
+    
+    async def aclose(self):
+        """Stop the stream early, ending the provider request"""
+        if not self.closed:
+            self.cancelled = True
+            await self._chunks.aclose()
+            await self._finish()
+    
+    async def _finish(self):
+        if self.closed:
+            return
+        self.closed = True
+        if not self.usage:
+            prompt = estimate_tokens(self._prompt_text)
+            completion = estimate_tokens(self.content)
+            self.usage = {
+                "prompt_tokens": prompt,
+                "completion_tokens": completion,
+                "total_tokens": prompt + completion,
+                "estimated": True
+            }
+        if not self.cancelled and self._on_complete:
+            self._on_complete(self.usage)
+        # Charge the request's user for the tokens spent
+        await charge_llm_usage(self.usage)
+
+
 class BaseLLMProvider(ABC):
     """Abstract base class for LLM providers"""
     
+    @staticmethod
+    def _chat_messages(
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Message]] = None
+    ) -> List[Dict[str, str]]:
+        """Build an OpenAI-style message list"""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        if history:
+            for msg in history:
+                messages.append({"role": msg.role, "content": msg.content})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+    
     @abstractmethod
     async def generate(
         self,
@@ -47,6 +160,37 @@ class BaseLLMProvider(ABC):
     ) -> LLMResponse:
         """Generate a response from the LLM"""
         pass
+    
+    async def stream(
+        self,
+        result: LLMStream,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Message]] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response from the LLM, yielding text chunks
+        
+        Providers fill result.model, usage and finish_reason. The default
+        implementation yields the whole response as a single chunk.
+        """
+        response = await self.generate(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            history=history,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        result.model = response.model
+        result.usage = response.usage
+        result.finish_reason = response.finish_reason
+        yield response.content
+    
+    async def warm_up(self):
+        """Open a connection to the provider ahead of the first request"""
+        pass
 
 
 class OpenAIProvider(BaseLLMProvider):
@@ -57,6 +201,10 @@ class OpenAIProvider(BaseLLMProvider):
         self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = settings.OPENAI_MODEL
     
+    async def warm_up(self):
+        # Cheap authenticated request; leaves a TLS connection in the pool
+        await self.client.models.retrieve(self.model)
+    
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     async def generate(
         self,
@@ -104,6 +252,41 @@ class OpenAIProvider(BaseLLMProvider):
             },
             finish_reason=response.choices[0].finish_reason
         )
+    
+    async def stream(
+        self,
+        result: LLMStream,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Message]] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._chat_messages(prompt, system_prompt, history),
+            temperature=temperature or settings.LLM_TEMPERATURE,
+            max_tokens=max_tokens or settings.LLM_MAX_TOKENS,
+            stream=True,
+            # Final chunk carries usage (stream_options is newer than our SDK)
+            extra_body={"stream_options": {"include_usage": True}}
+        )
+        try:
+            async for chunk in response:
+                result.model = chunk.model or result.model
+                usage = getattr(chunk, "usage", None)
+                if usage:
+                    result.usage = _usage_dict(usage)
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.finish_reason:
+                    result.finish_reason = choice.finish_reason
+                if choice.delta.content:
+                    yield choice.delta.content
+        finally:
+            # Closing early stops generation upstream
+            await response.close()
 
 
 class GroqProvider(BaseLLMProvider):
@@ -114,6 +297,9 @@ class GroqProvider(BaseLLMProvider):
         self.client = AsyncGroq(api_key=settings.GROQ_API_KEY)
         self.model = settings.GROQ_MODEL
     
+    async def warm_up(self):
+        await self.client.models.retrieve(self.model)
+    
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     async def generate(
         self,
@@ -157,6 +343,40 @@ class GroqProvider(BaseLLMProvider):
             },
             finish_reason=response.choices[0].finish_reason
         )
+    
+    async def stream(
+        self,
+        result: LLMStream,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Message]] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._chat_messages(prompt, system_prompt, history),
+            temperature=temperature or settings.LLM_TEMPERATURE,
+            max_tokens=max_tokens or settings.LLM_MAX_TOKENS,
+            stream=True
+        )
+        try:
+            async for chunk in response:
+                result.model = chunk.model or result.model
+                # Groq reports usage on the last chunk under x_groq
+                x_groq = getattr(chunk, "x_groq", None)
+                usage = x_groq.get("usage") if isinstance(x_groq, dict) else getattr(x_groq, "usage", None)
+                if usage:
+                    result.usage = _usage_dict(usage)
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.finish_reason:
+                    result.finish_reason = choice.finish_reason
+                if choice.delta.content:
+                    yield choice.delta.content
+        finally:
+            await response.close()
 
 
 class AnthropicProvider(BaseLLMProvider):
@@ -207,6 +427,32 @@ class AnthropicProvider(BaseLLMProvider):
             },
             finish_reason=response.stop_reason
         )
+    
+    async def stream(
+        self,
+        result: LLMStream,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Message]] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        kwargs = {
+            "model": self.model,
+            "messages": self._chat_messages(prompt, None, history),
+            "temperature": temperature or settings.LLM_TEMPERATURE,
+            "max_tokens": max_tokens or settings.LLM_MAX_TOKENS,
+        }
+        if system_prompt:
+            kwargs["system"] = system_prompt
+        
+        async with self.client.messages.stream(**kwargs) as stream:
+            async for text in stream.text_stream:
+                yield text
+            message = await stream.get_final_message()
+            result.model = message.model
+            result.usage = _usage_dict(message.usage, "input_tokens", "output_tokens")
+            result.finish_reason = message.stop_reason
 
 
 class LLMClient:
@@ -221,6 +467,9 @@ class LLMClient:
         provider = provider or settings.LLM_PROVIDER
         self.provider = self._get_provider(provider)
         self.provider_name = provider
+        # Moving average of streamed reply lengths, for interrupt savings
+        self.avg_completion_tokens: Optional[float] = None
+        self._last_warm_up = float("-inf")
     
     def _get_provider(self, provider: str) -> BaseLLMProvider:
         """Get the appropriate provider instance"""
@@ -263,7 +512,7 @@ class LLMClient:
         if history:
             message_history = [Message(role=m["role"], content=m["content"]) for m in history]
         
-        return await self.provider.generate(
+        response = await self.provider.generate(
             prompt=prompt,
             system_prompt=system_prompt,
             history=message_history,
@@ -271,6 +520,79 @@ class LLMClient:
             max_tokens=max_tokens,
             json_mode=json_mode
         )
+        
+        # Charge the request's user for the tokens spent
+        await charge_llm_usage(response.usage)
+        
+        return response
+    
+    def stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> LLMStream:
+        """
+        Stream a response from the LLM
+        
+        Args:
+            Same as generate() (without json_mode)
+            
+        Returns:
+            LLMStream to async-iterate for text chunks; closing it early
+            stops the generation and charges only what was used
+        """
+        message_history = None
+        if history:
+            message_history = [Message(role=m["role"], content=m["content"]) for m in history]
+        
+        prompt_text = "".join([system_prompt or "", prompt, *(m["content"] for m in history or [])])
+        result = LLMStream(prompt_text, on_complete=self._record_completion)
+        result._chunks = self.provider.stream(
+            result,
+            prompt=prompt,
+            system_prompt=system_prompt,
+            history=message_history,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return result
+    
+    async def warm_up(self):
+        """
+        Open a provider connection before a request needs it
+        
+        Skipped if one was opened within PROVIDER_WARMUP_INTERVAL seconds: the
+        HTTP pool only keeps idle connections for a few seconds anyway.
+        """
+        now = time.monotonic()
+        if now - self._last_warm_up < settings.PROVIDER_WARMUP_INTERVAL:
+            return
+        self._last_warm_up = now
+        try:
+            await self.provider.warm_up()
+        except Exception as e:
+            print(f"Warning: Could not warm up {self.provider_name} connection: {e}")
+    
+    def _record_completion(self, usage: Dict[str, int]):
+        """Fold a finished stream's length into the moving average"""
+        tokens = usage.get("completion_tokens", 0)
+        if self.avg_completion_tokens is None:
+            self.avg_completion_tokens = float(tokens)
+        else:
+            self.avg_completion_tokens += 0.1 * (tokens - self.avg_completion_tokens)
+    
+    def estimate_tokens_saved(self, stream: LLMStream) -> int:
+        """
+        Estimate the completion tokens not generated because a stream was
+        cancelled, from the average length of finished replies
+        """
+        if not stream.cancelled or self.avg_completion_tokens is None:
+            return 0
+        generated = stream.usage.get("completion_tokens", estimate_tokens(stream.content))
+        return max(0, round(self.avg_completion_tokens) - generated)
     
     async def generate_json(
         self,
@@ -0,0 +1,119 @@
+"""
+In-process L1 cache
+Bounded LRU with per-key-pattern TTLs, sitting in front of Redis reads
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+# Returned by LocalCache.get on a miss (None is a valid cached value)
+MISSING = object()
+
+
+class LocalCache:
+    """
+    In-process cache for hot Redis keys
+
+    - Only keys matching a configured prefix are cached, each prefix with
+      its own TTL (e.g. personas for minutes, session context for seconds)
+    - Bounded to max_entries with LRU eviction
+    - Entries are stored per Redis key plus an optional variant (e.g. the
+      `limit` of a list read), and invalidate() drops every variant of a key
+      so Redis keyspace notifications can keep workers coherent
+    """
+
+    def __init__(self, ttls: Dict[str, float], max_entries: int = 10000):
+        # Longest prefix first so the most specific TTL wins
+        self.ttls = sorted(ttls.items(), key=lambda item: len(item[0]), reverse=True)
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self._variants: Dict[str, Set[Hashable]] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def prefixes(self):
+        """Key prefixes eligible for L1 caching"""
+        return [prefix for prefix, _ in self.ttls]
+
+    def ttl_for(self, key: str) -> Optional[float]:
+        """Get the L1 TTL for a key, or None if the key is not L1-cacheable"""
+        for prefix, ttl in self.ttls:
+            if key.startswith(prefix):
+                return ttl
+        return None
+
+    def get(self, key: str, variant: Hashable = None) -> Any:
+        """Get a cached value, or MISSING"""
+        entry = self._entries.get((key, variant))
+        if entry is None:
+            self.misses += 1
+            return MISSING
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._remove((key, variant))
+            self.misses += 1
+            return MISSING
+
+        self._entries.move_to_end((key, variant))
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, variant: Hashable = None, ttl: Optional[float] = None):
+        """Cache a value if its key is L1-cacheable"""
+        ttl = ttl if ttl is not None else self.ttl_for(key)
+        if not ttl:
+            return
+
+        self._entries[(key, variant)] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end((key, variant))
+        self._variants.setdefault(key, set()).add(variant)
+
+        while len(self._entries) > self.max_entries:
+            oldest, _ = self._entries.popitem(last=False)
+            self._forget_variant(oldest)
+            self.evictions += 1
+
+    def invalidate(self, key: str):
+        """Drop every cached variant of a Redis key"""
+        variants = self._variants.pop(key, None)
+        if not variants:
+            return
+        for variant in variants:
+            self._entries.pop((key, variant), None)
+        self.invalidations += 1
+
+    def clear(self):
+        """Drop everything (e.g. when invalidation events may have been missed)"""
+        self._entries.clear()
+        self._variants.clear()
+
+    def _remove(self, entry_key: Tuple[str, Hashable]):
+        self._entries.pop(entry_key, None)
+        self._forget_variant(entry_key)
+
+    def _forget_variant(self, entry_key: Tuple[str, Hashable]):
+        key, variant = entry_key
+        variants = self._variants.get(key)
+        if variants is not None:
+            variants.discard(variant)
+            if not variants:
+                del self._variants[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
@@ -9,12 +9,18 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.coach_memory import CoachMemory
 from app.services.embedding_service import get_embedding_service
+from app.services.llm_client import get_llm_client
 
 from app.config import get_settings
 
 settings = get_settings()
 
 
+PROFILE_SYSTEM_PROMPT = """You write a short profile of a coaching client from notes about them.
+Cover their business, goals, challenges, commitments and preferences; leave out anything uncertain.
+Write in the third person, at most 120 words."""
+
+
 @dataclass
 class MemoryResult:
     """Result from memory search"""
@@ -193,6 +199,36 @@ class MemoryService:
             for m in reversed(memories)  # Return in chronological order
         ]
     
+    async def summarize_profile(
+        self,
+        user_id: int,
+        coach_id: int,
+        limit: int = 20
+    ) -> Optional[str]:
+        """
+        Summarize what the coach knows about a user with the LLM
+        
+        Args:
+            user_id: User ID
+            coach_id: Coach ID
+            limit: Number of recent memories to summarize
+            
+        Returns:
+            The profile summary, or None if there are no memories yet
+        """
+        memories = await self.get_recent_context(user_id, coach_id, limit=limit)
+        if not memories:
+            return None
+        
+        notes = "\n".join(f"- {m['text']}" for m in memories)
+        response = await get_llm_client().generate(
+            prompt=f"Notes:\n{notes}\n\nProfile:",
+            system_prompt=PROFILE_SYSTEM_PROMPT,
+            temperature=0.3,
+            max_tokens=200
+        )
+        return response.content.strip()
+    
     async def delete_user_memories(self, user_id: int, coach_id: Optional[int] = None):
         """
         Delete all memories for a user (optionally filtered by coach)
@@ -0,0 +1,122 @@
+"""
+Quota Service
+Per-user LLM token budgets, charged from LLMResponse.usage after each call
+"""
+import math
+from contextvars import ContextVar
+from typing import Optional, Dict, Any
+
+from fastapi import HTTPException
+
+from app.config import get_settings
+from app.services.cache_service import get_cache_service, CacheService
+
+settings = get_settings()
+
+# Identity whose token budget LLM calls in the current request are charged to
+_quota_identity: ContextVar[Optional[str]] = ContextVar("quota_identity", default=None)
+
+
+def set_quota_user(user_id: Any) -> str:
+    """
+    Charge LLM calls made by the current request to a user
+
+    Args:
+        user_id: User ID (or any stable user reference)
+
+    Returns:
+        The user's rate limit identity
+    """
+    identity = CacheService.rate_limit_identity(user_id)
+    _quota_identity.set(identity)
+    return identity
+
+
+def get_quota_identity() -> Optional[str]:
+    """Get the identity LLM calls are currently charged to"""
+    return _quota_identity.get()
+
+
+async def ensure_token_budget(user_id: Any):
+    """
+    Reject the request if the user's token budget is exhausted
+
+    Also makes subsequent LLM calls in this request charge that user.
+
+    Raises:
+        HTTPException(429) when the budget is exhausted
+    """
+    identity = set_quota_user(user_id)
+
+    if not (settings.RATE_LIMIT_ENABLED and settings.TOKEN_BUDGET_ENABLED):
+        return
+
+    try:
+        cache = await get_cache_service()
+        result = await cache.check_token_budget(identity)
+    except Exception as e:
+        print(f"Warning: Could not check token budget: {e}")
+        return
+
+    if not result.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="LLM token budget exceeded. Please try again later.",
+            headers=result.headers()
+        )
+
+
+async def charge_llm_usage(usage: Optional[Dict[str, int]]):
+    """
+    Charge an LLM call's token usage to the current request's user
+
+    No-op when no user is bound to the request or quotas are disabled.
+
+    Args:
+        usage: LLMResponse.usage dict
+    """
+    identity = _quota_identity.get()
+    if not identity or not usage:
+        return
+    if not (settings.RATE_LIMIT_ENABLED and settings.TOKEN_BUDGET_ENABLED):
+        return
+
+    tokens = usage.get("total_tokens", 0)
+    if tokens <= 0:
+        return
+
+    try:
+        cache = await get_cache_service()
+        await cache.charge_token_budget(identity, tokens)
+    except Exception as e:
+        print(f"Warning: Could not charge token usage: {e}")
+
+
+async def get_quota_status(user_id: Any, endpoint: str = "default") -> Dict[str, Any]:
+    """
+    Get request and token quota status for a user
+
+    Args:
+        user_id: User ID (or any stable user reference)
+        endpoint: Endpoint identifier for the request limit
+
+    Returns:
+        Dict with identity, request limit status and token budget status
+    """
+    identity = CacheService.rate_limit_identity(user_id)
+    cache = await get_cache_service()
+
+    requests = await cache.get_rate_limit_status(identity, endpoint)
+    tokens = await cache.check_token_budget(identity)
+
+    return {
+        "identity": identity,
+        "endpoint": endpoint,
+        "requests": requests,
+        "tokens": {
+            "limit": tokens.limit,
+            "remaining": tokens.remaining,
+            "reset_in": math.ceil(tokens.reset_after),
+            "enabled": settings.TOKEN_BUDGET_ENABLED
+        }
+    }
@@ -0,0 +1,249 @@
+"""
+Hierarchical Rate Limiter
+Leases small token batches from the Redis GCRA limiter and spends them
+in-process, so most requests are admitted without a network round trip
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from app.config import get_settings
+from app.services.cache_service import get_cache_service, RateLimitResult, CacheService
+
+settings = get_settings()
+
+
+@dataclass
+class LocalTokenBucket:
+    """
+    Classic in-memory token bucket
+
+    Used as the local-only fallback when Redis is unreachable.
+    """
+    capacity: int
+    refill_rate: float  # tokens per second
+    tokens: float = 0.0
+    updated_at: float = 0.0
+
+    def __post_init__(self):
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+
+    def take(self, cost: int) -> Tuple[bool, int, float]:
+        """
+        Try to take tokens
+
+        Returns:
+            Tuple of (allowed, remaining, retry_after_seconds)
+        """
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated_at) * self.refill_rate
+        )
+        self.updated_at = now
+
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True, int(self.tokens), 0.0
+        return False, int(self.tokens), (cost - self.tokens) / self.refill_rate
+
+
+@dataclass
+class LeasedBucket:
+    """Tokens leased from Redis for one identity/endpoint pair"""
+    tokens: int = 0
+    expires_at: float = 0.0         # monotonic; leased tokens are dropped after this
+    remote_remaining: int = 0       # tokens left in Redis after the last lease
+    reset_after: float = 0.0
+    denied_until: float = 0.0       # monotonic; cached Redis denial
+    renewal: Optional[asyncio.Task] = None
+
+
+class HierarchicalRateLimiter:
+    """
+    Two-level rate limiter
+
+    - Redis (GCRA script) holds the global budget per identity/endpoint
+    - Each worker leases batches of tolerance x limit tokens and spends them
+      locally; a renewal is started in the background when the batch runs low
+    - Denials are cached locally until the retry time, so rejected clients
+      do not cost a Redis call either
+    - When Redis is unreachable, a per-worker token bucket takes over
+
+    Usage:
+        limiter = get_rate_limiter()
+        result = await limiter.acquire(identity, "/ai/coach/respond")
+    """
+
+    def __init__(
+        self,
+        limit: Optional[int] = None,
+        window_seconds: Optional[int] = None,
+        tolerance: Optional[float] = None,
+        lease_ttl: Optional[int] = None,
+        max_keys: Optional[int] = None
+    ):
+        self.limit = limit or settings.RATE_LIMIT_REQUESTS
+        self.window_seconds = window_seconds or settings.RATE_LIMIT_TTL
+        tolerance = tolerance if tolerance is not None else settings.RATE_LIMIT_LEASE_TOLERANCE
+        self.lease_size = max(1, int(self.limit * tolerance))
+        self.low_water = self.lease_size // 4
+        self.lease_ttl = lease_ttl or settings.RATE_LIMIT_LEASE_TTL
+        self.max_keys = max_keys or settings.RATE_LIMIT_LOCAL_MAX_KEYS
+
+        self._buckets: "OrderedDict[Tuple[str, str], LeasedBucket]" = OrderedDict()
+        self._fallback: "OrderedDict[Tuple[str, str], LocalTokenBucket]" = OrderedDict()
+        self._redis_down_until = 0.0
+
+    def _get_bucket(self, key: Tuple[str, str]) -> LeasedBucket:
+        """Get or create the leased bucket for a key (LRU bounded)"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = LeasedBucket()
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def _result(self, allowed: bool, bucket: LeasedBucket, retry_after: float = 0.0) -> RateLimitResult:
+        return RateLimitResult(
+            allowed=allowed,
+            limit=self.limit,
+            remaining=bucket.tokens + bucket.remote_remaining,
+            retry_after=retry_after,
+            reset_after=bucket.reset_after
+        )
+
+    async def acquire(
+        self,
+        identity: str,
+        endpoint: str = "default",
+        cost: Optional[int] = None
+    ) -> RateLimitResult:
+        """
+        Admit or reject a request
+
+        Args:
+            identity: Rate limit identity
+            endpoint: Endpoint identifier
+            cost: Weight of this request (default from RATE_LIMIT_ENDPOINT_COSTS)
+
+        Returns:
+            RateLimitResult for this request
+        """
+        if cost is None:
+            cost = CacheService.get_endpoint_cost(endpoint)
+
+        if not settings.RATE_LIMIT_ENABLED:
+            return RateLimitResult(True, self.limit, self.limit, 0, 0)
+
+        now = time.monotonic()
+        if now < self._redis_down_until:
+            return self._acquire_local(identity, endpoint, cost)
+
+        key = (identity, endpoint)
+        bucket = self._get_bucket(key)
+
+        # Fast path: spend leased tokens without touching Redis
+        if bucket.expires_at > now and bucket.tokens >= cost:
+            bucket.tokens -= cost
+            if bucket.tokens <= self.low_water and bucket.renewal is None:
+                bucket.renewal = asyncio.create_task(self._renew(key, bucket, self.lease_size))
+            return self._result(True, bucket)
+
+        # Slow path: wait for an in-flight renewal or lease synchronously.
+        # Each lease either grants tokens or records a denial, so this ends.
+        while True:
+            if bucket.expires_at <= now:
+                bucket.tokens = 0
+            if bucket.tokens >= cost:
+                bucket.tokens -= cost
+                return self._result(True, bucket)
+            if bucket.denied_until > now:
+                return self._result(False, bucket, bucket.denied_until - now)
+
+            if bucket.renewal is None:
+                needed = max(self.lease_size, cost - bucket.tokens)
+                bucket.renewal = asyncio.create_task(self._renew(key, bucket, needed))
+            if not await asyncio.shield(bucket.renewal):
+                return self._acquire_local(identity, endpoint, cost)
+            now = time.monotonic()
+
+    async def _renew(self, key: Tuple[str, str], bucket: LeasedBucket, amount: int) -> bool:
+        """
+        Lease up to `amount` tokens from Redis into the local bucket
+
+        Returns False if Redis could not be reached.
+        """
+        identity, endpoint = key
+        try:
+            cache = await get_cache_service()
+            result = await cache.check_rate_limit(
+                identity=identity,
+                endpoint=endpoint,
+                max_requests=self.limit,
+                window_seconds=self.window_seconds,
+                cost=amount,
+                partial=True
+            )
+        except Exception as e:
+            print(f"Warning: Rate limit lease failed, using local limits: {e}")
+            self._redis_down_until = time.monotonic() + settings.RATE_LIMIT_REDIS_RETRY
+            return False
+        finally:
+            bucket.renewal = None
+
+        now = time.monotonic()
+        if bucket.expires_at <= now:
+            bucket.tokens = 0
+        bucket.tokens += result.granted
+        bucket.remote_remaining = result.remaining
+        bucket.reset_after = result.reset_after
+
+        if result.granted:
+            bucket.expires_at = now + self.lease_ttl
+            bucket.denied_until = 0.0
+        else:
+            bucket.denied_until = now + result.retry_after
+        return True
+
+    def _acquire_local(self, identity: str, endpoint: str, cost: int) -> RateLimitResult:
+        """Local-only limiting while Redis is unreachable"""
+        key = (identity, endpoint)
+        bucket = self._fallback.get(key)
+        if bucket is None:
+            bucket = LocalTokenBucket(
+                capacity=self.limit,
+                refill_rate=self.limit / self.window_seconds
+            )
+            self._fallback[key] = bucket
+            if len(self._fallback) > self.max_keys:
+                self._fallback.popitem(last=False)
+        else:
+            self._fallback.move_to_end(key)
+
+        allowed, remaining, retry_after = bucket.take(cost)
+        return RateLimitResult(
+            allowed=allowed,
+            limit=self.limit,
+            remaining=remaining,
+            retry_after=retry_after,
+            reset_after=(self.limit - remaining) / bucket.refill_rate
+        )
+
+
+# Global limiter instance
+_rate_limiter: Optional[HierarchicalRateLimiter] = None
+
+
+def get_rate_limiter() -> HierarchicalRateLimiter:
+    """Get the rate limiter instance"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = HierarchicalRateLimiter()
+    return _rate_limiter
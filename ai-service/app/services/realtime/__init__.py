@@ -5,7 +5,7 @@ This module provides an abstraction for real-time communication that can be
 swapped between different implementations:
 
 - HTTP (current): Simple turn-based request/response
-- WebSocket (future): Bidirectional streaming
+- WebSocket: Bidirectional streaming
 - WebRTC (future): Low-latency audio/video streaming
 
 Usage:
@@ -22,9 +22,21 @@ from app.services.realtime.base import (
     TransportType,
     TransportMessage,
     TransportSession,
+    MessageType,
+    CancelToken,
     BaseTransport
 )
+from app.services.realtime.audio import AudioCodec, AudioFrame, AudioRingBuffer
+from app.services.realtime.vad import StreamingVAD, VADConfig, VADEvent, VADEventType
+from app.services.realtime.stt import (
+    BaseSTTProvider,
+    StubSTTProvider,
+    IncrementalTranscriber,
+    get_stt_provider,
+    warm_up_stt
+)
 from app.services.realtime.http_transport import HTTPTransport
+from app.services.realtime.websocket_transport import WebSocketTransport
 from app.services.realtime.manager import (
     ConnectionManager,
     get_connection_manager,
@@ -35,8 +47,23 @@ __all__ = [
     "TransportType",
     "TransportMessage", 
     "TransportSession",
+    "MessageType",
+    "CancelToken",
     "BaseTransport",
+    "AudioCodec",
+    "AudioFrame",
+    "AudioRingBuffer",
+    "StreamingVAD",
+    "VADConfig",
+    "VADEvent",
+    "VADEventType",
+    "BaseSTTProvider",
+    "StubSTTProvider",
+    "IncrementalTranscriber",
+    "get_stt_provider",
+    "warm_up_stt",
     "HTTPTransport",
+    "WebSocketTransport",
     "ConnectionManager",
     "get_connection_manager",
     "get_transport"
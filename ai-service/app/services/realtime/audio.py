@@ -0,0 +1,219 @@
+"""
+Audio Framing and Buffering
+
+Binary WebSocket audio frames (instead of base64 inside JSON) and a
+preallocated ring buffer for incoming audio, so chunks are buffered and
+consumed without per-chunk allocations or concatenating copies.
+"""
+
+import struct
+import uuid
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import List, Optional, Union
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+class AudioCodec(IntEnum):
+    """Codec ids used in binary audio frames"""
+    PCM = 1     # 16-bit little-endian mono
+    OPUS = 2
+    MP3 = 3
+    WAV = 4
+    
+    @classmethod
+    def from_format(cls, audio_format: Optional[str]) -> "AudioCodec":
+        """Map a TransportMessage.audio_format ("pcm", "opus", ...) to a codec id"""
+        try:
+            return cls[(audio_format or "pcm").upper()]
+        except KeyError:
+            raise ValueError(f"Unsupported audio format: {audio_format}")
+    
+    @property
+    def format(self) -> str:
+        """The TransportMessage.audio_format name"""
+        return self.name.lower()
+
+
+# Frame layout (network byte order, 28 bytes):
+#   version  u8
+#   codec    u8   AudioCodec
+#   flags    u8   bit 0: final chunk of the utterance
+#   reserved u8
+#   session  16s  session UUID bytes
+#   sequence u32
+#   rate     u32  sample rate in Hz
+# followed by the raw audio payload
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct("!BBBx16sII")
+FLAG_FINAL = 0x01
+
+
+def session_key(session_id: str) -> bytes:
+    """16-byte session identifier for frame headers"""
+    try:
+        return uuid.UUID(session_id).bytes
+    except ValueError:
+        # Custom (non-UUID) session ids
+        return uuid.uuid5(uuid.NAMESPACE_URL, session_id).bytes
+
+
+@dataclass
+class AudioFrame:
+    """A binary audio frame; payload is a view into the received buffer"""
+    session: bytes
+    sequence: int
+    codec: AudioCodec
+    sample_rate: int
+    is_final: bool
+    payload: memoryview
+    
+    def encode(self) -> bytes:
+        """Serialize header and payload (the payload is copied once)"""
+        header = FRAME_HEADER.pack(
+            FRAME_VERSION,
+            self.codec,
+            FLAG_FINAL if self.is_final else 0,
+            self.session,
+            self.sequence,
+            self.sample_rate
+        )
+        return header + self.payload
+    
+    @classmethod
+    def decode(cls, data: BytesLike) -> "AudioFrame":
+        """
+        Parse a binary frame without copying the payload
+        
+        Raises:
+            ValueError for truncated frames, unknown versions or codecs
+        """
+        if len(data) < FRAME_HEADER.size:
+            raise ValueError(f"Audio frame too short ({len(data)} bytes)")
+        
+        version, codec, flags, session, sequence, sample_rate = FRAME_HEADER.unpack_from(data)
+        if version != FRAME_VERSION:
+            raise ValueError(f"Unsupported audio frame version: {version}")
+        
+        return cls(
+            session=session,
+            sequence=sequence,
+            codec=AudioCodec(codec),
+            sample_rate=sample_rate,
+            is_final=bool(flags & FLAG_FINAL),
+            payload=memoryview(data)[FRAME_HEADER.size:]
+        )
+
+
+class AudioRingBuffer:
+    """
+    Fixed-capacity byte ring buffer for pending audio
+    
+    - Storage is allocated once (on first write) and reused
+    - peek() returns memoryviews into the storage (one, or two when the data
+      wraps), so readers consume audio without copying; consume() then
+      releases the bytes. Views are only valid until the next write.
+    - When full, the oldest audio is overwritten (counted in overrun_bytes):
+      for live speech the newest audio matters most
+    """
+    
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._buffer: Optional[bytearray] = None
+        self._start = 0
+        self._size = 0
+        
+        self.overrun_bytes = 0
+        self.total_bytes = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __bool__(self) -> bool:
+        return self._size > 0
+    
+    @property
+    def offset(self) -> int:
+        """Stream position of the oldest buffered byte (moves on consume, clear and overrun)"""
+        return self.total_bytes - self._size
+    
+    def write(self, data: BytesLike) -> int:
+        """
+        Append audio, overwriting the oldest bytes if needed
+        
+        Returns:
+            Number of old bytes overwritten
+        """
+        view = memoryview(data).cast("B")
+        length = len(view)
+        if length == 0:
+            return 0
+        if self._buffer is None:
+            self._buffer = bytearray(self.capacity)
+        self.total_bytes += length
+        
+        if length >= self.capacity:
+            # Only the newest `capacity` bytes survive
+            overwritten = self._size + length - self.capacity
+            self._buffer[:] = view[length - self.capacity:]
+            self._start = 0
+            self._size = self.capacity
+            self.overrun_bytes += overwritten
+            return overwritten
+        
+        overwritten = max(0, self._size + length - self.capacity)
+        if overwritten:
+            self._start = (self._start + overwritten) % self.capacity
+            self._size -= overwritten
+            self.overrun_bytes += overwritten
+        
+        end = (self._start + self._size) % self.capacity
+        first = min(length, self.capacity - end)
+        self._buffer[end:end + first] = view[:first]
+        if first < length:
+            self._buffer[:length - first] = view[first:]
+        self._size += length
+        return overwritten
+    
+    def peek(self, size: Optional[int] = None) -> List[memoryview]:
+        """
+        Views of up to `size` buffered bytes (all by default), oldest first
+        """
+        size = self._size if size is None else min(size, self._size)
+        if size == 0 or self._buffer is None:
+            return []
+        
+        view = memoryview(self._buffer)
+        first = min(size, self.capacity - self._start)
+        views = [view[self._start:self._start + first]]
+        if first < size:
+            views.append(view[:size - first])
+        return views
+    
+    def consume(self, size: int) -> int:
+        """
+        Release up to `size` bytes from the front
+        
+        Returns:
+            Number of bytes released
+        """
+        size = min(size, self._size)
+        self._start = (self._start + size) % self.capacity
+        self._size -= size
+        if self._size == 0:
+            self._start = 0
+        return size
+    
+    def read(self, size: Optional[int] = None) -> bytes:
+        """Copy out and release up to `size` bytes (when a contiguous copy is needed)"""
+        data = b"".join(self.peek(size))
+        self.consume(len(data))
+        return data
+    
+    def clear(self):
+        """Drop all buffered audio (storage is kept)"""
+        self._start = 0
+        self._size = 0
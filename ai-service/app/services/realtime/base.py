@@ -7,11 +7,20 @@ This allows easy swapping between HTTP, WebSocket, and WebRTC.
 
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Optional, Dict, Any, List, Callable, AsyncIterator
+from typing import Optional, Dict, Any, List, Set, Union, Callable, AsyncIterator, Collection
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta
+from collections import deque
+import asyncio
+import time
 import uuid
 
+from app.config import get_settings
+from app.services.realtime.audio import AudioRingBuffer, AudioFrame, AudioCodec, session_key
+from app.services.realtime.vad import StreamingVAD
+
+settings = get_settings()
+
 
 class TransportType(Enum):
     """Available transport types"""
@@ -26,6 +35,8 @@ class MessageType(Enum):
     AUDIO_CHUNK = "audio_chunk"       # Raw audio data
     AUDIO_START = "audio_start"       # Start of audio stream
     AUDIO_END = "audio_end"           # End of audio stream
+    SPEECH_START = "speech_start"     # Server VAD: user started speaking
+    SPEECH_END = "speech_end"         # Server VAD: user stopped speaking (endpoint)
     
     # Text
     TEXT = "text"                     # Plain text message
@@ -39,10 +50,13 @@ class MessageType(Enum):
     AI_RESPONSE_START = "ai_response_start"
     AI_RESPONSE_CHUNK = "ai_response_chunk"
     AI_RESPONSE_END = "ai_response_end"
+    AI_RESPONSE_CANCELLED = "ai_response_cancelled"  # Response aborted (barge-in)
+    TURN_METADATA = "turn_metadata"   # Actions/summary extracted after a response
     
     # Control
     PING = "ping"
     PONG = "pong"
+    INTERRUPT = "interrupt"           # User interrupts the coach
     ERROR = "error"
     SESSION_START = "session_start"
     SESSION_END = "session_end"
@@ -55,7 +69,7 @@ class TransportMessage:
     
     This structure is designed to work with:
     - HTTP: Serialized as JSON request/response
-    - WebSocket: Serialized as JSON frames
+    - WebSocket: Serialized as JSON frames (audio as binary frames)
     - WebRTC: Data channel messages
     """
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -80,12 +94,17 @@ class TransportMessage:
     error_code: Optional[str] = None
     error_message: Optional[str] = None
     
+    @property
+    def is_binary(self) -> bool:
+        """True for audio carried as raw bytes (sent as a binary frame)"""
+        return isinstance(self.content, (bytes, bytearray, memoryview))
+    
     def to_dict(self) -> Dict[str, Any]:
         """Serialize to dictionary for JSON transport"""
         return {
             "id": self.id,
             "type": self.type.value,
-            "content": self.content,
+            "content": None if self.is_binary else self.content,
             "session_id": self.session_id,
             "user_id": self.user_id,
             "coach_id": self.coach_id,
@@ -117,13 +136,36 @@ class TransportMessage:
             error_message=data.get("error_message")
         )
     
+    def to_frame(self) -> bytes:
+        """Serialize an audio message to a binary frame"""
+        return AudioFrame(
+            session=session_key(self.session_id or ""),
+            sequence=self.sequence,
+            codec=AudioCodec.from_format(self.audio_format),
+            sample_rate=self.sample_rate or 0,
+            is_final=self.is_final,
+            payload=memoryview(self.content)
+        ).encode()
+    
+    @classmethod
+    def from_frame(cls, frame: AudioFrame, **kwargs) -> "TransportMessage":
+        """Build an audio message from a binary frame (payload is not copied)"""
+        return cls.audio(
+            frame.payload,
+            format=frame.codec.format,
+            sample_rate=frame.sample_rate or None,
+            sequence=frame.sequence,
+            is_final=frame.is_final,
+            **kwargs
+        )
+    
     @classmethod
     def text(cls, content: str, **kwargs) -> "TransportMessage":
         """Create a text message"""
         return cls(type=MessageType.TEXT, content=content, **kwargs)
     
     @classmethod
-    def audio(cls, content: bytes, format: str = "pcm", **kwargs) -> "TransportMessage":
+    def audio(cls, content: Union[bytes, memoryview], format: str = "pcm", **kwargs) -> "TransportMessage":
         """Create an audio message"""
         return cls(
             type=MessageType.AUDIO_CHUNK,
@@ -143,6 +185,63 @@ class TransportMessage:
         )
 
 
+class CancelToken:
+    """
+    Cooperative cancellation of one turn's in-flight work
+    
+    Work started for a turn (the LLM stream, TTS, post-processing) is
+    attached to the turn's token; cancelling the token cancels all of it.
+    Loops check() at safe points (or iterate through guard()), since a
+    task cancellation can be absorbed by asyncio.wait_for.
+    
+    Usage:
+        token = session.begin_turn()
+        token.attach(asyncio.current_task())
+        ...
+        session.interrupt("barge_in")  # from the receive loop
+    """
+    
+    def __init__(self):
+        self.cancelled = False
+        self.reason: Optional[str] = None
+        self._tasks: Set[asyncio.Task] = set()
+    
+    def attach(self, task: asyncio.Task) -> asyncio.Task:
+        """Cancel a task along with this turn"""
+        if self.cancelled:
+            task.cancel()
+            return task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+    
+    def cancel(self, reason: str = "interrupted") -> bool:
+        """
+        Cancel the turn's work
+        
+        Returns:
+            False if the token was already cancelled
+        """
+        if self.cancelled:
+            return False
+        self.cancelled = True
+        self.reason = reason
+        for task in list(self._tasks):
+            task.cancel()
+        return True
+    
+    def check(self):
+        """Raise asyncio.CancelledError if the turn has been cancelled"""
+        if self.cancelled:
+            raise asyncio.CancelledError(self.reason)
+    
+    async def guard(self, chunks: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        """Pass chunks through, stopping at the first one after cancellation"""
+        async for chunk in chunks:
+            self.check()
+            yield chunk
+
+
 @dataclass
 class TransportSession:
     """
@@ -159,21 +258,55 @@ class TransportSession:
     is_speaking: bool = False  # User currently speaking
     is_processing: bool = False  # AI currently processing
     
-    # Timestamps
+    # Timestamps: creation as shown to clients, activity on the monotonic
+    # clock so idle checks need no parsing (see last_activity)
     created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
-    last_activity: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    last_active: float = field(default_factory=time.monotonic)
+    
+    # Accumulated data (recent messages only; the full transcript is tiered
+    # in Redis by the transcript service)
+    transcript: "deque[Dict[str, str]]" = field(
+        default_factory=lambda: deque(maxlen=settings.TRANSCRIPT_HOT_MESSAGES)
+    )
+    # Incoming audio not yet consumed (ring buffer, allocated on first write)
+    pending_audio: AudioRingBuffer = field(
+        default_factory=lambda: AudioRingBuffer(settings.AUDIO_BUFFER_BYTES)
+    )
+    
+    # Server-side VAD over streamed PCM (created on the first PCM chunk)
+    vad: Optional[StreamingVAD] = None
     
-    # Accumulated data
-    transcript: List[Dict[str, str]] = field(default_factory=list)
-    pending_audio: List[bytes] = field(default_factory=list)
+    # Context loaded when the session was created (local to that worker)
+    prefetch: Optional[asyncio.Task] = None
+    
+    # In-flight turn (local to the worker running it)
+    cancel_token: Optional[CancelToken] = None
     
     # Metrics
     turn_count: int = 0
     total_audio_seconds: float = 0.0
+    unreported_audio_seconds: float = 0.0  # not yet added to the registry
+    interrupted_turns: int = 0
+    tokens_saved: int = 0
     
     def update_activity(self):
         """Update last activity timestamp"""
-        self.last_activity = datetime.utcnow().isoformat()
+        self.last_active = time.monotonic()
+    
+    @property
+    def idle_seconds(self) -> float:
+        """Seconds since the last activity"""
+        return time.monotonic() - self.last_active
+    
+    @property
+    def last_activity(self) -> str:
+        """Last activity as an ISO timestamp (for clients)"""
+        return (datetime.utcnow() - timedelta(seconds=self.idle_seconds)).isoformat()
+    
+    @property
+    def last_activity_epoch(self) -> float:
+        """Last activity as a Unix timestamp (for the registry, shared across workers)"""
+        return time.time() - self.idle_seconds
     
     def add_turn(self, role: str, content: str):
         """Add a conversation turn"""
@@ -184,6 +317,76 @@ class TransportSession:
         })
         self.turn_count += 1
         self.update_activity()
+    
+    def begin_turn(self, reason: str = "new_turn") -> CancelToken:
+        """
+        Start a turn, cancelling the one in flight (if any)
+        
+        Returns:
+            The new turn's cancel token
+        """
+        self.interrupt(reason)
+        self.cancel_token = CancelToken()
+        return self.cancel_token
+    
+    def end_turn(self, token: CancelToken):
+        """Mark a turn as finished"""
+        if self.cancel_token is token:
+            self.cancel_token = None
+    
+    def interrupt(self, reason: str = "user_interrupt") -> bool:
+        """
+        Cancel the in-flight turn's LLM stream, TTS and post-processing
+        
+        Returns:
+            True if a turn was interrupted
+        """
+        token = self.cancel_token
+        if token is None or not token.cancel(reason):
+            return False
+        self.interrupted_turns += 1
+        return True
+    
+    def to_registry(self, transport_type: TransportType) -> Dict[str, Any]:
+        """
+        Serialize the state shared with other workers
+        
+        Transcript, pending audio and processing flags stay local to the
+        worker handling the session.
+        """
+        return {
+            "user_id": self.user_id,
+            "coach_id": self.coach_id,
+            "transport": transport_type.value,
+            "created_at": self.created_at,
+            "last_activity": self.last_activity_epoch,
+            "turn_count": self.turn_count,
+            "total_audio_seconds": self.total_audio_seconds
+        }
+    
+    def apply_registry(self, fields: Dict[str, str]):
+        """Refresh shared state from the session registry"""
+        last_activity = fields.get("last_activity")
+        if last_activity:
+            # Activity on another worker (Unix time); local activity may be more recent
+            idle = time.time() - float(last_activity)
+            self.last_active = max(self.last_active, time.monotonic() - max(0.0, idle))
+        self.turn_count = int(fields.get("turn_count", self.turn_count))
+        self.total_audio_seconds = float(fields.get("total_audio_seconds", self.total_audio_seconds))
+    
+    @classmethod
+    def from_registry(cls, session_id: str, fields: Dict[str, str]) -> "TransportSession":
+        """Rebuild a session registered by another worker"""
+        session = cls(
+            id=session_id,
+            user_id=int(fields["user_id"]),
+            coach_id=int(fields["coach_id"]),
+            created_at=fields["created_at"]
+        )
+        if fields.get("last_activity"):
+            session.last_active = float("-inf")  # Taken from the registry below
+        session.apply_registry(fields)
+        return session
 
 
 class BaseTransport(ABC):
@@ -268,6 +471,18 @@ class BaseTransport(ABC):
         """Check if session is connected"""
         pass
     
+    def sweep(self, live_sessions: Collection[str]) -> int:
+        """
+        Drop state left behind for sessions that no longer exist
+        
+        Args:
+            live_sessions: IDs of the sessions held by the connection manager
+        
+        Returns:
+            Number of entries dropped
+        """
+        return 0
+    
     async def on_message(
         self,
         session_id: str,
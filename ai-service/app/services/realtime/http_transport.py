@@ -10,8 +10,11 @@ Flow:
 3. No persistent connection needed
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Collection, Tuple
 from datetime import datetime
+import time
+
+from app.config import get_settings
 
 from app.services.realtime.base import (
     BaseTransport,
@@ -21,6 +24,8 @@ from app.services.realtime.base import (
     MessageType
 )
 
+settings = get_settings()
+
 
 class HTTPTransport(BaseTransport):
     """
@@ -40,7 +45,8 @@ class HTTPTransport(BaseTransport):
         # In-memory session tracking (for quick lookups)
         # Full state is in Redis
         self._sessions: Dict[str, TransportSession] = {}
-        self._pending_responses: Dict[str, TransportMessage] = {}
+        # Session ID -> (monotonic time queued, message), oldest first
+        self._pending_responses: Dict[str, Tuple[float, TransportMessage]] = {}
     
     async def connect(self, session: TransportSession) -> bool:
         """
@@ -66,9 +72,12 @@ class HTTPTransport(BaseTransport):
         Queue a message for HTTP response
         
         Since HTTP is request/response, we store the message
-        to be returned in the response body.
+        to be returned in the response body. Messages not collected within
+        HTTP_PENDING_RESPONSE_TTL are dropped by sweep().
         """
-        self._pending_responses[session_id] = message
+        # Re-insert so the dict stays ordered by time queued
+        self._pending_responses.pop(session_id, None)
+        self._pending_responses[session_id] = (time.monotonic(), message)
         return True
     
     async def receive(self, session_id: str) -> Optional[TransportMessage]:
@@ -88,7 +97,29 @@ class HTTPTransport(BaseTransport):
     
     def get_pending_response(self, session_id: str) -> Optional[TransportMessage]:
         """Get and clear pending response for session"""
-        return self._pending_responses.pop(session_id, None)
+        pending = self._pending_responses.pop(session_id, None)
+        return pending[1] if pending is not None else None
+    
+    def sweep(self, live_sessions: Collection[str]) -> int:
+        """
+        Drop expired pending responses and sessions the manager no longer holds
+        
+        Pending responses are ordered by age, so only expired ones are visited.
+        """
+        dropped = 0
+        cutoff = time.monotonic() - settings.HTTP_PENDING_RESPONSE_TTL
+        while self._pending_responses:
+            session_id, (queued_at, _) = next(iter(self._pending_responses.items()))
+            if queued_at > cutoff:
+                break
+            del self._pending_responses[session_id]
+            dropped += 1
+        
+        for session_id in self._sessions.keys() - live_sessions:
+            del self._sessions[session_id]
+            self._pending_responses.pop(session_id, None)
+            dropped += 1
+        return dropped
     
     async def process_turn(
         self,
@@ -3,11 +3,19 @@ Connection Manager
 
 Central manager for all transport types and active sessions.
 Provides a unified interface regardless of the underlying transport.
+
+Sessions are registered in Redis so that any worker can serve any
+session; the local dicts are a write-through cache of session objects.
+A background reaper ends idle sessions and drops orphaned transport state,
+so per-worker memory stays bounded.
 """
 
-from typing import Optional, Dict, Set
-from datetime import datetime, timedelta
+from typing import Optional, Dict, Set, List, Tuple
+import asyncio
+import heapq
+import time
 
+from app.config import get_settings
 from app.services.realtime.base import (
     TransportType,
     TransportMessage,
@@ -15,6 +23,10 @@ from app.services.realtime.base import (
     BaseTransport
 )
 from app.services.realtime.http_transport import HTTPTransport, get_http_transport
+from app.services.realtime.websocket_transport import WebSocketTransport, get_websocket_transport
+from app.services.cache_service import get_cache_service, CacheService
+
+settings = get_settings()
 
 
 class ConnectionManager:
@@ -24,7 +36,8 @@ class ConnectionManager:
     Features:
     - Unified session management
     - Transport abstraction
-    - Session cleanup
+    - Distributed session registry (Redis), shared by all workers
+    - Idle session expiry (background reaper)
     - Connection metrics
     """
     
@@ -32,9 +45,22 @@ class ConnectionManager:
         self._transports: Dict[TransportType, BaseTransport] = {}
         self._sessions: Dict[str, TransportSession] = {}
         self._session_transport: Dict[str, TransportType] = {}
+        # Sessions known to be in the registry (vs created while Redis was down)
+        self._registered: Set[str] = set()
+        
+        # Idle expiry: min-heap of (deadline, session_id). Activity does not
+        # touch the heap; an entry that comes due for a session active since
+        # is pushed again at its new deadline. _deadlines holds each local
+        # session's current entry, so entries of forgotten sessions are skipped.
+        self._expiry: List[Tuple[float, str]] = []
+        self._deadlines: Dict[str, float] = {}
+        self._reaper: Optional[asyncio.Task] = None
+        self.reaped_sessions = 0
+        self.swept_entries = 0
         
         # Initialize available transports
         self._transports[TransportType.HTTP] = get_http_transport()
+        self._transports[TransportType.WEBSOCKET] = get_websocket_transport()
     
     def get_transport(self, transport_type: TransportType) -> BaseTransport:
         """Get a transport implementation by type"""
@@ -42,6 +68,36 @@ class ConnectionManager:
             raise ValueError(f"Transport type {transport_type} not available")
         return self._transports[transport_type]
     
+    async def _registry(self) -> Optional[CacheService]:
+        """Get the cache service backing the session registry (None if unavailable)"""
+        try:
+            return await get_cache_service()
+        except Exception as e:
+            print(f"Warning: Session registry unavailable: {e}")
+            return None
+    
+    def _schedule_expiry(self, session: TransportSession):
+        """Push a session's idle deadline onto the expiry heap"""
+        deadline = session.last_active + settings.SESSION_IDLE_TIMEOUT
+        self._deadlines[session.id] = deadline
+        heapq.heappush(self._expiry, (deadline, session.id))
+    
+    def _track(self, session: TransportSession, transport_type: TransportType):
+        """Hold a session on this worker"""
+        self._sessions[session.id] = session
+        self._session_transport[session.id] = transport_type
+        if session.id not in self._deadlines:
+            self._schedule_expiry(session)
+    
+    async def _forget(self, session_id: str):
+        """Drop a session from this worker only"""
+        session = self._sessions.pop(session_id, None)
+        transport_type = self._session_transport.pop(session_id, TransportType.HTTP)
+        self._registered.discard(session_id)
+        self._deadlines.pop(session_id, None)
+        if session is not None:
+            await self.get_transport(transport_type).disconnect(session_id)
+    
     async def create_session(
         self,
         user_id: int,
@@ -57,7 +113,7 @@ class ConnectionManager:
             coach_id: Coach ID
             transport_type: Type of transport to use
             session_id: Optional custom session ID
-            
+        
         Returns:
             New TransportSession
         """
@@ -69,36 +125,128 @@ class ConnectionManager:
             session.id = session_id
         
         # Register session
-        self._sessions[session.id] = session
-        self._session_transport[session.id] = transport_type
+        self._track(session, transport_type)
         
         # Connect via transport
         transport = self.get_transport(transport_type)
         await transport.connect(session)
         
+        # Share with other workers
+        cache = await self._registry()
+        if cache:
+            try:
+                await cache.register_realtime_session(
+                    session.id, session.user_id, session.to_registry(transport_type)
+                )
+                self._registered.add(session.id)
+            except Exception as e:
+                print(f"Warning: Could not register session {session.id}: {e}")
+        
         return session
     
     async def get_session(self, session_id: str) -> Optional[TransportSession]:
-        """Get session by ID"""
-        return self._sessions.get(session_id)
+        """
+        Get session by ID
+        
+        Reads the shared state from the registry, so sessions created or
+        updated on another worker are served here too. Falls back to the
+        local copy when Redis is unavailable.
+        """
+        session = self._sessions.get(session_id)
+        
+        cache = await self._registry()
+        if cache is None:
+            return session
+        try:
+            fields = await cache.get_realtime_session(session_id)
+        except Exception as e:
+            print(f"Warning: Could not read session {session_id} from registry: {e}")
+            return session
+        
+        if fields is None:
+            if session is not None and session_id in self._registered:
+                # Ended on another worker, or expired
+                await self._forget(session_id)
+                return None
+            return session
+        
+        if session is None:
+            transport_type = TransportType(fields.get("transport", TransportType.HTTP.value))
+            if transport_type not in self._transports:
+                # Connection lives on another worker; serve it over HTTP here
+                transport_type = TransportType.HTTP
+            session = TransportSession.from_registry(session_id, fields)
+            self._track(session, transport_type)
+            self._registered.add(session_id)
+            await self.get_transport(transport_type).connect(session)
+        else:
+            session.apply_registry(fields)
+        
+        return session
+    
+    async def connect_websocket(self, session: TransportSession, websocket) -> bool:
+        """
+        Attach a client WebSocket to a session
+        
+        Sessions of any transport type can be upgraded; from then on
+        messages for the session are sent over the WebSocket.
+        """
+        transport_type = self._session_transport.get(session.id, TransportType.HTTP)
+        if transport_type != TransportType.WEBSOCKET:
+            await self.get_transport(transport_type).disconnect(session.id)
+        
+        self._track(session, TransportType.WEBSOCKET)
+        return await self.get_transport(TransportType.WEBSOCKET).connect(session, websocket)
+    
+    async def record_activity(
+        self,
+        session: TransportSession,
+        turns: int = 0,
+        audio_seconds: float = 0.0
+    ):
+        """
+        Publish new turns and activity of a session to the registry
+        
+        The shared turn count is updated atomically, so concurrent turns on
+        different workers are all counted; session.turn_count is set to it.
+        
+        Args:
+            session: The session
+            turns: Turns added since the last call
+            audio_seconds: Audio seconds added since the last call
+        """
+        cache = await self._registry()
+        if cache is None:
+            return
+        try:
+            count = await cache.record_realtime_activity(
+                session.id, session.last_activity_epoch, turns, audio_seconds
+            )
+        except Exception as e:
+            print(f"Warning: Could not record activity for session {session.id}: {e}")
+            return
+        
+        if count is not None:
+            session.turn_count = count
     
     async def end_session(self, session_id: str):
-        """End and clean up a session"""
-        if session_id not in self._sessions:
+        """End and clean up a session (on every worker)"""
+        session = await self.get_session(session_id)
+        if session is None:
             return
         
-        session = self._sessions[session_id]
         session.is_active = False
         
-        # Disconnect from transport
-        transport_type = self._session_transport.get(session_id, TransportType.HTTP)
-        transport = self.get_transport(transport_type)
-        await transport.disconnect(session_id)
+        # Disconnect from transport and clean up locally
+        await self._forget(session_id)
         
-        # Clean up
-        del self._sessions[session_id]
-        if session_id in self._session_transport:
-            del self._session_transport[session_id]
+        # Remove from the registry so other workers stop serving it
+        cache = await self._registry()
+        if cache:
+            try:
+                await cache.remove_realtime_session(session_id, session.user_id)
+            except Exception as e:
+                print(f"Warning: Could not unregister session {session_id}: {e}")
     
     async def send_message(
         self,
@@ -119,13 +267,122 @@ class ConnectionManager:
         }
     
     def get_user_sessions(self, user_id: int) -> Dict[str, TransportSession]:
-        """Get all sessions for a user"""
+        """Get all sessions for a user held by this worker"""
         return {
             sid: session 
             for sid, session in self._sessions.items() 
             if session.user_id == user_id
         }
     
+    async def get_user_session_ids(self, user_id: int) -> List[str]:
+        """Get IDs of all of a user's sessions across workers"""
+        cache = await self._registry()
+        if cache:
+            try:
+                return await cache.get_user_realtime_sessions(user_id)
+            except Exception as e:
+                print(f"Warning: Could not list sessions for user {user_id}: {e}")
+        return list(self.get_user_sessions(user_id))
+    
+    async def _end_if_idle(self, session_id: str, max_idle_seconds: float) -> bool:
+        """
+        End a session that looks idle here, unless it is busy or was active
+        on another worker (re-checked against the registry)
+        
+        Returns:
+            True if the session was ended
+        """
+        session = await self.get_session(session_id)
+        if session is None:
+            return False
+        if session.idle_seconds < max_idle_seconds or session.is_processing:
+            return False
+        await self.end_session(session_id)
+        return True
+    
+    async def reap_expired_sessions(self) -> int:
+        """
+        End sessions idle for SESSION_IDLE_TIMEOUT
+        
+        Only heap entries that have come due are visited (O(expired log n));
+        sessions active since their entry was pushed are rescheduled.
+        
+        Returns number of sessions ended
+        """
+        now = time.monotonic()
+        due = []
+        while self._expiry and self._expiry[0][0] <= now:
+            deadline, session_id = heapq.heappop(self._expiry)
+            if self._deadlines.get(session_id) != deadline:
+                continue  # Forgotten, or superseded by a later entry
+            session = self._sessions[session_id]
+            if session.last_active + settings.SESSION_IDLE_TIMEOUT > now:
+                self._schedule_expiry(session)
+            else:
+                del self._deadlines[session_id]
+                due.append(session_id)
+        
+        reaped = 0
+        for session_id in due:
+            try:
+                if await self._end_if_idle(session_id, settings.SESSION_IDLE_TIMEOUT):
+                    reaped += 1
+                    continue
+            except Exception as e:
+                print(f"Warning: Could not expire session {session_id}: {e}")
+            session = self._sessions.get(session_id)
+            if session is not None and session_id not in self._deadlines:
+                self._schedule_expiry(session)
+        
+        self.reaped_sessions += reaped
+        return reaped
+    
+    def sweep_orphans(self) -> int:
+        """
+        Drop per-session state whose session is no longer held here
+        
+        Returns number of entries dropped
+        """
+        live = self._sessions.keys()
+        swept = 0
+        for session_id in self._session_transport.keys() - live:
+            del self._session_transport[session_id]
+            swept += 1
+        orphaned = self._registered - live
+        self._registered -= orphaned
+        swept += len(orphaned)
+        
+        for transport in self._transports.values():
+            swept += transport.sweep(live)
+        
+        self.swept_entries += swept
+        return swept
+    
+    async def _run_reaper(self):
+        while True:
+            await asyncio.sleep(settings.SESSION_REAPER_INTERVAL)
+            try:
+                await self.reap_expired_sessions()
+                self.sweep_orphans()
+            except Exception as e:
+                print(f"Warning: Session reaper failed: {e}")
+    
+    def start_reaper(self):
+        """Start the background reaper"""
+        if self._reaper is None:
+            self._reaper = asyncio.create_task(self._run_reaper())
+    
+    async def stop_reaper(self):
+        """Stop the background reaper"""
+        if self._reaper is None:
+            return
+        self._reaper.cancel()
+        try:
+            await self._reaper
+        except asyncio.CancelledError:
+            pass
+        self._reaper = None
+    
     async def cleanup_stale_sessions(
         self,
         max_idle_minutes: int = 60
@@ -133,20 +390,26 @@ class ConnectionManager:
         """
         Clean up sessions that have been idle too long
         
+        For thresholds other than SESSION_IDLE_TIMEOUT (which the reaper
+        enforces); compares monotonic activity times, so no timestamps are
+        parsed. Activity on other workers counts: sessions that look idle
+        here are re-checked against the registry before being ended.
+        
         Returns number of sessions cleaned up
         """
-        cutoff = datetime.utcnow() - timedelta(minutes=max_idle_minutes)
-        stale_sessions = []
-        
-        for session_id, session in self._sessions.items():
-            last_activity = datetime.fromisoformat(session.last_activity)
-            if last_activity < cutoff:
-                stale_sessions.append(session_id)
+        max_idle_seconds = max_idle_minutes * 60
+        stale_sessions = [
+            session_id for session_id, session in self._sessions.items()
+            if session.idle_seconds >= max_idle_seconds
+        ]
         
+        cleaned = 0
         for session_id in stale_sessions:
-            await self.end_session(session_id)
+            if await self._end_if_idle(session_id, max_idle_seconds):
+                cleaned += 1
         
-        return len(stale_sessions)
+        self.sweep_orphans()
+        return cleaned
     
     def get_stats(self) -> Dict:
         """Get connection statistics"""
@@ -157,10 +420,16 @@ class ConnectionManager:
             transport_counts[transport_type.value] = \
                 transport_counts.get(transport_type.value, 0) + 1
         
+        websocket = self._transports.get(TransportType.WEBSOCKET)
+        
         return {
             "total_sessions": len(self._sessions),
             "active_sessions": active_count,
-            "by_transport": transport_counts
+            "by_transport": transport_counts,
+            "scheduled_expiries": len(self._expiry),
+            "reaped_sessions": self.reaped_sessions,
+            "swept_entries": self.swept_entries,
+            "websocket": websocket.get_stats() if websocket else None
         }
 
 
@@ -0,0 +1,320 @@
+"""
+Streaming Speech-to-Text
+
+Transcribes an utterance while it is being spoken: overlapping windows of
+the session's pending PCM audio are transcribed as they fill up and
+reported as partial transcripts, so when the VAD detects the endpoint only
+the last window is left to transcribe.
+
+Providers are pluggable (STT_PROVIDER): "openai" (Whisper) or "stub", a
+local deterministic stand-in for tests and offline development.
+"""
+
+import asyncio
+import io
+import re
+import time
+import wave
+import zlib
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Optional
+
+from app.config import get_settings
+from app.services.realtime.audio import AudioRingBuffer
+
+settings = get_settings()
+
+SAMPLE_WIDTH = 2  # 16-bit PCM
+
+# Longest word overlap searched when joining consecutive windows
+MAX_OVERLAP_WORDS = 12
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """Wrap 16-bit mono PCM in a WAV container (header only, no re-encoding)"""
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(SAMPLE_WIDTH)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return output.getvalue()
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def merge_transcripts(committed: str, new: str) -> str:
+    """
+    Append a window's transcript to the text before it
+    
+    Consecutive windows overlap, so the start of `new` usually repeats the
+    end of `committed`; the longest repeated run of words is dropped.
+    """
+    if not committed:
+        return new.strip()
+    if not new:
+        return committed
+    
+    old_words = committed.split()
+    new_words = new.split()
+    old_norm = [_normalize(w) for w in old_words[-MAX_OVERLAP_WORDS:]]
+    new_norm = [_normalize(w) for w in new_words[:MAX_OVERLAP_WORDS]]
+    
+    for size in range(min(len(old_norm), len(new_norm)), 0, -1):
+        if old_norm[-size:] == new_norm[:size]:
+            new_words = new_words[size:]
+            break
+    return " ".join(old_words + new_words)
+
+
+class BaseSTTProvider(ABC):
+    """Abstract base class for speech-to-text providers"""
+    
+    @abstractmethod
+    async def transcribe(
+        self,
+        pcm: bytes,
+        sample_rate: int,
+        prompt: Optional[str] = None
+    ) -> str:
+        """
+        Transcribe 16-bit mono PCM
+        
+        Args:
+            pcm: Audio samples
+            sample_rate: Sample rate in Hz
+            prompt: Preceding text, to keep windows consistent
+        
+        Returns:
+            The transcript (empty if nothing was said)
+        """
+        pass
+    
+    async def warm_up(self):
+        """Open a connection to the provider ahead of the first request"""
+        pass
+
+
+class OpenAISTTProvider(BaseSTTProvider):
+    """OpenAI Whisper provider"""
+    
+    def __init__(self):
+        from openai import AsyncOpenAI
+        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.model = settings.STT_MODEL
+    
+    async def warm_up(self):
+        await self.client.models.retrieve(self.model)
+    
+    async def transcribe(
+        self,
+        pcm: bytes,
+        sample_rate: int,
+        prompt: Optional[str] = None
+    ) -> str:
+        kwargs = {
+            "model": self.model,
+            "file": ("audio.wav", pcm_to_wav(pcm, sample_rate)),
+            "temperature": 0.0
+        }
+        if settings.STT_LANGUAGE:
+            kwargs["language"] = settings.STT_LANGUAGE
+        if prompt:
+            kwargs["prompt"] = prompt
+        
+        transcript = await self.client.audio.transcriptions.create(**kwargs)
+        return transcript.text.strip()
+
+
+class StubSTTProvider(BaseSTTProvider):
+    """
+    Local, deterministic STT for tests
+    
+    Emits one word per STT_STUB_WORD_MS of audio, chosen from the audio
+    bytes, so the same audio always gives the same words and overlapping
+    windows aligned to word boundaries agree on their shared words.
+    """
+    
+    VOCABULARY = [
+        "grow", "revenue", "team", "hire", "sales", "plan", "goal", "customers",
+        "marketing", "cash", "focus", "pricing", "product", "strategy", "time", "profit"
+    ]
+    
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+    
+    async def transcribe(
+        self,
+        pcm: bytes,
+        sample_rate: int,
+        prompt: Optional[str] = None
+    ) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        
+        word_bytes = max(SAMPLE_WIDTH, sample_rate * SAMPLE_WIDTH * settings.STT_STUB_WORD_MS // 1000)
+        words = [
+            self.VOCABULARY[zlib.crc32(pcm[offset:offset + word_bytes]) % len(self.VOCABULARY)]
+            for offset in range(0, len(pcm) - word_bytes + 1, word_bytes)
+        ]
+        return " ".join(words)
+
+
+class IncrementalTranscriber:
+    """
+    Transcribes one utterance while it is being spoken
+    
+    - feed() is called as audio is buffered; every STT_PARTIAL_INTERVAL_MS
+      of new audio the current window (the pending audio) is transcribed,
+      one request at a time, and on_partial receives the text so far
+    - Once the window reaches STT_WINDOW_MS its text is committed and its
+      audio released, except the last STT_WINDOW_OVERLAP_MS which starts
+      the next window (the repeated words are merged away), so requests
+      stay short however long the user talks
+    - finalize() at the endpoint transcribes what is left of the window,
+      read out of the buffer when the utterance ends (before the next one
+      starts arriving)
+    
+    Usage:
+        transcriber = IncrementalTranscriber(get_stt_provider(), 16000, on_partial)
+        transcriber.feed(session.pending_audio)   # per chunk
+        transcriber.cancel()                      # at the endpoint
+        text = await transcriber.finalize(session.pending_audio.read())
+    """
+    
+    def __init__(
+        self,
+        provider: BaseSTTProvider,
+        sample_rate: int,
+        on_partial: Optional[Callable[[str], Awaitable[None]]] = None
+    ):
+        self.provider = provider
+        self.sample_rate = sample_rate
+        self.on_partial = on_partial
+        
+        bytes_per_ms = sample_rate * SAMPLE_WIDTH / 1000
+        self.interval_bytes = int(settings.STT_PARTIAL_INTERVAL_MS * bytes_per_ms)
+        self.window_bytes = int(settings.STT_WINDOW_MS * bytes_per_ms)
+        self.overlap_bytes = int(settings.STT_WINDOW_OVERLAP_MS * bytes_per_ms)
+        self.overlap_bytes -= self.overlap_bytes % SAMPLE_WIDTH
+        
+        self.committed_text = ""
+        self.partial_text = ""
+        self._transcribed_bytes = 0  # Window size at the last partial
+        self._task: Optional[asyncio.Task] = None
+        
+        # Metrics
+        self.requests = 0
+    
+    def _prompt(self) -> Optional[str]:
+        # Whisper uses the prompt's last ~200 tokens
+        return self.committed_text[-800:] or None
+    
+    def feed(self, buffer: AudioRingBuffer):
+        """Start a partial transcription if enough new audio has arrived"""
+        if self._task is not None and not self._task.done():
+            return
+        size = len(buffer)
+        if size - self._transcribed_bytes < self.interval_bytes:
+            return
+        
+        self._transcribed_bytes = size
+        window = b"".join(buffer.peek(self.window_bytes))
+        commit = len(window) >= self.window_bytes
+        self._task = asyncio.create_task(
+            self._transcribe_window(buffer, window, buffer.offset, commit)
+        )
+    
+    async def _transcribe_window(self, buffer: AudioRingBuffer, window: bytes, offset: int, commit: bool):
+        try:
+            self.requests += 1
+            text = await self.provider.transcribe(window, self.sample_rate, self._prompt())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Warning: Partial transcription failed: {e}")
+            return
+        
+        if commit and buffer.offset != offset:
+            # The window's audio was trimmed or overwritten meanwhile: releasing
+            # it now would drop audio that was never transcribed
+            commit = False
+        
+        if commit:
+            self.committed_text = merge_transcripts(self.committed_text, text)
+            released = buffer.consume(len(window) - self.overlap_bytes)
+            self._transcribed_bytes = max(0, self._transcribed_bytes - released)
+            partial = self.committed_text
+        else:
+            partial = merge_transcripts(self.committed_text, text)
+        
+        if partial and partial != self.partial_text:
+            self.partial_text = partial
+            if self.on_partial is not None:
+                await self.on_partial(partial)
+    
+    def cancel(self):
+        """Stop the partial transcription in flight"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+    
+    async def finalize(self, window: bytes) -> str:
+        """
+        Transcribe the rest of the utterance
+        
+        Args:
+            window: The utterance's uncommitted audio, read from the buffer
+                after cancel() (a cancelled partial's window is still in it)
+        
+        Returns:
+            The full transcript
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        
+        if window:
+            self.requests += 1
+            text = await self.provider.transcribe(window, self.sample_rate, self._prompt())
+            self.committed_text = merge_transcripts(self.committed_text, text)
+        return self.committed_text
+
+
+# Singleton provider
+_stt_provider: Optional[BaseSTTProvider] = None
+_last_warm_up = float("-inf")
+
+
+def get_stt_provider() -> BaseSTTProvider:
+    """Get the configured STT provider"""
+    global _stt_provider
+    if _stt_provider is None:
+        providers = {
+            "openai": OpenAISTTProvider,
+            "stub": StubSTTProvider,
+        }
+        if settings.STT_PROVIDER not in providers:
+            raise ValueError(f"Unknown STT provider: {settings.STT_PROVIDER}. Available: {list(providers.keys())}")
+        _stt_provider = providers[settings.STT_PROVIDER]()
+    return _stt_provider
+
+
+async def warm_up_stt():
+    """
+    Open an STT provider connection before an utterance needs it
+    
+    Skipped if one was opened within PROVIDER_WARMUP_INTERVAL seconds.
+    """
+    global _last_warm_up
+    now = time.monotonic()
+    if now - _last_warm_up < settings.PROVIDER_WARMUP_INTERVAL:
+        return
+    _last_warm_up = now
+    try:
+        await get_stt_provider().warm_up()
+    except Exception as e:
+        print(f"Warning: Could not warm up STT connection: {e}")
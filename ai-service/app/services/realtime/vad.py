@@ -0,0 +1,216 @@
+"""
+Streaming Voice Activity Detection
+
+Server-side endpointing for realtime PCM audio: each incoming chunk is split
+into short frames, and per-frame energy and zero-crossing rate (computed
+with NumPy over the whole chunk at once) decide whether the user is
+speaking. A turn can then start as soon as the user stops, instead of
+waiting for the browser to detect the end and upload the utterance.
+
+Only raw 16-bit mono PCM can be analysed without decoding; otherwise (or
+with VAD_ENABLED off) utterances end when the client sends AUDIO_END.
+"""
+
+from dataclasses import dataclass
+from enum import Enum
+from typing import List, Optional, Union
+
+import numpy as np
+
+from app.config import get_settings
+
+settings = get_settings()
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+SAMPLE_WIDTH = 2  # bytes per 16-bit sample
+
+
+class VADEventType(Enum):
+    """What the detector observed"""
+    SPEECH_START = "speech_start"   # An utterance began
+    ENDPOINT = "endpoint"           # The utterance ended (hangover elapsed)
+    DISCARDED = "discarded"         # Ended, but too short to be speech
+
+
+@dataclass
+class VADEvent:
+    """A detector transition"""
+    type: VADEventType
+    speech_ms: int = 0      # Length of the utterance (without the hangover)
+    offset_bytes: int = 0   # For SPEECH_START: bytes from the onset to the end of the audio fed so far
+
+
+@dataclass
+class VADConfig:
+    """Detector thresholds (defaults from settings)"""
+    frame_ms: int = settings.VAD_FRAME_MS
+    min_dbfs: float = settings.VAD_MIN_DBFS
+    max_threshold_dbfs: float = settings.VAD_MAX_THRESHOLD_DBFS
+    noise_margin_db: float = settings.VAD_NOISE_MARGIN_DB
+    zcr_max: float = settings.VAD_ZCR_MAX
+    start_ms: int = settings.VAD_START_MS
+    hangover_ms: int = settings.VAD_HANGOVER_MS
+    min_utterance_ms: int = settings.VAD_MIN_UTTERANCE_MS
+
+
+def frame_features(samples: np.ndarray, frame_size: int) -> "tuple[np.ndarray, np.ndarray]":
+    """
+    Energy (dBFS) and zero-crossing rate of each complete frame
+    
+    Args:
+        samples: 16-bit PCM samples (a whole number of frames)
+        frame_size: Samples per frame
+    
+    Returns:
+        (energy_dbfs, zcr) arrays with one value per frame
+    """
+    frames = samples.reshape(-1, frame_size)
+    as_float = frames.astype(np.float32)
+    rms = np.sqrt(np.mean(as_float * as_float, axis=1))
+    energy = 20 * np.log10(np.maximum(rms, 1e-9) / 32768.0)
+    
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_size - 1)
+    return energy, zcr
+
+
+class StreamingVAD:
+    """
+    Frame energy / zero-crossing VAD with hangover, fed chunk by chunk
+    
+    - A frame is voiced when its energy is noise_margin_db above the tracked
+      noise floor (clamped to [min_dbfs, max_threshold_dbfs]) and its
+      zero-crossing rate is below zcr_max (broadband hiss crosses zero far
+      more often than voiced speech)
+    - start_ms of consecutive voiced frames open an utterance (SPEECH_START);
+      hangover_ms of unvoiced frames close it (ENDPOINT), or DISCARDED when
+      it had less than min_utterance_ms of speech
+    - The noise floor follows unvoiced frames outside utterances
+    - Partial frames are carried over to the next chunk
+    
+    Usage:
+        vad = StreamingVAD(sample_rate=16000)
+        for event in vad.process(chunk):
+            if event.type == VADEventType.ENDPOINT:
+                ...
+    """
+    
+    NOISE_FLOOR_ALPHA = 0.05
+    
+    def __init__(self, sample_rate: int, config: Optional[VADConfig] = None):
+        self.config = config or VADConfig()
+        self.sample_rate = sample_rate
+        self.frame_size = max(2, sample_rate * self.config.frame_ms // 1000)
+        self.frame_bytes = self.frame_size * SAMPLE_WIDTH
+        
+        self._remainder = bytearray()
+        self.noise_floor = self.config.min_dbfs - self.config.noise_margin_db
+        self.in_speech = False
+        self._voiced_run = 0      # Consecutive voiced frames before an utterance
+        self._silent_run = 0      # Consecutive unvoiced frames inside one
+        self._utterance_frames = 0
+    
+    def reset(self):
+        """Forget the current utterance (the noise floor is kept)"""
+        self._remainder.clear()
+        self.in_speech = False
+        self._voiced_run = 0
+        self._silent_run = 0
+        self._utterance_frames = 0
+    
+    @property
+    def threshold(self) -> float:
+        """Current speech threshold in dBFS"""
+        return min(
+            max(self.noise_floor + self.config.noise_margin_db, self.config.min_dbfs),
+            self.config.max_threshold_dbfs
+        )
+    
+    def _frames_to_ms(self, frames: int) -> int:
+        return frames * self.config.frame_ms
+    
+    def process(self, chunk: BytesLike) -> List[VADEvent]:
+        """
+        Feed a chunk of 16-bit little-endian mono PCM
+        
+        Returns:
+            Events triggered by the chunk, in order
+        """
+        data = memoryview(chunk).cast("B")
+        
+        if self._remainder:
+            # Complete the carried-over partial frame (small copy)
+            self._remainder += data
+            buffer = memoryview(self._remainder)
+        else:
+            buffer = data
+        
+        usable = len(buffer) - len(buffer) % self.frame_bytes
+        if usable == 0:
+            if buffer is data:
+                self._remainder += data
+            return []
+        
+        samples = np.frombuffer(buffer[:usable], dtype="<i2")
+        energy, zcr = frame_features(samples, self.frame_size)
+        # A new bytearray: the old one may still be exported to `samples`
+        self._remainder = bytearray(buffer[usable:])
+        
+        return self._update(energy, zcr)
+    
+    def _update(self, energy: np.ndarray, zcr: np.ndarray) -> List[VADEvent]:
+        """Run the hangover state machine over a chunk's frames"""
+        config = self.config
+        start_frames = max(1, config.start_ms // config.frame_ms)
+        hangover_frames = max(1, config.hangover_ms // config.frame_ms)
+        
+        events = []
+        for index in range(len(energy)):
+            voiced = energy[index] > self.threshold and zcr[index] <= config.zcr_max
+            
+            if not self.in_speech:
+                if voiced:
+                    self._voiced_run += 1
+                    if self._voiced_run >= start_frames:
+                        self.in_speech = True
+                        self._utterance_frames = self._voiced_run
+                        self._silent_run = 0
+                        # Onset = first frame of the voiced run
+                        remaining_frames = len(energy) - index - 1
+                        offset = (
+                            (self._voiced_run + remaining_frames) * self.frame_bytes
+                            + len(self._remainder)
+                        )
+                        events.append(VADEvent(
+                            type=VADEventType.SPEECH_START,
+                            speech_ms=self._frames_to_ms(self._voiced_run),
+                            offset_bytes=offset
+                        ))
+                else:
+                    self._voiced_run = 0
+                    self.noise_floor += self.NOISE_FLOOR_ALPHA * (float(energy[index]) - self.noise_floor)
+                continue
+            
+            self._utterance_frames += 1
+            if voiced:
+                self._silent_run = 0
+                continue
+            
+            self._silent_run += 1
+            if self._silent_run >= hangover_frames:
+                speech_ms = self._frames_to_ms(self._utterance_frames - self._silent_run)
+                events.append(VADEvent(
+                    type=(
+                        VADEventType.ENDPOINT
+                        if speech_ms >= config.min_utterance_ms
+                        else VADEventType.DISCARDED
+                    ),
+                    speech_ms=speech_ms
+                ))
+                self.in_speech = False
+                self._voiced_run = 0
+                self._silent_run = 0
+                self._utterance_frames = 0
+        
+        return events
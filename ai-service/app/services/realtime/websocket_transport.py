@@ -1,17 +1,30 @@
 """
-WebSocket Transport Implementation (Placeholder for Future)
+WebSocket Transport Implementation
 
-This will handle bidirectional streaming when implemented:
-- Real-time audio streaming
-- Streaming LLM responses
-- Low-latency conversation flow
+Bidirectional streaming over a persistent connection:
+- Streaming LLM responses chunk by chunk as tokens arrive
+- Ping/pong heartbeats to detect dead connections
+- Bounded per-connection send queues, so a slow client gets backpressure
+  (or dropped frames) instead of growing server memory
+- Audio in both directions as binary frames (see realtime/audio.py)
 
-Not implemented in Week 1 - this is the structure for later.
+Flow:
+1. Client creates a session (POST /realtime/sessions)
+2. Client connects to /realtime/ws/sessions/{session_id}
+3. Client sends text messages; the AI response is streamed back as
+   AI_RESPONSE_START, AI_RESPONSE_CHUNK..., AI_RESPONSE_END
 """
 
-from typing import Optional, Dict, Callable, Set
+import json
+import time
+import asyncio
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Set, AsyncIterator, Collection
+
 from fastapi import WebSocket
+from starlette.websockets import WebSocketState
 
+from app.config import get_settings
 from app.services.realtime.base import (
     BaseTransport,
     TransportType,
@@ -19,132 +32,400 @@ from app.services.realtime.base import (
     TransportSession,
     MessageType
 )
+from app.services.realtime.audio import AudioFrame, session_key
+
+settings = get_settings()
+
+# Frames that may be dropped when the client's queue is full; everything
+# else waits (up to WS_SEND_TIMEOUT) for room
+DROPPABLE_TYPES = {
+    MessageType.TRANSCRIPT_PARTIAL,
+    MessageType.PING,
+    MessageType.PONG,
+}
+
+# Frames of an in-flight response, discarded when it is interrupted
+RESPONSE_TYPES = {
+    MessageType.AI_RESPONSE_START,
+    MessageType.AI_RESPONSE_CHUNK,
+    MessageType.AI_RESPONSE_END,
+}
+
+# Close codes
+CLOSE_NORMAL = 1000
+CLOSE_SLOW_CLIENT = 1013      # "try again later": client could not keep up
+CLOSE_HEARTBEAT_TIMEOUT = 4408
+
+
+@dataclass
+class WebSocketConnection:
+    """Per-connection state"""
+    websocket: WebSocket
+    queue: asyncio.Queue
+    last_seen: float = field(default_factory=time.monotonic)
+    sender: Optional[asyncio.Task] = None
+    heartbeat: Optional[asyncio.Task] = None
+    closed: bool = False
+    
+    # Metrics
+    sent: int = 0
+    dropped: int = 0
 
 
 class WebSocketTransport(BaseTransport):
     """
     WebSocket-based transport for real-time streaming
     
-    Future implementation will support:
-    - Bidirectional audio streaming
-    - Streaming LLM responses chunk by chunk
-    - Voice activity detection signals
-    - Interrupt handling
-    
-    NOT IMPLEMENTED YET - Placeholder structure
+    - Each connection has a bounded send queue drained by its own sender
+      task, so producers (e.g. the LLM stream) never write to the socket
+      directly
+    - Essential frames wait for queue space, which slows the producer down
+      to the client's pace; a client that stays full for WS_SEND_TIMEOUT
+      is disconnected
+    - Droppable frames (partial transcripts, heartbeats) are discarded when
+      the queue is full
+    - The server pings every WS_HEARTBEAT_INTERVAL seconds and closes
+      connections silent for WS_HEARTBEAT_TIMEOUT
     """
     
     transport_type = TransportType.WEBSOCKET
     
     def __init__(self):
-        self._connections: Dict[str, WebSocket] = {}
+        self._connections: Dict[str, WebSocketConnection] = {}
         self._sessions: Dict[str, TransportSession] = {}
-        self._handlers: Dict[str, Callable] = {}
     
     async def connect(self, session: TransportSession, websocket: WebSocket = None) -> bool:
         """
-        Accept WebSocket connection
+        Register a session, and accept its WebSocket if given
         
-        TODO: Implement in future sprint
+        Sessions are created (via ConnectionManager) before the client
+        connects; the socket is attached when it arrives. A new socket for
+        the same session replaces the previous one.
         """
-        raise NotImplementedError(
-            "WebSocket transport not yet implemented. "
-            "Use HTTP transport for Week 1."
+        self._sessions[session.id] = session
+        if websocket is None:
+            return True
+        
+        previous = self._connections.pop(session.id, None)
+        if previous is not None:
+            await self._close(previous, CLOSE_NORMAL, "Replaced by a new connection")
+        
+        await websocket.accept()
+        connection = WebSocketConnection(
+            websocket=websocket,
+            queue=asyncio.Queue(maxsize=settings.WS_SEND_QUEUE_SIZE)
         )
+        connection.sender = asyncio.create_task(self._send_loop(session.id, connection))
+        connection.heartbeat = asyncio.create_task(self._heartbeat_loop(session.id, connection))
+        self._connections[session.id] = connection
+        return True
+    
+    def get_connection(self, session_id: str) -> Optional[WebSocketConnection]:
+        """The session's current connection, if any"""
+        return self._connections.get(session_id)
     
-    async def disconnect(self, session_id: str):
+    def is_replaced(self, session_id: str, connection: WebSocketConnection) -> bool:
+        """Whether a newer connection has taken over the session (a reconnect)"""
+        current = self._connections.get(session_id)
+        return current is not None and current is not connection
+    
+    async def disconnect(self, session_id: str, connection: Optional[WebSocketConnection] = None):
         """
-        Close WebSocket connection
+        Close the WebSocket (if any) and drop the session
         
-        TODO: Implement in future sprint
+        If `connection` is given and has been replaced by a reconnect, only
+        that connection is closed: the session belongs to the new one.
         """
-        raise NotImplementedError("WebSocket transport not yet implemented.")
+        if connection is not None and self.is_replaced(session_id, connection):
+            await self._close(connection, CLOSE_NORMAL)
+            return
+        self._sessions.pop(session_id, None)
+        connection = self._connections.pop(session_id, None)
+        if connection is not None:
+            await self._close(connection, CLOSE_NORMAL)
+    
+    async def _close(self, connection: WebSocketConnection, code: int, reason: str = ""):
+        """Stop a connection's tasks and close its socket"""
+        if connection.closed:
+            return
+        connection.closed = True
+        
+        current = asyncio.current_task()
+        for task in (connection.sender, connection.heartbeat):
+            if task is not None and task is not current:
+                task.cancel()
+        
+        if connection.websocket.application_state == WebSocketState.CONNECTED:
+            try:
+                await connection.websocket.close(code=code, reason=reason)
+            except Exception:
+                pass  # Already gone
+    
+    async def _drop_connection(self, session_id: str, connection: WebSocketConnection, code: int, reason: str):
+        """Close a misbehaving connection, keeping the session"""
+        if self._connections.get(session_id) is connection:
+            del self._connections[session_id]
+        await self._close(connection, code, reason)
     
     async def send(self, session_id: str, message: TransportMessage) -> bool:
         """
-        Send message over WebSocket
+        Queue a message for the client
+        
+        Returns False if the session has no open connection, the frame was
+        dropped, or the client was too slow and has been disconnected.
+        """
+        connection = self._connections.get(session_id)
+        if connection is None or connection.closed:
+            return False
+        
+        if message.type in DROPPABLE_TYPES:
+            try:
+                connection.queue.put_nowait(message)
+                return True
+            except asyncio.QueueFull:
+                connection.dropped += 1
+                return False
+        
+        try:
+            connection.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            pass
+        
+        try:
+            await asyncio.wait_for(connection.queue.put(message), settings.WS_SEND_TIMEOUT)
+            return True
+        except asyncio.TimeoutError:
+            print(f"Warning: WebSocket client for session {session_id} too slow, disconnecting")
+            await self._drop_connection(session_id, connection, CLOSE_SLOW_CLIENT, "Client too slow")
+            return False
+    
+    def discard_pending(self, session_id: str) -> int:
+        """
+        Drop queued, not yet sent response frames (e.g. on barge-in)
+        
+        Returns:
+            Number of frames discarded
+        """
+        connection = self._connections.get(session_id)
+        if connection is None:
+            return 0
+        
+        kept = []
+        discarded = 0
+        while not connection.queue.empty():
+            message = connection.queue.get_nowait()
+            if message.type in RESPONSE_TYPES:
+                discarded += 1
+            else:
+                kept.append(message)
+        for message in kept:
+            connection.queue.put_nowait(message)
+        
+        connection.dropped += discarded
+        return discarded
+    
+    async def _send_loop(self, session_id: str, connection: WebSocketConnection):
+        """Drain the send queue to the socket"""
+        try:
+            while True:
+                message = await connection.queue.get()
+                if message.is_binary:
+                    await connection.websocket.send_bytes(message.to_frame())
+                else:
+                    await connection.websocket.send_json(message.to_dict())
+                connection.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Socket closed under us; the receive side sees the disconnect
+            await self._drop_connection(session_id, connection, CLOSE_NORMAL, "")
+    
+    async def _heartbeat_loop(self, session_id: str, connection: WebSocketConnection):
+        """Ping the client and close the connection if it goes silent"""
+        while True:
+            await asyncio.sleep(settings.WS_HEARTBEAT_INTERVAL)
+            if time.monotonic() - connection.last_seen > settings.WS_HEARTBEAT_TIMEOUT:
+                await self._drop_connection(
+                    session_id, connection, CLOSE_HEARTBEAT_TIMEOUT, "Heartbeat timeout"
+                )
+                return
+            await self.send(session_id, TransportMessage(
+                type=MessageType.PING,
+                session_id=session_id
+            ))
+    
+    async def receive(
+        self,
+        session_id: str,
+        connection: Optional[WebSocketConnection] = None
+    ) -> Optional[TransportMessage]:
+        """
+        Wait for the next message from the client
+        
+        Heartbeats are handled here and not returned. Malformed frames are
+        answered with an error and skipped.
+        
+        Args:
+            session_id: Session ID
+            connection: Read from this connection rather than the session's
+                current one, so a replaced connection's reader stops instead
+                of reading the new socket
         
-        TODO: Implement in future sprint
+        Returns:
+            The next message, or None once the client has disconnected
         """
-        raise NotImplementedError("WebSocket transport not yet implemented.")
+        if connection is None:
+            connection = self._connections.get(session_id)
+        if connection is None:
+            return None
+        
+        while not connection.closed:
+            try:
+                frame = await connection.websocket.receive()
+            except RuntimeError:
+                return None  # Closed by the server
+            connection.last_seen = time.monotonic()
+            
+            if frame["type"] == "websocket.disconnect":
+                await self._drop_connection(session_id, connection, CLOSE_NORMAL, "")
+                return None
+            
+            if frame.get("bytes") is not None:
+                try:
+                    audio = AudioFrame.decode(frame["bytes"])
+                    if audio.session != session_key(session_id):
+                        raise ValueError("Audio frame is for another session")
+                except ValueError as e:
+                    await self.send(session_id, TransportMessage.error(
+                        code="INVALID_AUDIO_FRAME",
+                        message=str(e),
+                        session_id=session_id
+                    ))
+                    continue
+                return TransportMessage.from_frame(audio, session_id=session_id)
+            
+            try:
+                message = TransportMessage.from_dict(json.loads(frame.get("text") or ""))
+            except (ValueError, TypeError, AttributeError) as e:
+                await self.send(session_id, TransportMessage.error(
+                    code="INVALID_MESSAGE",
+                    message=f"Could not parse message: {e}",
+                    session_id=session_id
+                ))
+                continue
+            
+            if message.type == MessageType.PING:
+                await self.send(session_id, TransportMessage(
+                    type=MessageType.PONG,
+                    session_id=session_id,
+                    sequence=message.sequence
+                ))
+                continue
+            if message.type == MessageType.PONG:
+                continue
+            
+            message.session_id = session_id
+            return message
+        
+        return None
     
-    async def receive(self, session_id: str) -> Optional[TransportMessage]:
+    async def stream_response(
+        self,
+        session_id: str,
+        content_generator: AsyncIterator[str]
+    ) -> Optional[str]:
         """
-        Receive message from WebSocket
+        Stream a response to the client as it is generated
         
-        TODO: Implement in future sprint
+        Sends AI_RESPONSE_START, one AI_RESPONSE_CHUNK per generated chunk
+        and AI_RESPONSE_END with the full text. Waiting for queue space
+        paces the generator to the client.
+        
+        Returns:
+            The full response text, or None if the client went away
+            (the caller should then close the generator)
         """
-        raise NotImplementedError("WebSocket transport not yet implemented.")
+        if not await self.send(session_id, TransportMessage(
+            type=MessageType.AI_RESPONSE_START,
+            session_id=session_id,
+            is_final=False
+        )):
+            return None
+        
+        parts = []
+        sequence = 0
+        async for chunk in content_generator:
+            parts.append(chunk)
+            sent = await self.send(session_id, TransportMessage(
+                type=MessageType.AI_RESPONSE_CHUNK,
+                content=chunk,
+                session_id=session_id,
+                sequence=sequence,
+                is_final=False
+            ))
+            if not sent:
+                return None
+            sequence += 1
+        
+        content = "".join(parts)
+        if not await self.send(session_id, TransportMessage(
+            type=MessageType.AI_RESPONSE_END,
+            content=content,
+            session_id=session_id,
+            sequence=sequence,
+            is_final=True
+        )):
+            return None
+        return content
     
     def is_connected(self, session_id: str) -> bool:
-        """Check if WebSocket is connected"""
-        return session_id in self._connections
+        """Check if the session has an open WebSocket"""
+        connection = self._connections.get(session_id)
+        return connection is not None and not connection.closed
+    
+    def get_session(self, session_id: str) -> Optional[TransportSession]:
+        """Get session by ID"""
+        return self._sessions.get(session_id)
     
     async def broadcast(self, message: TransportMessage, session_ids: Set[str] = None):
         """
-        Broadcast message to multiple sessions
+        Send a message to multiple sessions (all connected ones by default)
         
-        TODO: Implement in future sprint
+        Returns:
+            Number of sessions the message was queued for
         """
-        raise NotImplementedError("WebSocket transport not yet implemented.")
-
-
-# ============================================================
-# FUTURE IMPLEMENTATION NOTES
-# ============================================================
-"""
-When implementing WebSocket support, consider:
-
-1. Connection Management:
-   - Handle reconnection gracefully
-   - Implement heartbeat/ping-pong
-   - Clean up stale connections
-
-2. Audio Streaming:
-   - Use binary frames for audio data
-   - Implement buffering for network jitter
-   - Support different audio codecs (Opus recommended)
-
-3. LLM Streaming:
-   - Stream tokens as they arrive
-   - Handle backpressure
-   - Support cancellation (user interrupts)
-
-4. Voice Activity Detection:
-   - Send VAD events (speech start/end)
-   - Implement server-side VAD as backup
-   - Handle overlapping speech
+        targets = session_ids if session_ids is not None else set(self._connections)
+        results = await asyncio.gather(*(
+            self.send(session_id, message) for session_id in targets
+        ))
+        return sum(1 for sent in results if sent)
+    
+    def sweep(self, live_sessions: Collection[str]) -> int:
+        """Drop sessions the manager no longer holds (open connections are kept)"""
+        orphaned = self._sessions.keys() - live_sessions - self._connections.keys()
+        for session_id in orphaned:
+            del self._sessions[session_id]
+        return len(orphaned)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get connection statistics"""
+        connections = list(self._connections.values())
+        return {
+            "connections": len(connections),
+            "queued_frames": sum(c.queue.qsize() for c in connections),
+            "sent_frames": sum(c.sent for c in connections),
+            "dropped_frames": sum(c.dropped for c in connections)
+        }
 
-5. Error Handling:
-   - Graceful degradation on disconnect
-   - Resume from last known state
-   - Client retry logic
 
-Example WebSocket endpoint (for future):
+# Singleton instance
+_websocket_transport: Optional[WebSocketTransport] = None
 
-@app.websocket("/ws/coach/{session_id}")
-async def websocket_coach(websocket: WebSocket, session_id: str):
-    transport = WebSocketTransport()
-    session = TransportSession(id=session_id)
-    
-    await transport.connect(session, websocket)
-    
-    try:
-        while True:
-            message = await transport.receive(session_id)
-            
-            if message.type == MessageType.AUDIO_CHUNK:
-                # Process audio chunk
-                pass
-            elif message.type == MessageType.TEXT:
-                # Process text, stream response
-                async for chunk in llm_client.stream(message.content):
-                    await transport.send(session_id, TransportMessage(
-                        type=MessageType.AI_RESPONSE_CHUNK,
-                        content=chunk,
-                        is_final=False
-                    ))
-    finally:
-        await transport.disconnect(session_id)
-"""
 
+def get_websocket_transport() -> WebSocketTransport:
+    """Get the WebSocket transport singleton"""
+    global _websocket_transport
+    if _websocket_transport is None:
+        _websocket_transport = WebSocketTransport()
+    return _websocket_transport
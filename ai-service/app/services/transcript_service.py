@@ -0,0 +1,227 @@
+"""
+Transcript Service
+Keeps realtime session transcripts bounded: recent messages stay hot in
+Redis, older ones are rolled into zstd segments plus a rolling LLM summary,
+and the full transcript is flushed to Postgres when the session ends
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config import get_settings
+from app.database import async_session_maker
+from app.models.conversation import ConversationHistory
+from app.services.cache_service import get_cache_service, CacheKeys, ConversationMessage
+from app.services.llm_client import get_llm_client
+
+settings = get_settings()
+
+
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a live coaching conversation.
+Merge the new messages into the existing summary. Keep goals, decisions, commitments,
+action items and important personal context; drop small talk.
+Write in the third person, at most 250 words."""
+
+
+class TranscriptService:
+    """
+    Tiered transcript storage for realtime sessions
+
+    - Hot: the last TRANSCRIPT_HOT_MESSAGES messages, a Redis list
+    - Warm: older messages in zstd-compressed segments of
+      TRANSCRIPT_SEGMENT_MESSAGES, plus a rolling summary used in prompts
+    - Cold: the full transcript in Postgres (ConversationHistory); turns
+      are persisted by the write-behind history persister as they happen,
+      or written here when the session ends if that is disabled
+
+    Usage:
+        transcripts = get_transcript_service()
+        await transcripts.append_turn(session_id, "user text", "coach reply")
+        summary = await transcripts.get_summary(session_id)
+    """
+
+    def __init__(self):
+        # Summary updates in flight in this worker, by session
+        self._summaries: Dict[str, asyncio.Task] = {}
+
+    async def append_turn(
+        self,
+        session_id: str,
+        user_content: str,
+        assistant_content: str
+    ):
+        """
+        Append a user message and the coach's reply
+
+        Rolls the oldest hot messages into a segment once the hot tier is a
+        full segment over its limit, and refreshes the summary in the
+        background.
+        """
+        now = datetime.utcnow().isoformat()
+        messages = [
+            ConversationMessage(role="user", content=user_content, timestamp=now),
+            ConversationMessage(role="assistant", content=assistant_content, timestamp=now)
+        ]
+
+        cache = await get_cache_service()
+        hot_count = await cache.append_transcript(session_id, messages)
+
+        segment_size = settings.TRANSCRIPT_SEGMENT_MESSAGES
+        if hot_count < settings.TRANSCRIPT_HOT_MESSAGES + segment_size:
+            return
+
+        rolled = await cache.roll_transcript(session_id, segment_size)
+        if rolled and settings.TRANSCRIPT_SUMMARY_ENABLED:
+            self._schedule_summary(session_id)
+
+    async def get_summary(self, session_id: str) -> Optional[str]:
+        """Get the rolling summary of messages no longer in the hot tier"""
+        cache = await get_cache_service()
+        state = await cache.get_transcript_summary(session_id)
+        return state["summary"]
+
+    async def get_context(self, session_id: str) -> Tuple[Optional[str], List[Dict[str, str]]]:
+        """
+        Get the prompt context of a session: the rolling summary and the
+        hot tier, which together cover the whole transcript
+
+        Returns:
+            Tuple of (summary or None, hot messages as {"role", "content"} dicts)
+        """
+        cache = await get_cache_service()
+        summary, messages = await cache.get_transcript_context(session_id)
+        return summary, [{"role": m.role, "content": m.content} for m in messages]
+
+    async def get_transcript(self, session_id: str) -> List[ConversationMessage]:
+        """Get the full transcript still held in Redis"""
+        cache = await get_cache_service()
+        return await cache.get_transcript(session_id)
+
+    def _schedule_summary(self, session_id: str):
+        """Start a summary update unless one is already running here"""
+        task = self._summaries.get(session_id)
+        if task is not None and not task.done():
+            return
+        task = asyncio.create_task(self._summarize(session_id))
+        self._summaries[session_id] = task
+        task.add_done_callback(lambda _: self._summaries.pop(session_id, None))
+
+    async def _summarize(self, session_id: str):
+        """
+        Fold every segment not yet covered into the rolling summary
+
+        Holds a per-transcript lock, so across workers segments are folded
+        in order and exactly once.
+        """
+        try:
+            cache = await get_cache_service()
+            lock_name = CacheKeys.transcript_meta(session_id)
+            token = await cache.acquire_lock(lock_name, settings.CACHE_LOCK_TIMEOUT * 1000)
+            if token is None:
+                return
+
+            try:
+                while True:
+                    state = await cache.get_transcript_summary(session_id)
+                    segments = await cache.get_transcript_segments(
+                        session_id, state["summarized_segments"]
+                    )
+                    if not segments:
+                        return
+
+                    messages = [m for segment in segments for m in segment]
+                    summary = await self._update_summary(state["summary"], messages)
+                    await cache.set_transcript_summary(
+                        session_id, summary, state["summarized_segments"] + len(segments)
+                    )
+            finally:
+                await cache.release_lock(lock_name, token)
+        except Exception as e:
+            print(f"Warning: Could not update transcript summary for {session_id}: {e}")
+
+    async def _update_summary(
+        self,
+        previous: Optional[str],
+        messages: List[ConversationMessage]
+    ) -> str:
+        """Merge messages into the previous summary with the LLM"""
+        lines = "\n".join(f"{m.role}: {m.content}" for m in messages)
+        prompt = f"""Existing summary:
+{previous or "(none yet)"}
+
+New messages:
+{lines}
+
+Updated summary:"""
+
+        response = await get_llm_client().generate(
+            prompt=prompt,
+            system_prompt=SUMMARY_SYSTEM_PROMPT,
+            temperature=0.3,
+            max_tokens=settings.TRANSCRIPT_SUMMARY_MAX_TOKENS
+        )
+        return response.content.strip()
+
+    async def flush(self, session_id: str, user_id: int, coach_id: int) -> int:
+        """
+        Write the full transcript to Postgres and drop it from Redis
+
+        With HISTORY_PERSIST_ENABLED the turns are already persisted (via
+        CacheService.record_turn), so only the Redis tiers are dropped.
+
+        Args:
+            session_id: Realtime session ID (kept in the row metadata)
+            user_id: User ID
+            coach_id: Coach ID
+
+        Returns:
+            Number of messages written
+        """
+        task = self._summaries.pop(session_id, None)
+        if task is not None:
+            task.cancel()
+
+        cache = await get_cache_service()
+        if settings.HISTORY_PERSIST_ENABLED:
+            await cache.delete_transcript(session_id)
+            return 0
+
+        messages = await cache.get_transcript(session_id)
+
+        if messages:
+            rows = [
+                {
+                    "session_id": None,  # realtime session ids are not integers
+                    "user_id": user_id,
+                    "coach_id": coach_id,
+                    "role": m.role,
+                    "content": m.content,
+                    "message_metadata": {**(m.metadata or {}), "realtime_session_id": session_id},
+                    "idempotency_key": f"rt:{session_id}:{index}",
+                    "created_at": datetime.fromisoformat(m.timestamp).replace(tzinfo=timezone.utc)
+                }
+                for index, m in enumerate(messages)
+            ]
+            statement = insert(ConversationHistory).values(rows).on_conflict_do_nothing(
+                index_elements=["idempotency_key"]
+            )
+            async with async_session_maker() as db:
+                await db.execute(statement)
+                await db.commit()
+
+        await cache.delete_transcript(session_id)
+        return len(messages)
+
+
+# Global transcript service instance
+_transcript_service: Optional[TranscriptService] = None
+
+
+def get_transcript_service() -> TranscriptService:
+    """Get the transcript service instance"""
+    global _transcript_service
+    if _transcript_service is None:
+        _transcript_service = TranscriptService()
+    return _transcript_service
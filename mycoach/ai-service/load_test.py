@@ -0,0 +1,211 @@
+"""
+Concurrency load test for the Coach Alan AI service.
+
+Fires N voice turns at a running service at the same time and reports how
+much they overlapped. While the turns run, /health is probed continuously:
+if any handler blocks the event loop, health latency jumps to the length of
+the blocking call.
+
+Usage (service running on port 8001):
+    python load_test.py --concurrency 8 --audio sample.webm      # /ai/coach-turn (STT + LLM + TTS)
+    python load_test.py --concurrency 8 --audio sample.webm --stream
+    python load_test.py --concurrency 8 --fake                   # in-process, fake OpenAI calls
+
+Note: against a running service every turn makes real OpenAI calls and uses
+quota. With --fake the service is imported in-process with its OpenAI client
+replaced by fakes that only sleep, so no quota (or API key) is needed.
+
+Exits non-zero if fewer than two turns succeed or the turns did not overlap.
+"""
+import argparse
+import asyncio
+import base64
+import io
+import math
+import os
+import struct
+import sys
+import time
+import wave
+from types import SimpleNamespace
+
+import httpx
+
+# Simulated OpenAI latencies for --fake (seconds)
+FAKE_STT_DELAY = 0.5
+FAKE_TOKEN_DELAY = 0.02
+FAKE_TTS_DELAY = 0.4
+FAKE_REPLY = (
+    "That is a great question. Start by writing down your three biggest goals for this quarter. "
+    "Then pick the one that would move the business the most and block time for it every week."
+)
+
+
+async def fake_transcription(**kwargs):
+    await asyncio.sleep(FAKE_STT_DELAY)
+    return SimpleNamespace(text="How do I grow my business this quarter?")
+
+
+class FakeChatStream:
+    """Streamed chat completion that yields FAKE_REPLY word by word"""
+    
+    def __aiter__(self):
+        return self._chunks()
+    
+    async def _chunks(self):
+        for word in FAKE_REPLY.split(" "):
+            await asyncio.sleep(FAKE_TOKEN_DELAY)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + " "))])
+    
+    async def close(self):
+        pass
+
+
+async def fake_chat_completion(stream: bool = False, **kwargs):
+    if stream:
+        return FakeChatStream()
+    await asyncio.sleep(FAKE_TOKEN_DELAY * len(FAKE_REPLY.split(" ")))
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=FAKE_REPLY))])
+
+
+async def fake_speech(input: str, **kwargs):
+    await asyncio.sleep(FAKE_TTS_DELAY)
+    return SimpleNamespace(content=b"\xff\xf3" * (len(input) * 50))
+
+
+def fake_service():
+    """The service app with its OpenAI client replaced by delayed fakes"""
+    os.environ.setdefault("OPENAI_API_KEY", "sk-" + "0" * 48)
+    # Every turn should pay the (fake) TTS latency, and nothing is written to the real cache
+    os.environ["TTS_CACHE_MAX_BYTES"] = "0"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import main as service
+    
+    service.client = SimpleNamespace(
+        audio=SimpleNamespace(
+            transcriptions=SimpleNamespace(create=fake_transcription),
+            speech=SimpleNamespace(create=fake_speech),
+        ),
+        chat=SimpleNamespace(completions=SimpleNamespace(create=fake_chat_completion)),
+    )
+    return service.app
+
+
+def synthetic_audio(seconds: float = 2.0, sample_rate: int = 16000) -> bytes:
+    """A WAV tone standing in for the user's turn in --fake mode"""
+    samples = (int(8000 * math.sin(2 * math.pi * 220 * i / sample_rate)) for i in range(int(seconds * sample_rate)))
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b"".join(struct.pack("<h", sample) for sample in samples))
+    return output.getvalue()
+
+
+async def run_turn(client: httpx.AsyncClient, index: int, endpoint: str, payload: dict, stream: bool) -> dict:
+    """Run one turn; returns its timings"""
+    start = time.time()
+    first_byte = None
+    try:
+        async with client.stream("POST", endpoint, json=payload) as response:
+            async for _ in response.aiter_bytes():
+                if first_byte is None:
+                    first_byte = time.time() - start
+            status = response.status_code
+    except httpx.HTTPError as e:
+        print(f"❌ Turn {index}: {type(e).__name__}: {e}")
+        status = None
+    end = time.time()
+    print(f"[TURN {index}] status={status} total={end - start:.2f}s" + (f" first_byte={first_byte:.2f}s" if stream and first_byte is not None else ""))
+    return {"start": start, "end": end, "status": status, "first_byte": first_byte}
+
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event, interval: float = 0.1) -> list[float]:
+    """Measure /health latency until stopped"""
+    latencies = []
+    while not stop.is_set():
+        start = time.time()
+        try:
+            await client.get("/health")
+            latencies.append(time.time() - start)
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def main(args) -> int:
+    if args.audio:
+        with open(args.audio, "rb") as f:
+            audio = f.read()
+        ext = os.path.splitext(args.audio)[1].lstrip(".") or "webm"
+    else:
+        audio, ext = synthetic_audio(), "wav"
+    audio_base64 = base64.b64encode(audio).decode("utf-8")
+    endpoint = "/ai/coach-turn/stream" if args.stream else "/ai/coach-turn"
+    payloads = [
+        {"sessionId": f"load-test-{i}", "audioBase64": audio_base64, "audioMimeType": f"audio/{ext}"}
+        for i in range(args.concurrency)
+    ]
+
+    # In-process app (same event loop, so /health still shows any blocking) or the running service
+    transport = httpx.ASGITransport(app=fake_service()) if args.fake else None
+    base_url = "http://fake-service" if args.fake else args.url
+    print(f"🚀 {args.concurrency} concurrent turns -> {base_url}{endpoint}")
+
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, timeout=args.timeout, limits=limits) as client:
+        stop = asyncio.Event()
+        health = asyncio.create_task(probe_health(client, stop))
+
+        wall_start = time.time()
+        results = await asyncio.gather(*(
+            run_turn(client, i, endpoint, payload, args.stream)
+            for i, payload in enumerate(payloads)
+        ))
+        wall = time.time() - wall_start
+
+        stop.set()
+        health_latencies = await health
+
+    ok = [r for r in results if r["status"] == 200]
+    busy = sum(r["end"] - r["start"] for r in results)
+    # Most turns in flight at the same time (from start/end events)
+    events = sorted([(r["start"], 1) for r in results] + [(r["end"], -1) for r in results])
+    in_flight = peak = 0
+    for _, delta in events:
+        in_flight += delta
+        peak = max(peak, in_flight)
+
+    print("\n========== RESULTS ==========")
+    print(f"Turns OK:            {len(ok)}/{len(results)}")
+    print(f"Wall time:           {wall:.2f}s")
+    print(f"Sum of turn times:   {busy:.2f}s")
+    print(f"Parallelism:         {busy / wall:.1f}x (a blocked event loop gives ~1.0x)")
+    print(f"Peak turns in flight: {peak}")
+    if health_latencies:
+        print(f"/health latency:     max {max(health_latencies) * 1000:.0f}ms, avg {sum(health_latencies) / len(health_latencies) * 1000:.0f}ms")
+
+    if len(ok) < 2:
+        print("❌ Fewer than 2 turns succeeded - concurrency could not be measured")
+        return 1
+    if busy / wall < 1.5:
+        print("⚠️  Turns ran one after another - something is blocking the event loop")
+        return 1
+    print("✅ Turns were processed concurrently")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrency load test for the Coach Alan AI service")
+    parser.add_argument("--url", default=os.getenv("AI_SERVICE_URL", "http://localhost:8001"))
+    parser.add_argument("--concurrency", "-c", type=int, default=8)
+    parser.add_argument("--audio", help="Audio file to send as the user's turn (required unless --fake)")
+    parser.add_argument("--stream", action="store_true", help="Use the pipelined /ai/coach-turn/stream endpoint")
+    parser.add_argument("--fake", action="store_true", help="Run the service in-process with delayed fake OpenAI calls")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+    if not args.audio and not args.fake:
+        parser.error("--audio is required (or use --fake)")
+    sys.exit(asyncio.run(main(args)))
@@ -1,12 +1,28 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
+import asyncio
 import base64
+import hashlib
+import mmap
 import os
-from typing import Optional
+import random
+import re
+import shutil
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, AsyncIterator, Union
+from urllib.parse import quote
 import json
 from dotenv import load_dotenv
 
+try:
+    import numpy as np
+except ImportError:  # Audio preprocessing is skipped without NumPy
+    np = None
+
 # Load environment variables from .env file (try ai-service/.env first, then parent .env)
 load_dotenv()  # Try ai-service/.env
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))  # Try parent .env
@@ -20,10 +36,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Text of the binary audio endpoints (see /ai/coach-turn/audio)
+    expose_headers=["X-User-Text", "X-Coach-Text"],
 )
 
 # Initialize OpenAI client
-from openai import OpenAI, RateLimitError, APIError
+from openai import AsyncOpenAI, RateLimitError, APIError
 
 api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
@@ -58,7 +76,9 @@ print(f"OpenAI API key loaded: {api_key[:10]}...{api_key[-4:]} (length: {len(api
 print(f"Key characters check - First 5: {repr(api_key[:5])}, Last 5: {repr(api_key[-5:])}")
 
 # Initialize OpenAI client
-client = OpenAI(api_key=api_key)
+# Async client: every call is awaited, so one slow turn (STT, LLM stream,
+# TTS) no longer blocks the event loop and turns are processed concurrently
+client = AsyncOpenAI(api_key=api_key)
 
 # Skip blocking API validation during startup to avoid asyncio cancellation issues
 # The API key will be validated on first actual API call
@@ -145,6 +165,7 @@ class CoachNotesResponse(BaseModel):
 
 class GreetingRequest(BaseModel):
     sessionId: str
+    coachId: str = "alan"  # Coach persona (see GREETING_PERSONAS)
 
 
 class GreetingResponse(BaseModel):
@@ -258,14 +279,151 @@ def save_turn(session_id: str, user_text: str, coach_text: str):
     })
 
 
+# ============================================================
+# Audio preprocessing before STT: decode, trim silence, 16 kHz mono, re-encode
+# ============================================================
+
+STT_PREPROCESS = os.getenv("STT_PREPROCESS", "true").lower() in ("1", "true", "yes")
+# Codec of the upload sent to Whisper: "opus" (smallest) or "flac" (lossless)
+STT_UPLOAD_CODEC = os.getenv("STT_UPLOAD_CODEC", "opus")
+STT_SAMPLE_RATE = 16000  # What Whisper works at internally
+
+# Energy VAD: 30 ms frames; a frame is speech when it is VAD_NOISE_MARGIN_DB above
+# the noise floor (10th percentile of frame energy), clamped to [VAD_MIN_DBFS, VAD_MAX_THRESHOLD_DBFS]
+VAD_FRAME_MS = 30
+VAD_PADDING_MS = 250  # Kept around the speech so word onsets/endings aren't clipped
+VAD_NOISE_MARGIN_DB = 10.0
+VAD_MIN_DBFS = float(os.getenv("STT_VAD_MIN_DBFS", "-50"))
+VAD_MAX_THRESHOLD_DBFS = -35.0  # Normal speech is always louder than this
+
+FFMPEG_TIMEOUT = 10  # seconds
+UPLOAD_ENCODERS = {
+    "opus": (["-c:a", "libopus", "-b:a", "24k", "-application", "voip", "-f", "ogg"], "ogg"),
+    "flac": (["-c:a", "flac", "-f", "flac"], "flac"),
+}
+
+ffmpeg_path = shutil.which("ffmpeg")
+if STT_PREPROCESS and (ffmpeg_path is None or np is None):
+    print("WARNING: STT audio preprocessing disabled (needs ffmpeg and numpy); uploading client audio as-is")
+
+# Totals for /health
+stt_stats = {
+    "turns": 0,
+    "preprocessed": 0,
+    "bytesIn": 0,
+    "bytesUploaded": 0,
+    "silenceTrimmedSeconds": 0.0,
+    "sttSeconds": 0.0
+}
+
+
+async def run_ffmpeg(args: list[str], input_bytes: bytes) -> bytes:
+    """Run ffmpeg with stdin/stdout pipes (no temp files)"""
+    process = await asyncio.create_subprocess_exec(
+        ffmpeg_path, "-hide_banner", "-loglevel", "error", *args,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(input_bytes), FFMPEG_TIMEOUT)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise RuntimeError("ffmpeg timed out")
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {stderr.decode(errors='replace').strip()[:200]}")
+    return stdout
+
+
+def trim_silence(samples: "np.ndarray", sample_rate: int = STT_SAMPLE_RATE) -> "np.ndarray":
+    """
+    Cut leading and trailing silence from 16-bit mono PCM with an energy VAD.
+    Vectorized: frame energies are computed in one pass over a (frames x samples) view.
+    Returns an empty array when nothing is above the speech threshold.
+    """
+    frame = sample_rate * VAD_FRAME_MS // 1000
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return samples
+    
+    frames = samples[:n_frames * frame].reshape(n_frames, frame).astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    dbfs = 20 * np.log10(np.maximum(rms, 1e-9) / 32768.0)
+    
+    noise_floor = np.percentile(dbfs, 10)
+    threshold = min(max(noise_floor + VAD_NOISE_MARGIN_DB, VAD_MIN_DBFS), VAD_MAX_THRESHOLD_DBFS)
+    voiced = np.flatnonzero(dbfs > threshold)
+    if voiced.size == 0:
+        return samples[:0]
+    
+    padding = VAD_PADDING_MS // VAD_FRAME_MS
+    start = max(0, voiced[0] - padding) * frame
+    end = (voiced[-1] + 1 + padding) * frame
+    return samples[start:] if end >= n_frames * frame else samples[start:end]
+
+
+async def preprocess_audio(audio_bytes: bytes, file_ext: str) -> tuple[bytes, str]:
+    """
+    Shrink the client's audio before uploading it to Whisper:
+    decode (ffmpeg) -> downmix to mono 16 kHz PCM -> trim silence (NumPy VAD) -> re-encode compactly.
+    
+    Returns (audio, file extension); the original audio if preprocessing is
+    unavailable, fails, or wouldn't make the upload smaller.
+    Raises HTTPException(400) if the audio contains no speech at all.
+    """
+    import time
+    if not STT_PREPROCESS or ffmpeg_path is None or np is None:
+        return audio_bytes, file_ext
+    
+    start = time.time()
+    try:
+        pcm = await run_ffmpeg(
+            ["-i", "pipe:0", "-ac", "1", "-ar", str(STT_SAMPLE_RATE), "-f", "s16le", "pipe:1"],
+            audio_bytes
+        )
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        trimmed = trim_silence(samples)
+        if trimmed.size == 0:
+            raise HTTPException(status_code=400, detail="No speech detected in audio")
+        
+        encoder_args, upload_ext = UPLOAD_ENCODERS.get(STT_UPLOAD_CODEC, UPLOAD_ENCODERS["opus"])
+        encoded = await run_ffmpeg(
+            ["-f", "s16le", "-ar", str(STT_SAMPLE_RATE), "-ac", "1", "-i", "pipe:0", *encoder_args, "pipe:1"],
+            trimmed.tobytes()
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Warning: Audio preprocessing failed, uploading original audio: {e}")
+        return audio_bytes, file_ext
+    
+    trimmed_seconds = (samples.size - trimmed.size) / STT_SAMPLE_RATE
+    if len(encoded) == 0 or len(encoded) >= len(audio_bytes):
+        return audio_bytes, file_ext
+    
+    stt_stats["preprocessed"] += 1
+    stt_stats["silenceTrimmedSeconds"] += trimmed_seconds
+    saved = len(audio_bytes) - len(encoded)
+    print(f"[PREPROCESS] {len(audio_bytes)/1024:.1f}KB -> {len(encoded)/1024:.1f}KB "
+          f"(saved {saved/len(audio_bytes):.0%}), trimmed {trimmed_seconds:.2f}s silence in {time.time()-start:.3f}s")
+    return encoded, upload_ext
+
+
 async def transcribe_audio(audio_base64: str, mime_type: str) -> str:
+    """Transcribe base64-encoded audio (JSON endpoints)"""
+    try:
+        audio_bytes = base64.b64decode(audio_base64)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid audioBase64: {str(e)}")
+    return await transcribe_audio_bytes(audio_bytes, mime_type)
+
+
+async def transcribe_audio_bytes(audio_bytes: bytes, mime_type: str) -> str:
     """Transcribe audio using OpenAI Whisper - optimized with minimal disk I/O"""
     import tempfile
     import io
     try:
-        # Decode base64 audio
-        audio_bytes = base64.b64decode(audio_base64)
-        
         if len(audio_bytes) == 0:
             raise ValueError("Audio data is empty")
         
@@ -280,6 +438,13 @@ async def transcribe_audio(audio_base64: str, mime_type: str) -> str:
         elif "m4a" in mime_type.lower():
             file_ext = "m4a"
         
+        # Trim silence / downsample / re-encode before upload
+        stt_stats["turns"] += 1
+        stt_stats["bytesIn"] += len(audio_bytes)
+        audio_bytes, file_ext = await preprocess_audio(audio_bytes, file_ext)
+        stt_stats["bytesUploaded"] += len(audio_bytes)
+        stt_start = time.time()
+        
         # Try BytesIO first (fastest - pure in-memory)
         # If OpenAI API requires a real file, fall back to temp file
         try:
@@ -293,7 +458,7 @@ async def transcribe_audio(audio_base64: str, mime_type: str) -> str:
             # Attempt to use BytesIO directly (fastest - no disk I/O)
             # Optimized for minimal latency - no unnecessary processing
             # Force English language and improve accuracy with prompt
-            transcript = client.audio.transcriptions.create(
+            transcript = await client.audio.transcriptions.create(
                 model="whisper-1",  # Fastest transcription model
                 file=audio_file,
                 language="en",  # Force English-only transcription
@@ -310,7 +475,7 @@ async def transcribe_audio(audio_base64: str, mime_type: str) -> str:
                 
                 # Call Whisper API (fallback if BytesIO doesn't work)
                 # Force English language and improve accuracy with prompt
-                transcript = client.audio.transcriptions.create(
+                transcript = await client.audio.transcriptions.create(
                     model="whisper-1",  # Fastest transcription model
                     file=tmp_file,
                     language="en",  # Force English-only transcription
@@ -319,6 +484,10 @@ async def transcribe_audio(audio_base64: str, mime_type: str) -> str:
                     response_format="text"  # Get plain text response
                 )
         
+        stt_seconds = time.time() - stt_start
+        stt_stats["sttSeconds"] += stt_seconds
+        print(f"[TIMING] Whisper upload+transcribe: {stt_seconds:.2f}s ({len(audio_bytes)/1024:.1f}KB)")
+        
         # Extract text from transcript object (fastest path)
         transcript_text = transcript.text.strip()
         
@@ -356,7 +525,7 @@ async def generate_coach_response(session_id: str, user_text: str) -> str:
         # Use GPT-4o-mini - FASTEST model with great quality
         # Optimized for detailed, comprehensive responses
         try:
-            stream = client.chat.completions.create(
+            stream = await client.chat.completions.create(
                 model="gpt-4o-mini",  # Fastest OpenAI model
                 messages=messages,
                 temperature=0.7,
@@ -366,7 +535,7 @@ async def generate_coach_response(session_id: str, user_text: str) -> str:
             
             # Collect streaming response as tokens arrive
             coach_text = ""
-            for chunk in stream:
+            async for chunk in stream:
                 if chunk.choices[0].delta.content is not None:
                     coach_text += chunk.choices[0].delta.content
             
@@ -379,7 +548,7 @@ async def generate_coach_response(session_id: str, user_text: str) -> str:
                 raise handle_openai_error(gpt35_error, "coach response generation")
             # For other errors, try GPT-4o as fallback
             try:
-                stream = client.chat.completions.create(
+                stream = await client.chat.completions.create(
                     model="gpt-4o",  # Fast and capable fallback
                     messages=messages,
                     temperature=0.7,
@@ -389,7 +558,7 @@ async def generate_coach_response(session_id: str, user_text: str) -> str:
                 
                 # Collect streaming response
                 coach_text = ""
-                for chunk in stream:
+                async for chunk in stream:
                     if chunk.choices[0].delta.content is not None:
                         coach_text += chunk.choices[0].delta.content
                 
@@ -417,22 +586,214 @@ async def generate_coach_response(session_id: str, user_text: str) -> str:
         )
 
 
-async def text_to_speech(text: str) -> tuple[bytes, str]:
+# ============================================================
+# TTS cache: content-addressed MP3s on disk, memory-mapped reads
+# ============================================================
+
+TTS_MODEL = "tts-1"  # Fastest model (tts-1-hd is slower but higher quality)
+TTS_SPEED = 1.0      # Natural human talking speed (not fast)
+
+# Total size of cached audio (LRU eviction above it; 0 disables the cache)
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.dirname(__file__), "tts_cache"))
+# How often a worker re-indexes TTS_CACHE_DIR to count entries written by other workers
+TTS_CACHE_RESCAN_SECONDS = 60
+
+# Audio as returned by the cache (mmap) or by OpenAI (bytes); both are bytes-like
+AudioData = Union[bytes, mmap.mmap]
+
+
+class TTSCache:
+    """
+    Content-addressed TTS cache keyed by (model, voice, speed, normalized text).
+    
+    - Each entry is one MP3 file named by the SHA-256 of its key, so the
+      directory itself is the index: workers sharing TTS_CACHE_DIR share
+      entries without any coordination
+    - Hits are memory-mapped rather than read: the audio stays in the OS
+      page cache (shared by all workers) instead of being copied per request
+    - LRU by total bytes: hits move an entry to the end (and touch its mtime,
+      so the order survives restarts); the oldest entries are deleted once
+      TTS_CACHE_MAX_BYTES is exceeded
+    - Each worker keeps its own index; it re-scans the directory at most every
+      TTS_CACHE_RESCAN_SECONDS, so the size cap covers every worker's entries
+      (between scans the directory can briefly exceed it)
+    """
+    
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, int] = OrderedDict()  # key -> size, least recent first
+        self.total_bytes = 0
+        self._scanned_at = 0.0
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_served = 0
+        
+        if self.enabled:
+            self.load()
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+    
+    @staticmethod
+    def key(text: str, voice: str, model: str = TTS_MODEL, speed: float = TTS_SPEED) -> str:
+        """Cache key; whitespace differences don't change the audio"""
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{model}|{voice}|{speed}|{normalized}".encode("utf-8")).hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+    
+    def _scan(self) -> list[tuple[str, int]]:
+        """(key, size) of the files on disk, written by any worker, least recently used first"""
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".mp3"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Evicted by another worker meanwhile
+                files.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        return [(key, size) for _, key, size in sorted(files)]
+    
+    def _index(self, files: list[tuple[str, int]]):
+        self._entries = OrderedDict(files)
+        self.total_bytes = sum(self._entries.values())
+        self._scanned_at = time.monotonic()
+    
+    def load(self):
+        """Index the files already on disk, least recently used first"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._index(self._scan())
+        self._evict()
+        print(f"[TTS CACHE] {len(self._entries)} entries, {self.total_bytes / 1024 / 1024:.1f} MB")
+    
+    def get(self, key: str) -> Optional[mmap.mmap]:
+        """Cached audio as a read-only memory map, or None"""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # Evicted by another worker (or empty): forget it
+            size = self._entries.pop(key, None)
+            if size is not None:
+                self.total_bytes -= size
+            self.misses += 1
+            return None
+        
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        else:
+            # Written by another worker
+            self._entries[key] = len(audio)
+            self.total_bytes += len(audio)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        
+        self.hits += 1
+        self.bytes_served += len(audio)
+        return audio
+    
+    def _write(self, key: str, audio: AudioData, rescan: bool) -> Optional[list[tuple[str, int]]]:
+        """Write one entry; returns a fresh scan of the directory if rescan is set"""
+        path = self._path(key)
+        # Unique per write: concurrent misses for the same key (in this or
+        # another worker) must not share a temp file
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return self._scan() if rescan else None
+    
+    async def put(self, key: str, audio: AudioData):
+        """Store audio (written atomically, off the event loop)"""
+        if not self.enabled or len(audio) == 0 or len(audio) > self.max_bytes:
+            return
+        rescan = time.monotonic() - self._scanned_at >= TTS_CACHE_RESCAN_SECONDS
+        try:
+            files = await asyncio.to_thread(self._write, key, audio, rescan)
+        except OSError as e:
+            print(f"Warning: Could not write TTS cache entry: {e}")
+            return
+        
+        if files is not None:
+            # Picks up other workers' entries (and this one)
+            self._index(files)
+        else:
+            previous = self._entries.pop(key, 0)
+            self._entries[key] = len(audio)
+            self.total_bytes += len(audio) - previous
+        self._evict()
+    
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+    
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 3) if lookups else None,
+            "bytesServed": self.bytes_served,
+            "evictions": self.evictions
+        }
+
+
+tts_cache = TTSCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES)
+
+
+async def text_to_speech(text: str, voice: str = "alloy") -> tuple[AudioData, str]:
     """Convert text to speech using OpenAI TTS - natural quality, optimized for latency"""
     import time
     start = time.time()
+    
+    # Repeated phrases never pay TTS latency twice
+    cache_key = TTSCache.key(text, voice)
+    cached = tts_cache.get(cache_key)
+    if cached is not None:
+        print(f"[TTS] Cache hit: {len(cached)} bytes in {time.time()-start:.3f}s")
+        return cached, "audio/mpeg"
+    
     try:
         # Use tts-1 (fastest) with natural human speed and quality
         # Focus on reducing LATENCY (time to start), not speech speed
-        response = client.audio.speech.create(
-            model="tts-1",  # Fastest model (tts-1-hd is slower but higher quality)
-            voice="alloy",  # Neutral, balanced voice
+        response = await client.audio.speech.create(
+            model=TTS_MODEL,
+            voice=voice,  # Default "alloy": neutral, balanced voice
             input=text,
-            speed=1.0,  # Natural human talking speed (not fast)
+            speed=TTS_SPEED,
         )
         
         audio_bytes = response.content
         print(f"[TTS] Generated {len(audio_bytes)} bytes in {time.time()-start:.2f}s")
+        await tts_cache.put(cache_key, audio_bytes)
         return audio_bytes, "audio/mpeg"
     except HTTPException:
         # Re-raise HTTP exceptions (from handle_openai_error) as-is
@@ -513,6 +874,359 @@ async def coach_turn(request: CoachTurnRequest):
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
 
+# ============================================================
+# Pipelined voice turn: STT -> streaming LLM -> per-sentence TTS
+# ============================================================
+
+# Sentence boundary: terminal punctuation (plus closing quotes/brackets) then whitespace
+SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+')
+# Don't send tiny fragments ("Haha!") to TTS on their own; merge them with the next sentence
+MIN_TTS_CHARS = int(os.getenv("MIN_TTS_CHARS", "30"))
+# Sentences synthesized in parallel per turn
+TTS_MAX_PARALLEL = int(os.getenv("TTS_MAX_PARALLEL", "3"))
+
+
+def split_sentences(buffer: str, min_chars: int = MIN_TTS_CHARS) -> tuple[list[str], str]:
+    """
+    Split complete sentences off the front of streamed text.
+    Returns (sentences, remainder); the remainder is kept until more text arrives.
+    """
+    sentences = []
+    start = 0
+    for match in SENTENCE_END.finditer(buffer):
+        candidate = buffer[start:match.end()].strip()
+        if len(candidate) >= min_chars:
+            sentences.append(candidate)
+            start = match.end()
+    return sentences, buffer[start:]
+
+
+async def stream_coach_sentences(user_text: str) -> AsyncIterator[str]:
+    """Stream the coach response from the LLM, yielding it sentence by sentence"""
+    messages = [
+        {"role": "system", "content": COACH_ALAN_SYSTEM_PROMPT},
+        {"role": "user", "content": user_text}
+    ]
+    
+    try:
+        stream = await client.chat.completions.create(
+            model="gpt-4o-mini",  # Fastest OpenAI model
+            messages=messages,
+            temperature=0.7,
+            max_tokens=800,
+            stream=True,
+        )
+    except (RateLimitError, APIError) as e:
+        raise handle_openai_error(e, "coach response generation")
+    
+    buffer = ""
+    try:
+        async for chunk in stream:
+            if not chunk.choices or chunk.choices[0].delta.content is None:
+                continue
+            buffer += chunk.choices[0].delta.content
+            sentences, buffer = split_sentences(buffer)
+            for sentence in sentences:
+                yield sentence
+    except (RateLimitError, APIError) as e:
+        raise handle_openai_error(e, "coach response generation")
+    finally:
+        # Stops generation if the client went away mid-turn
+        await stream.close()
+    
+    if buffer.strip():
+        yield buffer.strip()
+
+
+async def synthesize_sentence(text: str, semaphore: asyncio.Semaphore) -> AudioData:
+    """TTS for one sentence (bounded by the turn's semaphore; cache hits skip it)"""
+    async with semaphore:
+        audio_bytes, _ = await text_to_speech(text)
+        return audio_bytes
+
+
+async def pipelined_coach_audio(user_text: str) -> AsyncIterator[tuple[int, str, AudioData]]:
+    """
+    Run LLM and TTS as a pipeline.
+    
+    Each sentence goes to TTS as soon as the LLM finishes it, while later
+    sentences are still being generated. Audio is yielded in sentence order
+    as (index, sentence, mp3 bytes).
+    """
+    semaphore = asyncio.Semaphore(TTS_MAX_PARALLEL)
+    pending: asyncio.Queue = asyncio.Queue()
+    
+    async def produce():
+        try:
+            async for sentence in stream_coach_sentences(user_text):
+                tts = asyncio.create_task(synthesize_sentence(sentence, semaphore))
+                pending.put_nowait((sentence, tts))
+        finally:
+            pending.put_nowait(None)
+    
+    producer = asyncio.create_task(produce())
+    tasks = []
+    try:
+        index = 0
+        while True:
+            item = await pending.get()
+            if item is None:
+                break
+            sentence, tts = item
+            tasks.append(tts)
+            yield index, sentence, await tts
+            index += 1
+        await producer  # Surface LLM errors
+    finally:
+        producer.cancel()
+        for tts in tasks:
+            tts.cancel()
+        while not pending.empty():
+            item = pending.get_nowait()
+            if item is not None:
+                item[1].cancel()
+
+
+def ndjson(event: dict) -> bytes:
+    """Encode one event of the streamed turn"""
+    return (json.dumps(event) + "\n").encode("utf-8")
+
+
+@app.post("/ai/coach-turn/stream")
+async def coach_turn_stream(request: CoachTurnRequest):
+    """
+    Pipelined voice turn: STT -> streaming LLM -> per-sentence TTS.
+    
+    Streams newline-delimited JSON (chunked) so playback can start after
+    STT + the first sentence instead of after the whole pipeline:
+      {"type": "transcript", "userText": "..."}
+      {"type": "audio", "index": 0, "text": "...", "audioBase64": "...", "mimeType": "audio/mpeg"}  (in order)
+      {"type": "done", "coachText": "...", "timing": {...}}
+      {"type": "error", "detail": ...}  (if a later stage fails)
+    """
+    import time
+    total_start = time.time()
+    
+    # STT happens before the response starts, so failures are normal HTTP errors
+    stt_start = time.time()
+    user_text = await transcribe_audio(request.audioBase64, request.audioMimeType)
+    stt_duration = time.time() - stt_start
+    print(f"[TIMING] STT: {stt_duration:.2f}s")
+    
+    if not user_text or len(user_text.strip()) == 0:
+        raise HTTPException(status_code=400, detail="Transcription returned empty text")
+    
+    print(f"[USER] {user_text}")
+    
+    async def events():
+        yield ndjson({"type": "transcript", "userText": user_text})
+        
+        sentences = []
+        first_audio = None
+        try:
+            async for index, sentence, audio_bytes in pipelined_coach_audio(user_text):
+                if first_audio is None:
+                    first_audio = time.time() - total_start
+                    print(f"[TIMING] First audio: {first_audio:.2f}s")
+                sentences.append(sentence)
+                yield ndjson({
+                    "type": "audio",
+                    "index": index,
+                    "text": sentence,
+                    "audioBase64": base64.b64encode(audio_bytes).decode("utf-8"),
+                    "mimeType": "audio/mpeg"
+                })
+        except HTTPException as e:
+            yield ndjson({"type": "error", "status": e.status_code, "detail": e.detail})
+            return
+        except Exception as e:
+            print(f"Error in coach_turn_stream: {type(e).__name__}: {e}")
+            yield ndjson({"type": "error", "status": 500, "detail": f"Processing failed: {str(e)}"})
+            return
+        
+        coach_text = " ".join(sentences)
+        total_duration = time.time() - total_start
+        print(f"[COACH] {coach_text}")
+        print(f"[TIMING] TOTAL (streamed): {total_duration:.2f}s (STT: {stt_duration:.2f}s, first audio: {first_audio or 0:.2f}s, sentences: {len(sentences)})")
+        yield ndjson({
+            "type": "done",
+            "coachText": coach_text,
+            "timing": {
+                "sttSeconds": round(stt_duration, 3),
+                "firstAudioSeconds": round(first_audio, 3) if first_audio is not None else None,
+                "totalSeconds": round(total_duration, 3)
+            }
+        })
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+# ============================================================
+# Binary audio: raw/multipart uploads, streamed audio/mpeg responses
+# ============================================================
+
+# Size of the audio chunks forwarded from TTS to the client
+AUDIO_STREAM_CHUNK_BYTES = 4096
+
+
+async def read_audio_upload(request: Request) -> tuple[str, bytes, str]:
+    """
+    Read the user's audio from the request body, without base64.
+    
+    Accepts either:
+      - multipart/form-data with a `sessionId` field and an `audio` file
+      - raw audio bytes (Content-Type audio/webm, audio/wav, ...), with the
+        session id in the `sessionId` query parameter or X-Session-Id header
+    
+    Returns (session_id, audio_bytes, mime_type)
+    """
+    content_type = request.headers.get("content-type", "")
+    
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("audio")
+        if upload is None or not hasattr(upload, "read"):
+            raise HTTPException(status_code=400, detail="Multipart upload needs an 'audio' file field")
+        session_id = form.get("sessionId") or request.query_params.get("sessionId")
+        audio_bytes = await upload.read()
+        mime_type = upload.content_type or "audio/webm"
+    else:
+        session_id = request.query_params.get("sessionId") or request.headers.get("x-session-id")
+        audio_bytes = await request.body()
+        mime_type = content_type.split(";")[0].strip() or "audio/webm"
+    
+    if not session_id:
+        raise HTTPException(status_code=400, detail="sessionId is required")
+    if len(audio_bytes) == 0:
+        raise HTTPException(status_code=400, detail="Audio data is empty")
+    return str(session_id), audio_bytes, mime_type
+
+
+def text_header(text: str) -> str:
+    """HTTP headers are latin-1 only: URL-encode text (decodeURIComponent on the client)"""
+    return quote(text, safe=" .,!?'")
+
+
+async def open_speech_stream(text: str, voice: str = "alloy") -> AsyncIterator[bytes]:
+    """
+    Start TTS and return an iterator over the MP3 bytes as they are synthesized.
+    
+    The upstream request is opened (and its status checked) before the
+    response starts, so OpenAI errors still become a normal HTTP error instead
+    of a truncated stream. The connection is released when the iterator is
+    exhausted, closed or garbage-collected.
+    """
+    import time
+    start = time.time()
+    
+    cache_key = TTSCache.key(text, voice)
+    cached = tts_cache.get(cache_key)
+    if cached is not None:
+        async def cached_body():
+            view = memoryview(cached)
+            try:
+                for offset in range(0, len(view), AUDIO_STREAM_CHUNK_BYTES):
+                    yield bytes(view[offset:offset + AUDIO_STREAM_CHUNK_BYTES])
+            finally:
+                view.release()
+            print(f"[TTS] Cache hit: streamed {len(cached)} bytes")
+        return cached_body()
+    
+    async def body():
+        chunks = []
+        sent = 0
+        complete = False
+        async with client.audio.speech.with_streaming_response.create(
+            model=TTS_MODEL,
+            voice=voice,
+            input=text,
+            speed=TTS_SPEED,
+            response_format="mp3",
+        ) as response:
+            # Connected and the status is OK; the first __anext__ (below) stops here
+            yield b""
+            try:
+                async for chunk in response.iter_bytes(AUDIO_STREAM_CHUNK_BYTES):
+                    if sent == 0:
+                        print(f"[TTS] First audio bytes in {time.time()-start:.2f}s")
+                    sent += len(chunk)
+                    chunks.append(chunk)
+                    yield chunk
+                complete = True
+            finally:
+                print(f"[TTS] Streamed {sent} bytes in {time.time()-start:.2f}s")
+        if complete:
+            # Only complete audio is cached
+            await tts_cache.put(cache_key, b"".join(chunks))
+    
+    # The upstream request is only released by the generator's own `async with`,
+    # so it is started here: a started generator is closed (and the connection
+    # released) by asyncio's async-generator finalizer even if the response is
+    # never iterated, e.g. when the client disconnects first
+    stream = body()
+    try:
+        await stream.__anext__()
+    except (RateLimitError, APIError) as e:
+        raise handle_openai_error(e, "text-to-speech conversion")
+    
+    return stream
+
+
+@app.post("/ai/coach-turn/audio")
+async def coach_turn_audio(request: Request):
+    """
+    Voice turn with binary audio both ways: STT -> LLM -> streamed TTS.
+    
+    Upload: multipart/form-data or raw audio bytes (see read_audio_upload).
+    Response: audio/mpeg, streamed (chunked) as TTS produces it, so playback
+    starts with the first bytes. The transcript and reply are in the
+    X-User-Text and X-Coach-Text headers (URL-encoded).
+    """
+    import time
+    total_start = time.time()
+    
+    try:
+        session_id, audio_bytes, mime_type = await read_audio_upload(request)
+        
+        stt_start = time.time()
+        user_text = await transcribe_audio_bytes(audio_bytes, mime_type)
+        print(f"[TIMING] STT: {time.time()-stt_start:.2f}s")
+        
+        if not user_text or len(user_text.strip()) == 0:
+            raise HTTPException(status_code=400, detail="Transcription returned empty text")
+        
+        print(f"[USER] {user_text}")
+        
+        llm_start = time.time()
+        coach_text = await generate_coach_response(session_id, user_text)
+        print(f"[TIMING] LLM: {time.time()-llm_start:.2f}s")
+        
+        if not coach_text or len(coach_text.strip()) == 0:
+            raise HTTPException(status_code=500, detail="LLM returned empty response")
+        
+        print(f"[COACH] {coach_text}")
+        
+        audio_stream = await open_speech_stream(coach_text)
+        print(f"[TIMING] Audio stream starts after {time.time()-total_start:.2f}s")
+        
+        return StreamingResponse(
+            audio_stream,
+            media_type="audio/mpeg",
+            headers={
+                "X-User-Text": text_header(user_text),
+                "X-Coach-Text": text_header(coach_text),
+                "Cache-Control": "no-store"
+            }
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in coach_turn_audio: {type(e).__name__}: {e}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+
+
 @app.post("/ai/coach/notes", response_model=CoachNotesResponse)
 async def generate_coach_notes(request: CoachNotesRequest):
     """Generate coaching notes from session transcript"""
@@ -539,7 +1253,7 @@ Generate coaching notes in the following JSON format:
 Be specific, actionable, and focus on business growth. Return ONLY valid JSON, no other text."""
 
         # Use GPT-4o-mini for fast, quality analysis
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "You are a business coach analyzing conversation transcripts. Always return valid JSON."},
@@ -586,31 +1300,238 @@ Be specific, actionable, and focus on business growth. Return ONLY valid JSON, n
         raise HTTPException(status_code=500, detail=f"Failed to generate coaching notes: {str(e)}")
 
 
+# ============================================================
+# Greetings: pre-rendered pool per coach persona
+# ============================================================
+
+GREETING_PERSONAS = {
+    "alan": {
+        "system_prompt": COACH_ALAN_SYSTEM_PROMPT,
+        "greeting_prompt": """You are Alan Wozniak, a warm and caring Business Coach. Give a brief, friendly introduction of yourself in 1 sentence. This is a VOICE conversation, not a chat. Be warm, kind, and welcoming. Keep it short and natural, like you're starting a phone call. NEVER mention "chat", "text", "message", or "excited to chat" - this is a voice call.""",
+        "fallback": "Hey there! I'm Alan, your business coach. What's on your mind today?",
+        "voice": "alloy",
+    },
+}
+
+# Variants kept per persona (0 disables the pool)
+GREETING_POOL_SIZE = int(os.getenv("GREETING_POOL_SIZE", "5"))
+# Each variant is replaced once it is this old (one at a time, spread over the period)
+GREETING_POOL_REFRESH_SECONDS = int(os.getenv("GREETING_POOL_REFRESH_SECONDS", str(6 * 3600)))
+# Rendered audio + index, so a restarted service serves greetings immediately
+GREETING_POOL_DIR = os.getenv("GREETING_POOL_DIR", os.path.join(os.path.dirname(__file__), "greeting_cache"))
+
+
+def get_persona(coach_id: str) -> dict:
+    """Look up a coach persona"""
+    persona = GREETING_PERSONAS.get(coach_id)
+    if persona is None:
+        raise HTTPException(status_code=400, detail=f"Unknown coachId: {coach_id}")
+    return persona
+
+
+async def generate_greeting_text(coach_id: str = "alan") -> str:
+    """Generate a short, warm VOICE greeting (NOT chat-related)"""
+    persona = get_persona(coach_id)
+    
+    # Use GPT-4o-mini for fast response
+    response = await client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": persona["system_prompt"]},
+            {"role": "user", "content": persona["greeting_prompt"]}
+        ],
+        temperature=0.9,  # Variety between pooled greetings
+        max_tokens=50,  # Keep it short
+    )
+    
+    coach_text = response.choices[0].message.content.strip()
+    
+    if not coach_text:
+        coach_text = persona["fallback"]
+    return coach_text
+
+
+class GreetingPool:
+    """
+    Pre-rendered greeting variants (text + MP3) per coach persona.
+    
+    - Filled to GREETING_POOL_SIZE variants in the background at startup;
+      requests pick a random variant, so session start makes no upstream calls
+    - Each variant is replaced once older than GREETING_POOL_REFRESH_SECONDS;
+      replacements are spread over the period, one at a time
+    - Audio is written to GREETING_POOL_DIR with a JSON index per persona and
+      reloaded on startup; it is also kept in memory (a few KB per variant)
+    """
+    
+    def __init__(self, directory: str, size: int, refresh_seconds: int):
+        self.directory = directory
+        self.size = size
+        self.refresh_seconds = refresh_seconds
+        # persona -> variants, oldest first: {"text", "file", "createdAt", "audio"}
+        self.variants: dict[str, list[dict]] = {}
+        self._task: Optional[asyncio.Task] = None
+        
+        self.served = 0
+        self.misses = 0
+        self.rendered = 0
+    
+    def _index_path(self, coach_id: str) -> str:
+        return os.path.join(self.directory, f"{coach_id}.json")
+    
+    def load(self):
+        """Load variants rendered by a previous run"""
+        os.makedirs(self.directory, exist_ok=True)
+        for coach_id in GREETING_PERSONAS:
+            try:
+                with open(self._index_path(coach_id)) as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                continue
+            variants = []
+            for entry in index:
+                try:
+                    with open(os.path.join(self.directory, entry["file"]), "rb") as f:
+                        variants.append({**entry, "audio": f.read()})
+                except (OSError, KeyError):
+                    continue  # Audio file is gone; the background task re-renders
+            self.variants[coach_id] = variants[-self.size:]
+            print(f"[GREETING] Loaded {len(self.variants[coach_id])} pre-rendered greetings for {coach_id}")
+    
+    def pick(self, coach_id: str) -> Optional[dict]:
+        """A random pre-rendered variant, or None if the pool is still empty"""
+        variants = self.variants.get(coach_id)
+        if not variants:
+            self.misses += 1
+            return None
+        self.served += 1
+        return random.choice(variants)
+    
+    def _write_files(self, coach_id: str, variant: dict, retired: list[dict]):
+        """Write the new audio and the index atomically, then delete retired audio"""
+        path = os.path.join(self.directory, variant["file"])
+        with open(path + ".tmp", "wb") as f:
+            f.write(variant["audio"])
+        os.replace(path + ".tmp", path)
+        
+        index = [{k: v for k, v in entry.items() if k != "audio"} for entry in self.variants[coach_id]]
+        index_path = self._index_path(coach_id)
+        with open(index_path + ".tmp", "w") as f:
+            json.dump(index, f)
+        os.replace(index_path + ".tmp", index_path)
+        
+        for entry in retired:
+            try:
+                os.remove(os.path.join(self.directory, entry["file"]))
+            except OSError:
+                pass
+    
+    async def render(self, coach_id: str):
+        """Render one new variant, retiring the oldest if the pool is full"""
+        persona = get_persona(coach_id)
+        coach_text = await generate_greeting_text(coach_id)
+        audio_bytes, _ = await text_to_speech(coach_text, voice=persona["voice"])
+        
+        variant = {
+            "text": coach_text,
+            "file": f"{coach_id}-{uuid.uuid4().hex}.mp3",
+            "createdAt": time.time(),
+            "audio": bytes(audio_bytes)  # May be a TTS cache mmap
+        }
+        variants = self.variants.setdefault(coach_id, [])
+        variants.append(variant)
+        retired = variants[:-self.size]
+        del variants[:-self.size]
+        
+        await asyncio.to_thread(self._write_files, coach_id, variant, retired)
+        self.rendered += 1
+    
+    def _needs_render(self, coach_id: str) -> bool:
+        variants = self.variants.get(coach_id, [])
+        if len(variants) < self.size:
+            return True
+        return time.time() - variants[0]["createdAt"] > self.refresh_seconds
+    
+    async def _run(self):
+        while True:
+            full = True
+            for coach_id in GREETING_PERSONAS:
+                try:
+                    # Fill an empty pool completely; refresh one stale variant per tick
+                    while self._needs_render(coach_id):
+                        filling = len(self.variants.get(coach_id, [])) < self.size
+                        await self.render(coach_id)
+                        if not filling:
+                            break
+                except HTTPException as e:
+                    full = False
+                    print(f"Warning: Could not render greeting for {coach_id}: {e.detail}")
+                except Exception as e:
+                    full = False
+                    print(f"Warning: Could not render greeting for {coach_id}: {type(e).__name__}: {e}")
+            # Retry soon after failures; otherwise spread refreshes over the period
+            await asyncio.sleep(60 if not full else max(1, self.refresh_seconds / self.size))
+    
+    def start(self):
+        """Load persisted variants and start filling/refreshing in the background"""
+        if self.size <= 0 or self._task is not None:
+            return
+        self.load()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    def get_stats(self) -> dict:
+        return {
+            "variants": {coach_id: len(v) for coach_id, v in self.variants.items()},
+            "served": self.served,
+            "misses": self.misses,
+            "rendered": self.rendered
+        }
+
+
+greeting_pool = GreetingPool(GREETING_POOL_DIR, GREETING_POOL_SIZE, GREETING_POOL_REFRESH_SECONDS)
+
+
+@app.on_event("startup")
+async def start_greeting_pool():
+    # Non-blocking: the pool fills in the background, greetings are
+    # generated live until it has variants
+    greeting_pool.start()
+
+
+@app.on_event("shutdown")
+async def stop_greeting_pool():
+    await greeting_pool.stop()
+
+
 @app.post("/ai/greeting", response_model=GreetingResponse)
 async def generate_greeting(request: GreetingRequest):
-    """Generate an initial greeting from Coach Alan"""
+    """Initial greeting from the coach - served from the pre-rendered pool when possible"""
     try:
-        # Generate a short, warm VOICE greeting (NOT chat-related)
-        greeting_prompt = """You are Alan Wozniak, a warm and caring Business Coach. Give a brief, friendly introduction of yourself in 1 sentence. This is a VOICE conversation, not a chat. Be warm, kind, and welcoming. Keep it short and natural, like you're starting a phone call. NEVER mention "chat", "text", "message", or "excited to chat" - this is a voice call."""
+        persona = get_persona(request.coachId)
         
-        # Use GPT-4o-mini for fast response
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": COACH_ALAN_SYSTEM_PROMPT},
-                {"role": "user", "content": greeting_prompt}
-            ],
-            temperature=0.7,
-            max_tokens=50,  # Keep it short
-        )
-        
-        coach_text = response.choices[0].message.content.strip()
+        variant = greeting_pool.pick(request.coachId)
+        if variant is not None:
+            print(f"[GREETING] Pre-rendered greeting for {request.coachId}")
+            return GreetingResponse(
+                coachText=variant["text"],
+                audioBase64=base64.b64encode(variant["audio"]).decode("utf-8"),
+                mimeType="audio/mpeg"
+            )
         
-        if not coach_text:
-            coach_text = "Hey there! I'm Alan, your business coach. What's on your mind today?"
+        # Pool still empty: generate live
+        coach_text = await generate_greeting_text(request.coachId)
         
         # Convert to speech
-        audio_bytes, mime_type = await text_to_speech(coach_text)
+        audio_bytes, mime_type = await text_to_speech(coach_text, voice=persona["voice"])
         
         # Encode audio as base64
         audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
@@ -620,6 +1541,42 @@ async def generate_greeting(request: GreetingRequest):
             audioBase64=audio_base64,
             mimeType=mime_type
         )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error generating greeting: {type(e).__name__}: {e}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Failed to generate greeting: {str(e)}")
+
+
+@app.post("/ai/greeting/audio")
+async def generate_greeting_audio(request: GreetingRequest):
+    """
+    Greeting as audio/mpeg instead of base64 JSON (pre-rendered, or streamed
+    from TTS while the pool is empty).
+    The greeting text is in the X-Coach-Text header (URL-encoded).
+    """
+    try:
+        persona = get_persona(request.coachId)
+        
+        variant = greeting_pool.pick(request.coachId)
+        if variant is not None:
+            return Response(
+                content=variant["audio"],
+                media_type="audio/mpeg",
+                headers={"X-Coach-Text": text_header(variant["text"]), "Cache-Control": "no-store"}
+            )
+        
+        coach_text = await generate_greeting_text(request.coachId)
+        audio_stream = await open_speech_stream(coach_text, voice=persona["voice"])
+        return StreamingResponse(
+            audio_stream,
+            media_type="audio/mpeg",
+            headers={"X-Coach-Text": text_header(coach_text), "Cache-Control": "no-store"}
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error generating greeting: {type(e).__name__}: {e}")
         import traceback
@@ -630,7 +1587,17 @@ async def generate_greeting(request: GreetingRequest):
 @app.get("/health")
 async def health():
     """Health check endpoint"""
-    return {"status": "ok", "service": "coach-alan-ai"}
+    return {
+        "status": "ok",
+        "service": "coach-alan-ai",
+        "greetingPool": greeting_pool.get_stats(),
+        "ttsCache": tts_cache.get_stats(),
+        "stt": {
+            **stt_stats,
+            "bytesSaved": stt_stats["bytesIn"] - stt_stats["bytesUploaded"],
+            "avgSttSeconds": round(stt_stats["sttSeconds"] / stt_stats["turns"], 3) if stt_stats["turns"] else None
+        }
+    }
 
 
 @app.get("/ai/account-status")
@@ -641,7 +1608,7 @@ async def account_status():
     """
     try:
         # Check if we can list models (basic API access check - this is free)
-        models = client.models.list()
+        models = await client.models.list()
         available_models = [model.id for model in models.data]
         
         # Filter for models relevant to this app